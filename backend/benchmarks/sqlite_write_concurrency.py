@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Concurrent write throughput on SQLite, before and after the engine tuning in
+src/database.py.
+
+Each writer thread runs small transactions (insert a notification, commit)
+through a pooled SQLAlchemy engine while reader threads keep scanning the table,
+roughly what the API does under load.
+
+    python benchmarks/sqlite_write_concurrency.py --writers 8 --readers 4 --seconds 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.exc import OperationalError
+
+from src.database import engine_options, install_sqlite_pragmas, sqlite_pragmas
+from src.models import Notification
+
+BASELINE_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def run(label, uri, options, pragmas, args):
+    engine = create_engine(uri, pool_size=args.writers + args.readers, **options)
+    install_sqlite_pragmas(engine, pragmas)
+    Notification.__table__.create(engine, checkfirst=True)
+
+    stop = time.monotonic() + args.seconds
+    counts = {'writes': 0, 'reads': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def writer(n):
+        while time.monotonic() < stop:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(Notification.__table__).values(
+                        id=os.urandom(16).hex(), user_id=f'user-{n}', title='bench', body='x' * 200))
+                key = 'writes'
+            except OperationalError:
+                key = 'errors'
+            with lock:
+                counts[key] += 1
+
+    def reader(n):
+        while time.monotonic() < stop:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(select(func.count()).select_from(Notification.__table__)
+                                 .where(Notification.__table__.c.user_id == f'user-{n}')).scalar()
+                key = 'reads'
+            except OperationalError:
+                key = 'errors'
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    print(f"{label:<10} writes/s={counts['writes'] / args.seconds:>9.1f}  "
+          f"reads/s={counts['reads'] / args.seconds:>9.1f}  lock errors={counts['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--dir', default=None, help='where to create the databases (use a real disk, not tmpfs)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        before = f"sqlite:///{os.path.join(tmp, 'before.db')}"
+        after = f"sqlite:///{os.path.join(tmp, 'after.db')}"
+        # "before" is the old setup: driver defaults (5s timeout), rollback journal, full fsync
+        run('before', before, {}, BASELINE_PRAGMAS, args)
+        config = {'SQLALCHEMY_DATABASE_URI': after}
+        run('after', after, engine_options(config), sqlite_pragmas(config), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""gunicorn settings for ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+One eventlet worker holds thousands of idle Socket.IO connections; the
+limit is ``worker_connections``. Socket.IO sessions live in the worker that
+accepted the handshake. Running more than one worker (WEB_CONCURRENCY > 1)
+therefore needs two things: sticky sessions in the proxy (nginx ``ip_hash``)
+and SOCKETIO_MESSAGE_QUEUE, so that a broadcast reaches clients on every
+worker.
+"""
+import glob
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+worker_class = 'eventlet'
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 5000))
+# Eventlet workers heartbeat from the hub, so this only fires when a request
+# blocks the hub itself (CPU-bound work or an unpatched C driver)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 75
+accesslog = '-'
+# Import the app once in the master; workers fork from it and share its memory copy-on-write
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+# Trust X-Forwarded-* from the local nginx only
+forwarded_allow_ips = '127.0.0.1'
+
+metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if metrics_dir:
+    # Must exist before the (preloaded) app creates its first metric
+    os.makedirs(metrics_dir, exist_ok=True)
+
+if workers > 1 and not os.environ.get('SOCKETIO_MESSAGE_QUEUE'):
+    raise RuntimeError('WEB_CONCURRENCY > 1 needs SOCKETIO_MESSAGE_QUEUE (e.g. redis://localhost:6379/0) '
+                       'and sticky sessions in the proxy')
+
+
+def on_starting(server):
+    # Samples left by the previous run's workers would otherwise be summed into the new ones.
+    # With preload_app the master has already written its own files; keep those.
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+            if not path.endswith(f'_{os.getpid()}.db'):
+                os.remove(path)
+
+
+def when_ready(server):
+    if preload_app:
+        from src.app import before_fork
+        before_fork(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from src.app import after_fork
+        after_fork(server.app.wsgi())
+
+
+def child_exit(server, worker):
+    from src.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
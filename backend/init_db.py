@@ -10,12 +10,13 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import app  # Import from root app.py
 from src.models import db
+from migrate import migrate
 
 def init_db():
     """Initialize the database"""
+    print("Creating all tables in the database...")
+    migrate(app)
     with app.app_context():
-        print("Creating all tables in the database...")
-        db.create_all()
         print("Tables created successfully!")
         print("\nAvailable tables:")
         for table in db.metadata.tables.keys():
@@ -0,0 +1,162 @@
+"""
+Load-test scenarios for the API, one user class per blueprint.
+
+The scenarios log in as seeded users, so seed a local database, start the
+server, then run Locust against it:
+
+    flask --app app sdc seed --users 100000 --messages 2000000 --transactions 1000000
+    python app.py
+    locust -f loadtest/locustfile.py --host http://localhost:5000 \\
+        --headless -u 200 -r 20 -t 5m --csv loadtest/results/run
+
+SDC_SEED_USERS must match the --users the database was seeded with (default
+1000). Pass --tags auth/marketplace/messages/wallet/admin to exercise a single
+blueprint. Locust prints requests/s and the p50...p99 latency table per endpoint
+when the run ends; --csv also writes them to files for comparing runs.
+"""
+import os
+import random
+import sys
+import uuid
+
+from locust import HttpUser, between, tag, task
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.seed import ROLE_SHARES, SEED_PASSWORD, seed_email
+
+SEED_USERS = int(os.environ.get('SDC_SEED_USERS', 1000))
+ROLE_COUNTS = {role: max(int(SEED_USERS * share), 1) for role, share in ROLE_SHARES}
+
+
+class SdcUser(HttpUser):
+    abstract = True
+    wait_time = between(0.5, 2)
+    roles = ('donor', 'surrogate', 'intending_parent')
+
+    def on_start(self):
+        self.user_id = None
+        # A few seeded accounts are inactive; try another one
+        for _ in range(5):
+            role = random.choice(self.roles)
+            if self.login(seed_email(role, random.randrange(ROLE_COUNTS[role]))):
+                break
+
+    def login(self, email):
+        with self.client.post('/api/auth/login', json={'email': email, 'password': SEED_PASSWORD},
+                              catch_response=True) as response:
+            if response.status_code == 401:
+                response.success()
+                return False
+            data = response.json()
+        self.user_id = data['user_id']
+        self.client.headers['Authorization'] = f"Bearer {data['access_token']}"
+        return True
+
+
+@tag('auth')
+class AuthUser(SdcUser):
+    weight = 1
+
+    @task(3)
+    def me(self):
+        self.client.get('/api/auth/me')
+
+    @task(2)
+    def profile(self):
+        self.client.get('/api/auth/profile')
+
+    @task(1)
+    def login_again(self):
+        role = random.choice(self.roles)
+        self.login(seed_email(role, random.randrange(ROLE_COUNTS[role])))
+
+
+@tag('marketplace')
+class MarketplaceUser(SdcUser):
+    weight = 4
+    roles = ('intending_parent',)
+
+    def on_start(self):
+        super().on_start()
+        self.surrogates = []
+
+    @task(5)
+    def browse(self):
+        params = random.choice([{}, {'location': 'Lagos'}, {'blood_group': 'O+'}, {'min_age': 25, 'max_age': 35}])
+        response = self.client.get('/api/marketplace/surrogates', params=params, name='/api/marketplace/surrogates')
+        if response.ok and response.json():
+            self.surrogates = response.json()[:50]
+
+    @task(3)
+    def view_profile(self):
+        if self.surrogates:
+            surrogate = random.choice(self.surrogates)
+            self.client.get(f"/api/marketplace/surrogates/{surrogate['id']}", name='/api/marketplace/surrogates/[id]')
+            self.client.get('/api/verification-badges', params={'user_ids': surrogate['user_id']},
+                            name='/api/verification-badges')
+
+    @task(1)
+    def commission(self):
+        self.client.get('/api/marketplace/commission-settings')
+
+    @task(1)
+    def unlocks(self):
+        self.client.get('/api/marketplace/unlocks')
+
+
+@tag('messages')
+class MessagesUser(SdcUser):
+    weight = 3
+
+    def on_start(self):
+        super().on_start()
+        self.conversation_id = str(uuid.uuid4())
+
+    @task(3)
+    def read(self):
+        self.client.get(f'/api/messages/{self.conversation_id}', name='/api/messages/[conversation_id]')
+
+    @task(1)
+    def send(self):
+        self.client.post('/api/messages', json={'conversation_id': self.conversation_id, 'content': 'Load test message'})
+
+    @task(1)
+    def notifications(self):
+        self.client.get('/api/notifications')
+
+
+@tag('wallet')
+class WalletUser(SdcUser):
+    weight = 2
+
+    @task(2)
+    def balance(self):
+        self.client.get('/api/wallet/balance')
+
+    @task(1)
+    def transactions(self):
+        self.client.get('/api/wallet/transactions')
+
+
+@tag('admin')
+class AdminUser(SdcUser):
+    weight = 1
+    roles = ('admin',)
+
+    @task(3)
+    def kyc_queue(self):
+        response = self.client.get('/api/admin/kyc', params={'status': 'submitted'}, name='/api/admin/kyc')
+        cursor = response.json().get('next_cursor') if response.ok else None
+        if cursor:
+            self.client.get('/api/admin/kyc', params={'status': 'submitted', 'cursor': cursor}, name='/api/admin/kyc')
+
+    @task(2)
+    def users(self):
+        self.client.get('/api/admin/users')
+
+    @task(1)
+    def reports(self):
+        self.client.get('/api/admin/reports')
+        self.client.get('/api/admin/finance')
+
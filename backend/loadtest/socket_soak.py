@@ -0,0 +1,109 @@
+"""
+Socket.IO soak test: hold thousands of WebSocket connections on one node.
+
+Start the server the way production does, then point this at it:
+
+    PORT=5000 gunicorn -c gunicorn.conf.py wsgi:app
+    python loadtest/socket_soak.py --url http://localhost:5000 --clients 5000 --duration 300
+
+Every client connects over WebSocket only (no long-polling fallback) and joins
+one of --rooms conversation rooms. Each client then sends a message to its room
+every --interval seconds. Everyone in the room receives the broadcast, and the
+receivers record how long it took. The summary reports connection failures,
+unexpected disconnects and the p50/p95/p99 fan-out latency. A sync-worker
+deployment cannot pass this. Raise `ulimit -n` on both ends for more than ~1000
+clients.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import socketio
+
+
+class Soak:
+    def __init__(self, args):
+        self.args = args
+        self.connected = 0
+        self.failed = 0
+        self.disconnects = 0
+        self.sent = 0
+        self.received = 0
+        self.latencies = []
+        self.stopping = False
+
+    async def client(self, n):
+        sio = socketio.AsyncClient(reconnection=False)
+        room = f'soak-{n % self.args.rooms}'
+
+        @sio.on('message_received')
+        async def on_message(message):
+            self.received += 1
+            if len(self.latencies) < 1_000_000:
+                self.latencies.append(time.time() - message['sent'])
+
+        @sio.on('disconnect')
+        async def on_disconnect(*args):
+            if not self.stopping:
+                self.disconnects += 1
+
+        try:
+            await sio.connect(self.args.url, transports=['websocket'], wait_timeout=30)
+        except Exception:
+            self.failed += 1
+            return
+        self.connected += 1
+        await sio.emit('join_conversation', {'conversation_id': room})
+
+        # Spread the senders out so the load is steady rather than in waves
+        await asyncio.sleep(random.uniform(0, self.args.interval))
+        while not self.stopping:
+            if sio.connected:
+                await sio.emit('new_message', {'conversation_id': room, 'message': {'sent': time.time(), 'from': n}})
+                self.sent += 1
+            await asyncio.sleep(self.args.interval)
+        await sio.disconnect()
+
+    def report(self, label):
+        latencies = sorted(self.latencies)
+        line = (f'[{label}] connected={self.connected} failed={self.failed} disconnects={self.disconnects} '
+                f'sent={self.sent} received={self.received}')
+        if len(latencies) >= 2:
+            q = statistics.quantiles(latencies, n=100)
+            line += f' latency p50={q[49] * 1000:.1f}ms p95={q[94] * 1000:.1f}ms p99={q[98] * 1000:.1f}ms'
+        print(line, flush=True)
+
+    async def run(self):
+        tasks = []
+        for n in range(self.args.clients):
+            tasks.append(asyncio.create_task(self.client(n)))
+            await asyncio.sleep(1 / self.args.ramp)
+        self.report('ramped up')
+
+        deadline = time.monotonic() + self.args.duration
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(10, max(deadline - time.monotonic(), 0)))
+            self.report(f'{self.args.duration - max(deadline - time.monotonic(), 0):.0f}s')
+            self.latencies = self.latencies[-100_000:]
+        self.stopping = True
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.report('done')
+        return self.failed == 0 and self.disconnects == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--clients', type=int, default=2000)
+    parser.add_argument('--rooms', type=int, default=500, help='Conversation rooms the clients are spread over.')
+    parser.add_argument('--ramp', type=float, default=200, help='New connections per second.')
+    parser.add_argument('--interval', type=float, default=10, help='Seconds between messages from each client.')
+    parser.add_argument('--duration', type=float, default=120, help='Seconds to hold the connections after ramp-up.')
+    args = parser.parse_args()
+    raise SystemExit(0 if asyncio.run(Soak(args).run()) else 1)
+
+
+if __name__ == '__main__':
+    main()
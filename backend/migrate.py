@@ -1,51 +1,56 @@
-import sqlite3
-import os
+#!/usr/bin/env python
+"""
+Bring the database schema up to date with the Alembic migrations in migrations/.
+
+Usage: python migrate.py [revision]    (defaults to "head")
+
+Databases created before migrations existed (by init_db.py / db.create_all())
+have no alembic_version table. They are stamped at the baseline revision first,
+so only the later revisions run against them.
+"""
 import sys
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from sqlalchemy import inspect
+
+BASELINE_REVISION = '0001'
 
-# Add parent to path to import src if needed, but here we use direct sqlite
-def migrate():
-    # Database paths to check
-    paths = ['instance/sdc_dev.db', 'sdc_dev.db']
-    db_path = None
-    for p in paths:
-        if os.path.exists(p):
-            db_path = p
-            break
-            
-    if db_path:
-        print(f"Migrating database: {db_path}")
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Check current columns
-        cursor.execute("PRAGMA table_info(users)")
-        columns = [row[1] for row in cursor.fetchall()]
-        
-        if 'first_name' not in columns:
-            print("Adding first_name to users table...")
-            cursor.execute("ALTER TABLE users ADD COLUMN first_name VARCHAR(255)")
-            
-        if 'last_name' not in columns:
-            print("Adding last_name to users table...")
-            cursor.execute("ALTER TABLE users ADD COLUMN last_name VARCHAR(255)")
-        
-        if 'profile_image' not in columns:
-            print("Adding profile_image to users table...")
-            cursor.execute("ALTER TABLE users ADD COLUMN profile_image VARCHAR(500)")
-            
-        if 'referral_code' not in columns:
-            print("Adding referral_code to users table...")
-            cursor.execute("ALTER TABLE users ADD COLUMN referral_code VARCHAR(20)")
-            
-        if 'referred_by_id' not in columns:
-            print("Adding referred_by_id to users table...")
-            cursor.execute("ALTER TABLE users ADD COLUMN referred_by_id VARCHAR(36)")
-            
-        conn.commit()
-        conn.close()
+
+def alembic_config(connection=None):
+    config = AlembicConfig(os.path.join(BACKEND_DIR, 'alembic.ini'))
+    config.set_main_option('script_location', os.path.join(BACKEND_DIR, 'migrations'))
+    config.attributes['connection'] = connection
+    config.attributes['configure_logger'] = False
+    return config
+
+
+def migrate(app=None, revision='head'):
+    if app is None:
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(BACKEND_DIR, '.env'))
+        from src.app import create_app
+        app = create_app(socketio=False)
+
+    from src.models import db
+
+    with app.app_context():
+        print(f"Migrating database: {db.engine.url.render_as_string(hide_password=True)}")
+        with db.engine.connect() as connection:
+            tables = inspect(connection).get_table_names()
+            connection.commit()
+            config = alembic_config(connection)
+            if 'alembic_version' not in tables and 'users' in tables:
+                print(f"No migration history found, stamping existing schema as {BASELINE_REVISION}...")
+                command.stamp(config, BASELINE_REVISION)
+            command.upgrade(config, revision)
+            connection.commit()
         print("Migration complete!")
-    else:
-        print("Database not found, skip migration.")
+
 
 if __name__ == "__main__":
-    migrate()
+    migrate(revision=sys.argv[1] if len(sys.argv) > 1 else 'head')
@@ -0,0 +1,72 @@
+import os
+import sys
+from logging.config import fileConfig
+
+from alembic import context
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+load_dotenv(os.path.join(BACKEND_DIR, '.env'))
+
+from src.app import create_app
+from src.config import Config
+from src.models import db, JSONType
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get('configure_logger', True):
+    fileConfig(config.config_file_name)
+
+
+def render_item(type_, obj, autogen_context):
+    # Keep revisions independent of src.models: spell JSONType out in plain SQLAlchemy
+    if type_ == 'type' and isinstance(obj, JSONType):
+        autogen_context.imports.add('from sqlalchemy.dialects import postgresql')
+        return "sa.JSON().with_variant(postgresql.JSONB(), 'postgresql')"
+    return False
+
+
+def configure(**kwargs):
+    dialect = kwargs['connection'].dialect.name if 'connection' in kwargs else kwargs['dialect_name']
+    context.configure(
+        target_metadata=db.metadata,
+        # SQLite cannot ALTER most things in place; batch mode copies the table instead
+        render_as_batch=dialect == 'sqlite',
+        compare_type=True,
+        render_item=render_item,
+        # Lets helpers.create_index step out of the transaction for CONCURRENTLY
+        transaction_per_migration=True,
+        **kwargs
+    )
+
+
+def run_migrations_offline():
+    url = make_url(Config.SQLALCHEMY_DATABASE_URI)
+    configure(url=url, dialect_name=url.get_backend_name(), literal_binds=True,
+              dialect_opts={'paramstyle': 'named'})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # migrate.py and the tests hand over a connection of their own app
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    app = create_app(socketio=False)
+    with app.app_context():
+        with db.engine.connect() as connection:
+            configure(connection=connection)
+            with context.begin_transaction():
+                context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
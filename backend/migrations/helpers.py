@@ -0,0 +1,136 @@
+"""Online-safe building blocks for migrations.
+
+On PostgreSQL indexes are built and dropped ``CONCURRENTLY`` outside the
+migration's transaction, so writes to the table keep flowing; on SQLite tables
+are altered in batch mode. Every helper is idempotent: databases that predate
+migrations are stamped at the baseline by ``migrate.py`` and may already have
+some of the objects a later revision adds. In offline (``--sql``) mode the
+existence checks assume nothing exists yet.
+"""
+import contextlib
+import json
+
+import sqlalchemy as sa
+from alembic import context, op
+
+
+def _is_postgresql():
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def has_table(table):
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def has_column(table, column):
+    if context.is_offline_mode():
+        return False
+    return column in {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def has_index(table, name):
+    if context.is_offline_mode():
+        return False
+    if not _is_postgresql():
+        return name in {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+    # A failed CREATE INDEX CONCURRENTLY leaves an invalid index behind; treat it as missing
+    valid = op.get_bind().execute(sa.text(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+    ), {'name': name}).scalar()
+    if valid is False:
+        drop_index(name, table, if_exists=True)
+    return bool(valid)
+
+
+def has_foreign_key(table, columns, referent):
+    if context.is_offline_mode():
+        return False
+    return any(fk['constrained_columns'] == list(columns) and fk['referred_table'] == referent
+               for fk in sa.inspect(op.get_bind()).get_foreign_keys(table))
+
+
+def create_foreign_key(name, table, referent, local_columns, remote_columns):
+    """Add a foreign key unless one on ``local_columns`` to ``referent`` exists (batch mode on SQLite)."""
+    if has_foreign_key(table, local_columns, referent):
+        return
+    if _is_postgresql():
+        op.create_foreign_key(name, table, referent, local_columns, remote_columns)
+    else:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_foreign_key(name, referent, local_columns, remote_columns)
+
+
+def add_column(table, column):
+    if not has_column(table, column.name):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(column)
+
+
+def create_index(name, table, columns, unique=False, where=None):
+    """Create an index unless it exists; ``where`` (raw SQL) makes it a partial index."""
+    if has_index(table, name):
+        return
+    kw = {'postgresql_where': sa.text(where), 'sqlite_where': sa.text(where)} if where else {}
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True, **kw)
+    else:
+        op.create_index(name, table, columns, unique=unique, **kw)
+
+
+def drop_index(name, table, if_exists=False):
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=if_exists)
+    elif not if_exists or has_index(table, name):
+        op.drop_index(name, table_name=table)
+
+
+def load_json(value):
+    """JSON columns read back as strings on databases that still store them as text."""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def backfill(table, read_columns, compute, batch_size=1000, key='id'):
+    """Rewrite rows of ``table`` in ``key`` order, ``batch_size`` rows per statement.
+
+    ``compute(row)`` receives the key and ``read_columns`` and returns a dict of
+    new column values (the same keys for every row), or ``None`` to leave the
+    row alone. On PostgreSQL every
+    batch commits on its own, so no lock is held on the whole table.
+    """
+    if context.is_offline_mode():
+        op.execute(f'-- backfill of {table} skipped in offline mode, run python migrate.py afterwards')
+        return
+
+    bind = op.get_bind()
+    tbl = sa.Table(table, sa.MetaData(), autoload_with=bind)
+    pk = tbl.c[key]
+    block = op.get_context().autocommit_block() if _is_postgresql() else contextlib.nullcontext()
+    last = None
+    with block:
+        while True:
+            query = sa.select(pk, *(tbl.c[c] for c in read_columns)).order_by(pk).limit(batch_size)
+            if last is not None:
+                query = query.where(pk > last)
+            rows = bind.execute(query).all()
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                values = compute(row)
+                if values:
+                    updates.append({'b_key': row[0], **{f'b_{c}': v for c, v in values.items()}})
+            if updates:
+                columns = [c for c in updates[0] if c != 'b_key']
+                statement = tbl.update().where(pk == sa.bindparam('b_key')) \
+                    .values({c[2:]: sa.bindparam(c) for c in columns})
+                bind.execute(statement, updates)
+            last = rows[-1][0]
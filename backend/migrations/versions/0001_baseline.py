@@ -0,0 +1,320 @@
+"""Baseline schema
+
+Schema of the tables as ``db.create_all()`` created them before migrations were
+introduced. Databases that predate Alembic are stamped at this revision by
+``migrate.py`` instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# JSON columns were stored as JSONB on PostgreSQL and as plain strings elsewhere
+JSON_TEXT = sa.String().with_variant(postgresql.JSONB(), 'postgresql')
+
+
+def upgrade():
+    op.create_table('agencies',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('owner_id', sa.String(length=36), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('commission_settings',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('percent', sa.Numeric(precision=5, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('category')
+    )
+    op.create_table('contract_templates',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('variables', JSON_TEXT, nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('contracts',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('creator_id', sa.String(length=36), nullable=True),
+    sa.Column('signer_id', sa.String(length=36), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('signed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('disputes',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('profile_id', sa.String(length=36), nullable=True),
+    sa.Column('reason', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('donor_appointments',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('donor_id', sa.String(length=36), nullable=False),
+    sa.Column('surrogate_id', sa.String(length=36), nullable=True),
+    sa.Column('appointment_date', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('donor_kyc',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('donor_id', sa.String(length=36), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('document_type', sa.String(length=50), nullable=True),
+    sa.Column('document_number', sa.String(length=100), nullable=True),
+    sa.Column('verified_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('donor_id')
+    )
+    op.create_table('donor_profiles',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('donor_id', sa.String(length=36), nullable=False),
+    sa.Column('bio', sa.Text(), nullable=True),
+    sa.Column('date_of_birth', sa.Date(), nullable=True),
+    sa.Column('location', sa.String(length=255), nullable=True),
+    sa.Column('occupation', sa.String(length=255), nullable=True),
+    sa.Column('education', sa.String(length=255), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('donor_id')
+    )
+    op.create_table('escrow_transactions',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('currency', sa.String(length=10), nullable=True),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('reference', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('reference')
+    )
+    op.create_table('messages',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('conversation_id', sa.String(length=36), nullable=False),
+    sa.Column('sender_user_id', sa.String(length=36), nullable=False),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('attachment_url', sa.Text(), nullable=True),
+    sa.Column('attachment_type', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('notifications',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('severity', sa.String(length=20), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('reports',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('reporter_id', sa.String(length=36), nullable=True),
+    sa.Column('target_id', sa.String(length=36), nullable=True),
+    sa.Column('reason', sa.Text(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('roles',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('subscriptions',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('plan', sa.String(length=50), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('surrogate_kyc',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('surrogate_id', sa.String(length=36), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('document_type', sa.String(length=50), nullable=True),
+    sa.Column('document_number', sa.String(length=100), nullable=True),
+    sa.Column('verified_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('surrogate_id')
+    )
+    op.create_table('surrogate_profiles',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('surrogate_id', sa.String(length=36), nullable=False),
+    sa.Column('bio', sa.Text(), nullable=True),
+    sa.Column('date_of_birth', sa.Date(), nullable=True),
+    sa.Column('location', sa.String(length=255), nullable=True),
+    sa.Column('occupation', sa.String(length=255), nullable=True),
+    sa.Column('pregnancy_history', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('surrogate_id')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('role', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('username', sa.String(length=255), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=True),
+    sa.Column('first_name', sa.String(length=255), nullable=True),
+    sa.Column('last_name', sa.String(length=255), nullable=True),
+    sa.Column('profile_image', sa.String(length=500), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('referral_code', sa.String(length=20), nullable=True),
+    sa.Column('referred_by_id', sa.String(length=36), nullable=True),
+    sa.Column('reset_code', sa.String(length=6), nullable=True),
+    sa.Column('reset_code_expires_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['referred_by_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email', 'role', name='uq_user_email_role'),
+    sa.UniqueConstraint('username', 'role', name='uq_user_username_role')
+    )
+    op.create_index(op.f('ix_users_referral_code'), 'users', ['referral_code'], unique=True)
+    op.create_table('wallet_transactions',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('currency', sa.String(length=10), nullable=True),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('reference', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('reference')
+    )
+    op.create_table('donors',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('agency_id', sa.String(length=36), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['agency_id'], ['agencies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('favorites',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('ip_id', sa.String(length=36), nullable=False),
+    sa.Column('target_user_id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['ip_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['target_user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('intending_parents',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('agency_id', sa.String(length=36), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['agency_id'], ['agencies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('kyc_documents',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('role', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('form_data', JSON_TEXT, nullable=True),
+    sa.Column('form_progress', sa.Integer(), nullable=True),
+    sa.Column('agency_id', sa.String(length=36), nullable=True),
+    sa.Column('file_url', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['agency_id'], ['agencies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_kyc_documents_user_id'), 'kyc_documents', ['user_id'], unique=True)
+    op.create_table('marketplace_unlocks',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('listing_id', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('surrogates',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('agency_id', sa.String(length=36), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['agency_id'], ['agencies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('verification_badges',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('verification_badges')
+    op.drop_table('surrogates')
+    op.drop_table('marketplace_unlocks')
+    op.drop_index(op.f('ix_kyc_documents_user_id'), table_name='kyc_documents')
+    op.drop_table('kyc_documents')
+    op.drop_table('intending_parents')
+    op.drop_table('favorites')
+    op.drop_table('donors')
+    op.drop_table('wallet_transactions')
+    op.drop_index(op.f('ix_users_referral_code'), table_name='users')
+    op.drop_table('users')
+    op.drop_table('surrogate_profiles')
+    op.drop_table('surrogate_kyc')
+    op.drop_table('subscriptions')
+    op.drop_table('roles')
+    op.drop_table('reports')
+    op.drop_table('notifications')
+    op.drop_table('messages')
+    op.drop_table('escrow_transactions')
+    op.drop_table('donor_profiles')
+    op.drop_table('donor_kyc')
+    op.drop_table('donor_appointments')
+    op.drop_table('disputes')
+    op.drop_table('contracts')
+    op.drop_table('contract_templates')
+    op.drop_table('commission_settings')
+    op.drop_table('agencies')
@@ -0,0 +1,131 @@
+"""Media assets, KYC search columns and review/badge indexes
+
+Catches the schema up with the models as of the read-replica work: transcoded
+video assets, the extracted KYC search columns (backfilled from form_data), the
+optimistic-locking version column and the indexes behind the marketplace
+filters, the admin review queue and badge lookups.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from datetime import datetime
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of KycDocument.INDEXED_FIELDS / DOB_FORMATS at this revision
+KYC_INDEXED_FIELDS = {
+    'location': (('location',), ('personal', 'location'), ('personal', 'state_of_birth')),
+    'date_of_birth': (('dob',), ('date_of_birth',), ('personal', 'dob')),
+    'blood_group': (('blood_group',), ('medical', 'blood_group')),
+}
+DOB_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y')
+
+KYC_INDEXES = [
+    ('ix_kyc_documents_agency_id', ['agency_id']),
+    ('ix_kyc_documents_blood_group', ['blood_group']),
+    ('ix_kyc_documents_date_of_birth', ['date_of_birth']),
+    ('ix_kyc_documents_role_location', ['role', 'location']),
+    ('ix_kyc_documents_status_updated_at', ['status', 'updated_at', 'id']),
+]
+
+# Stored as VARCHAR on SQLite before JSONType switched to the JSON type
+JSON_COLUMNS = [('kyc_documents', 'form_data'), ('contract_templates', 'variables')]
+
+
+def _parse_dob(value):
+    for fmt in DOB_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip()[:10], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _kyc_search_columns(row):
+    form_data = helpers.load_json(row.form_data)
+    if not isinstance(form_data, dict):
+        return None
+    values = {}
+    for column, paths in KYC_INDEXED_FIELDS.items():
+        values[column] = None
+        for path in paths:
+            value = form_data
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            if value not in (None, ''):
+                values[column] = value
+                break
+    values['location'] = str(values['location']).strip()[:255] if values['location'] else None
+    values['blood_group'] = str(values['blood_group']).strip().upper()[:10] if values['blood_group'] else None
+    values['date_of_birth'] = _parse_dob(values['date_of_birth']) if values['date_of_birth'] else None
+    if all(getattr(row, column) == value for column, value in values.items()):
+        return None
+    return values
+
+
+def _set_json_columns(type_):
+    if op.get_context().dialect.name != 'sqlite' or context.is_offline_mode():
+        return
+    for table, column in JSON_COLUMNS:
+        current = next(c['type'] for c in sa.inspect(op.get_bind()).get_columns(table) if c['name'] == column)
+        if isinstance(current, sa.JSON) != (type_ is sa.JSON):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(column, existing_type=current, type_=type_(), existing_nullable=True)
+
+
+def upgrade():
+    if not helpers.has_table('media_assets'):
+        op.create_table('media_assets',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=True),
+        sa.Column('original_url', sa.Text(), nullable=False),
+        sa.Column('url', sa.Text(), nullable=True),
+        sa.Column('poster_url', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    helpers.create_index('ix_media_assets_original_url', 'media_assets', ['original_url'])
+
+    helpers.add_column('messages', sa.Column('attachment_thumbnail_url', sa.Text(), nullable=True))
+
+    _set_json_columns(sa.JSON)
+    helpers.add_column('kyc_documents', sa.Column('location', sa.String(length=255), nullable=True))
+    helpers.add_column('kyc_documents', sa.Column('date_of_birth', sa.Date(), nullable=True))
+    helpers.add_column('kyc_documents', sa.Column('blood_group', sa.String(length=10), nullable=True))
+    helpers.add_column('kyc_documents', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    helpers.backfill('kyc_documents', ['form_data', 'location', 'date_of_birth', 'blood_group'], _kyc_search_columns)
+    for name, columns in KYC_INDEXES:
+        helpers.create_index(name, 'kyc_documents', columns)
+
+    helpers.create_index('ix_verification_badges_user_id', 'verification_badges', ['user_id'])
+
+
+def downgrade():
+    helpers.drop_index('ix_verification_badges_user_id', 'verification_badges')
+
+    for name, _ in reversed(KYC_INDEXES):
+        helpers.drop_index(name, 'kyc_documents')
+    with op.batch_alter_table('kyc_documents') as batch_op:
+        batch_op.drop_column('version')
+        batch_op.drop_column('blood_group')
+        batch_op.drop_column('date_of_birth')
+        batch_op.drop_column('location')
+    _set_json_columns(sa.String)
+
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_column('attachment_thumbnail_url')
+
+    helpers.drop_index('ix_media_assets_original_url', 'media_assets')
+    op.drop_table('media_assets')
@@ -0,0 +1,26 @@
+"""Notification history and unread-count indexes
+
+(user_id, created_at, id) serves the keyset-paginated history; the partial index
+on user_id WHERE status = 'unread' keeps the unread badge count proportional to
+the unread rows rather than the user's whole history.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from migrations import helpers
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    helpers.create_index('ix_notifications_user_created_at', 'notifications', ['user_id', 'created_at', 'id'])
+    helpers.create_index('ix_notifications_user_unread', 'notifications', ['user_id'], where="status = 'unread'")
+
+
+def downgrade():
+    helpers.drop_index('ix_notifications_user_unread', 'notifications')
+    helpers.drop_index('ix_notifications_user_created_at', 'notifications')
@@ -0,0 +1,45 @@
+"""Notification broadcasts
+
+Tracks admin broadcasts fanned out to a role and/or agency by a background
+job: delivery status, progress counters and the resume point.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not helpers.has_table('notification_broadcasts'):
+        op.create_table('notification_broadcasts',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('created_by', sa.String(length=36), nullable=True),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('severity', sa.String(length=20), nullable=True),
+        sa.Column('role', sa.String(length=50), nullable=True),
+        sa.Column('agency_id', sa.String(length=36), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=True),
+        sa.Column('sent', sa.Integer(), nullable=False),
+        sa.Column('last_user_id', sa.String(length=36), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['agency_id'], ['agencies.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('notification_broadcasts')
@@ -0,0 +1,42 @@
+"""Notification retention
+
+Adds the archive table that compaction moves old read notifications into,
+and a partial index on created_at WHERE status = 'read' so each compaction
+batch reads the oldest read rows without scanning the table.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not helpers.has_table('notifications_archive'):
+        op.create_table('notifications_archive',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('severity', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    helpers.create_index('ix_notifications_archive_user_id', 'notifications_archive', ['user_id'])
+    helpers.create_index('ix_notifications_read_created_at', 'notifications', ['created_at'], where="status = 'read'")
+
+
+def downgrade():
+    helpers.drop_index('ix_notifications_read_created_at', 'notifications')
+    helpers.drop_index('ix_notifications_archive_user_id', 'notifications_archive')
+    op.drop_table('notifications_archive')
@@ -0,0 +1,41 @@
+"""Device tokens for mobile push
+
+Expo push tokens registered by the app, and a (conversation_id,
+sender_user_id) index on messages. It serves conversation history, and the
+lookup of the other participants a new message is pushed to.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not helpers.has_table('device_tokens'):
+        op.create_table('device_tokens',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('token', sa.String(length=255), nullable=False),
+        sa.Column('platform', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token')
+        )
+    helpers.create_index('ix_device_tokens_user_id', 'device_tokens', ['user_id'])
+    helpers.create_index('ix_messages_conversation_id_sender_user_id', 'messages', ['conversation_id', 'sender_user_id'])
+
+
+def downgrade():
+    helpers.drop_index('ix_messages_conversation_id_sender_user_id', 'messages')
+    helpers.drop_index('ix_device_tokens_user_id', 'device_tokens')
+    op.drop_table('device_tokens')
@@ -0,0 +1,46 @@
+"""Paid marketplace unlocks
+
+Unlocks record the price paid, the commission and the client's idempotency
+key. A unique (user_id, listing_id) index replaces the check-then-insert that
+let concurrent taps unlock a listing twice; duplicates already in the table
+are removed first, keeping one row per pair. Wallet balances are summed over
+(user_id, status), which gets an index too.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    helpers.add_column('marketplace_unlocks', sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=True))
+    helpers.add_column('marketplace_unlocks', sa.Column('commission', sa.Numeric(precision=10, scale=2), nullable=True))
+    helpers.add_column('marketplace_unlocks', sa.Column('idempotency_key', sa.String(length=255), nullable=True))
+    op.execute(
+        'DELETE FROM marketplace_unlocks WHERE id NOT IN '
+        '(SELECT MIN(id) FROM marketplace_unlocks GROUP BY user_id, listing_id)'
+    )
+    helpers.create_index('uq_marketplace_unlocks_user_listing', 'marketplace_unlocks',
+                         ['user_id', 'listing_id'], unique=True)
+    helpers.create_index('uq_marketplace_unlocks_user_idempotency_key', 'marketplace_unlocks',
+                         ['user_id', 'idempotency_key'], unique=True)
+    helpers.create_index('ix_wallet_transactions_user_id_status', 'wallet_transactions', ['user_id', 'status'])
+
+
+def downgrade():
+    helpers.drop_index('ix_wallet_transactions_user_id_status', 'wallet_transactions')
+    helpers.drop_index('uq_marketplace_unlocks_user_idempotency_key', 'marketplace_unlocks')
+    helpers.drop_index('uq_marketplace_unlocks_user_listing', 'marketplace_unlocks')
+    with op.batch_alter_table('marketplace_unlocks') as batch_op:
+        batch_op.drop_column('idempotency_key')
+        batch_op.drop_column('commission')
+        batch_op.drop_column('amount')
@@ -0,0 +1,45 @@
+"""Idempotency keys
+
+Stores the first response to each request sent with an Idempotency-Key, so
+retries are replayed instead of run again. The unique (scope, key) index is
+also the lock that makes concurrent duplicates wait for the first attempt.
+expires_at is indexed for the purge.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not helpers.has_table('idempotency_keys'):
+        op.create_table('idempotency_keys',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('scope', sa.String(length=64), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('response_status', sa.Integer(), nullable=True),
+        sa.Column('response_body', sa.LargeBinary(), nullable=True),
+        sa.Column('content_type', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    helpers.create_index('uq_idempotency_keys_scope_key', 'idempotency_keys', ['scope', 'key'], unique=True)
+    helpers.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'])
+
+
+def downgrade():
+    helpers.drop_index('ix_idempotency_keys_expires_at', 'idempotency_keys')
+    helpers.drop_index('uq_idempotency_keys_scope_key', 'idempotency_keys')
+    op.drop_table('idempotency_keys')
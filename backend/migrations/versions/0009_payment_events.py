@@ -0,0 +1,50 @@
+"""Paystack payment events
+
+Stores every verified webhook delivery before it is processed. The unique
+(event, reference) index drops redeliveries, and (status, received_at) finds
+events left pending. Subscriptions get the reference of the payment that
+bought them, unique so that an event can only create a subscription once.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not helpers.has_table('payment_events'):
+        op.create_table('payment_events',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('provider', sa.String(length=20), nullable=False),
+        sa.Column('event', sa.String(length=100), nullable=False),
+        sa.Column('reference', sa.String(length=255), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    helpers.create_index('uq_payment_events_event_reference', 'payment_events', ['event', 'reference'], unique=True)
+    helpers.create_index('ix_payment_events_status_received_at', 'payment_events', ['status', 'received_at'])
+    helpers.add_column('subscriptions', sa.Column('reference', sa.String(length=255), nullable=True))
+    helpers.create_index('uq_subscriptions_reference', 'subscriptions', ['reference'], unique=True)
+
+
+def downgrade():
+    helpers.drop_index('uq_subscriptions_reference', 'subscriptions')
+    with op.batch_alter_table('subscriptions') as batch_op:
+        batch_op.drop_column('reference')
+    helpers.drop_index('ix_payment_events_status_received_at', 'payment_events')
+    helpers.drop_index('uq_payment_events_event_reference', 'payment_events')
+    op.drop_table('payment_events')
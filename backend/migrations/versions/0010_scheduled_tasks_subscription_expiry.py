@@ -0,0 +1,41 @@
+"""Scheduled tasks and subscription expiry
+
+``scheduled_tasks`` holds when each periodic job is next due, so that only one
+worker claims each run. Subscriptions record when a renewal reminder was sent,
+and get indexes for the expiry sweep (status, expires_at) and for an agency's
+effective plan (user_id, expires_at).
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not helpers.has_table('scheduled_tasks'):
+        op.create_table('scheduled_tasks',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('next_run_at', sa.DateTime(), nullable=False),
+        sa.Column('last_run_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+        )
+    helpers.add_column('subscriptions', sa.Column('reminded_at', sa.DateTime(), nullable=True))
+    helpers.create_index('ix_subscriptions_status_expires_at', 'subscriptions', ['status', 'expires_at'])
+    helpers.create_index('ix_subscriptions_user_id_expires_at', 'subscriptions', ['user_id', 'expires_at'])
+
+
+def downgrade():
+    helpers.drop_index('ix_subscriptions_user_id_expires_at', 'subscriptions')
+    helpers.drop_index('ix_subscriptions_status_expires_at', 'subscriptions')
+    with op.batch_alter_table('subscriptions') as batch_op:
+        batch_op.drop_column('reminded_at')
+    op.drop_table('scheduled_tasks')
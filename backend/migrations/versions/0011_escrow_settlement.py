@@ -0,0 +1,62 @@
+"""Escrow settlement
+
+Escrows record their payee, when they become due for automatic release, when
+they were released, and the commission taken on release. Both indexes lead with
+status: (status, release_at) for the settlement job, and (status, released_at)
+for the finance report.
+
+Existing rows are brought into the new states. 'completed' was used for
+released escrows and becomes 'released'. Released escrows take their creation
+time as released_at and the flat 5% the finance report used to assume as their
+commission, so past figures do not change. Held marketplace unlocks become due
+ESCROW_HOLD_DAYS (3) after purchase.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+LEGACY_COMMISSION = Decimal('0.05')
+HOLD = timedelta(days=3)
+
+
+def _settle_existing(row):
+    status = 'released' if row.status == 'completed' else row.status
+    if status == 'released':
+        commission = (Decimal(str(row.amount)) * LEGACY_COMMISSION).quantize(Decimal('0.01'))
+        return {'status': status, 'commission': commission, 'released_at': row.created_at, 'release_at': None}
+    if status == 'held' and row.type == 'marketplace_unlock' and row.created_at:
+        return {'status': status, 'commission': None, 'released_at': None, 'release_at': row.created_at + HOLD}
+    return None
+
+
+def upgrade():
+    helpers.add_column('escrow_transactions', sa.Column('payee_id', sa.String(length=36), nullable=True))
+    helpers.add_column('escrow_transactions', sa.Column('commission', sa.Numeric(precision=10, scale=2), nullable=True))
+    helpers.add_column('escrow_transactions', sa.Column('release_at', sa.DateTime(), nullable=True))
+    helpers.add_column('escrow_transactions', sa.Column('released_at', sa.DateTime(), nullable=True))
+    helpers.backfill('escrow_transactions', ['status', 'type', 'amount', 'created_at'], _settle_existing)
+    helpers.create_index('ix_escrow_transactions_status_release_at', 'escrow_transactions', ['status', 'release_at'])
+    helpers.create_index('ix_escrow_transactions_status_released_at', 'escrow_transactions', ['status', 'released_at'])
+
+
+def downgrade():
+    helpers.drop_index('ix_escrow_transactions_status_released_at', 'escrow_transactions')
+    helpers.drop_index('ix_escrow_transactions_status_release_at', 'escrow_transactions')
+    with op.batch_alter_table('escrow_transactions') as batch_op:
+        batch_op.drop_column('released_at')
+        batch_op.drop_column('release_at')
+        batch_op.drop_column('commission')
+        batch_op.drop_column('payee_id')
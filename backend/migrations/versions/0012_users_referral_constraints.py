@@ -0,0 +1,43 @@
+"""Users referral index and foreign key on stamped databases
+
+Databases created before migrations are stamped at 0001, which assumes they
+have the unique ``ix_users_referral_code`` index and the ``referred_by_id ->
+users.id`` foreign key from the baseline. The hand-written ALTERs that added
+the referral columns never created either. This revision adds them where they
+are missing. A duplicated referral code is kept only by the user with the
+lowest id, and referrers that no longer exist are cleared, so both can be
+created.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import helpers
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not helpers.has_index('users', 'ix_users_referral_code'):
+        op.execute(sa.text(
+            "UPDATE users SET referral_code = NULL WHERE referral_code IS NOT NULL AND EXISTS ("
+            "SELECT 1 FROM users other WHERE other.referral_code = users.referral_code AND other.id < users.id)"
+        ))
+        helpers.create_index('ix_users_referral_code', 'users', ['referral_code'], unique=True)
+    if not helpers.has_foreign_key('users', ['referred_by_id'], 'users'):
+        op.execute(sa.text(
+            "UPDATE users SET referred_by_id = NULL WHERE referred_by_id IS NOT NULL "
+            "AND referred_by_id NOT IN (SELECT id FROM users)"
+        ))
+        helpers.create_foreign_key('fk_users_referred_by_id_users', 'users', 'users', ['referred_by_id'], ['id'])
+
+
+def downgrade():
+    # Databases migrated from scratch had both since 0001, so they are left in place
+    pass
@@ -1,55 +1,12 @@
-import sys
-import os
+"""SDC backend package; the application factory lives in ``src.app``.
 
-# Handle both package and direct execution
-if __package__ is None or __package__ == '':
-    # Running as script - add parent to path
-    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from src.models import db
-    from src.config import Config
-    from src.controllers import auth_bp, user_bp, kyc_bp, marketplace_bp, agency_bp, favorites_bp, badge_bp, admin_bp, wallet_bp, notification_bp, messages_bp, upload_bp
-else:
-    # Running as package
-    from .models import db
-    from .config import Config
-    from .controllers import auth_bp, user_bp, kyc_bp, marketplace_bp, agency_bp, favorites_bp, badge_bp, admin_bp, wallet_bp, notification_bp, messages_bp, upload_bp
+``create_app`` is re-exported lazily so that importing a submodule (models,
+config, services) does not import every controller with it.
+"""
 
-from flask import Flask, jsonify
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
 
-def create_app(config_class=None):
-    app = Flask(__name__)
-    
-    # Handle both dict and class config
-    if config_class is None:
-        config_class = Config
-    if isinstance(config_class, dict):
-        app.config.update(config_class)
-    else:
-        app.config.from_object(config_class)
-    
-    # Initialize extensions
-    CORS(app)
-    db.init_app(app)
-    jwt = JWTManager(app)
-    
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(user_bp, url_prefix='/api/users')
-    app.register_blueprint(kyc_bp, url_prefix='/api/kyc')
-    app.register_blueprint(marketplace_bp, url_prefix='/api/marketplace')
-    app.register_blueprint(agency_bp, url_prefix='/api/agencies')
-    app.register_blueprint(favorites_bp, url_prefix='/api/favorites')
-    app.register_blueprint(badge_bp, url_prefix='/api/verification-badges')
-    app.register_blueprint(admin_bp, url_prefix='/api/admin')
-    app.register_blueprint(wallet_bp, url_prefix='/api/wallet')
-    app.register_blueprint(notification_bp, url_prefix='/api/notifications')
-    app.register_blueprint(messages_bp, url_prefix='/api/messages')
-    app.register_blueprint(upload_bp, url_prefix='/api')
-    
-    # Health check route
-    @app.route('/', methods=['GET'])
-    def health_check():
-        return jsonify({"message": "SDC Flask Backend is running!", "status": "healthy"}), 200
-    
-    return app
\ No newline at end of file
+def __getattr__(name):
+    if name == 'create_app':
+        from .app import create_app
+        return create_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
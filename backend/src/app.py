@@ -1,3 +1,4 @@
+import gc
 import sys
 import os
 
@@ -5,23 +6,41 @@ import os
 if __package__ is None or __package__ == '':
     # Running as script - add parent to path
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from src.models import db, mail
+    from src.models import db
     from src.config import Config
-    from src.controllers import auth_bp, user_bp, kyc_bp, marketplace_bp, agency_bp, favorites_bp, badge_bp, admin_bp, wallet_bp, notification_bp, messages_bp, upload_bp, referral_bp
+    from src.services.jobs import jobs
+    from src.services.scheduler import scheduler
+    from src.database import engine_options, configure_engines, replica_binds, init_query_stats
+    from src.cli import sdc_cli
+    from src import logs, metrics
+    from src.profiler import init_profiler
+    from src.sockets import init_socketio
+    from src.controllers import auth_bp, user_bp, kyc_bp, marketplace_bp, agency_bp, favorites_bp, badge_bp, admin_bp, wallet_bp, notification_bp, messages_bp, upload_bp, referral_bp, payments_bp
 else:
     # Running as package
-    from .models import db, mail
+    from .models import db
     from .config import Config
-    from .controllers import auth_bp, user_bp, kyc_bp, marketplace_bp, agency_bp, favorites_bp, badge_bp, admin_bp, wallet_bp, notification_bp, messages_bp, upload_bp, referral_bp
+    from .services.jobs import jobs
+    from .services.scheduler import scheduler
+    from .database import engine_options, configure_engines, replica_binds, init_query_stats
+    from .cli import sdc_cli
+    from . import logs, metrics
+    from .profiler import init_profiler
+    from .sockets import init_socketio
+    from .controllers import auth_bp, user_bp, kyc_bp, marketplace_bp, agency_bp, favorites_bp, badge_bp, admin_bp, wallet_bp, notification_bp, messages_bp, upload_bp, referral_bp, payments_bp
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from flask_socketio import SocketIO, emit, join_room, leave_room
 
-def create_app(config_class=None):
+def create_app(config_class=None, socketio=True):
+    """The one application factory, used by app.py, wsgi.py, the CLI, migrations and tests.
+
+    Pass ``socketio=False`` for processes that never serve WebSockets; Flask-SocketIO
+    is then never imported. Flask-Mail is bound lazily on the first email sent.
+    """
     app = Flask(__name__)
-    
+
     # Handle both dict and class config
     if config_class is None:
         config_class = Config
@@ -29,14 +48,25 @@ def create_app(config_class=None):
         app.config.update(config_class)
     else:
         app.config.from_object(config_class)
-    
+
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    app.config['SQLALCHEMY_BINDS'] = {**replica_binds(app.config), **app.config.get('SQLALCHEMY_BINDS', {})}
+    logs.configure_logging(app)
+
     # Initialize extensions
-    CORS(app)
+    # Browsers hide response headers from scripts unless they are exposed
+    CORS(app, expose_headers=['X-Next-Cursor'])
     db.init_app(app)
+    configure_engines(app, db)
+    init_query_stats(app, db)
+    metrics.init_metrics(app, db)
+    init_profiler(app)
     jwt = JWTManager(app)
-    mail.init_app(app)
-    socketio = SocketIO(app, cors_allowed_origins="*")
-    
+    jobs.init_app(app)
+    scheduler.init_app(app)
+    if socketio:
+        init_socketio(app)
+
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(user_bp, url_prefix='/api/users')
     app.register_blueprint(kyc_bp, url_prefix='/api/kyc')
@@ -50,41 +80,35 @@ def create_app(config_class=None):
     app.register_blueprint(messages_bp, url_prefix='/api/messages')
     app.register_blueprint(upload_bp, url_prefix='/api')
     app.register_blueprint(referral_bp, url_prefix='/api/referrals')
-    
-    # WebSocket event handlers
-    @socketio.on('connect')
-    def handle_connect():
-        print(f'Client connected: {request.sid}')
-    
-    @socketio.on('disconnect')
-    def handle_disconnect():
-        print(f'Client disconnected: {request.sid}')
-    
-    @socketio.on('join_conversation')
-    def handle_join_conversation(data):
-        conversation_id = data.get('conversation_id')
-        if conversation_id:
-            join_room(conversation_id)
-            emit('joined_conversation', {'conversation_id': conversation_id})
-    
-    @socketio.on('leave_conversation')
-    def handle_leave_conversation(data):
-        conversation_id = data.get('conversation_id')
-        if conversation_id:
-            leave_room(conversation_id)
-            emit('left_conversation', {'conversation_id': conversation_id})
-    
-    @socketio.on('new_message')
-    def handle_new_message(data):
-        conversation_id = data.get('conversation_id')
-        message = data.get('message')
-        if conversation_id and message:
-            # Broadcast to all clients in the conversation room
-            emit('message_received', message, room=conversation_id)
-    
+    app.register_blueprint(payments_bp, url_prefix='/api/payments')
+    app.cli.add_command(sdc_cli)
+
     # Health check route
     @app.route('/', methods=['GET'])
     def health_check():
         return jsonify({"message": "SDC Flask Backend is running!", "status": "healthy"}), 200
-    
+
     return app
+
+
+def before_fork(app):
+    """Run in the gunicorn master after a --preload import, before any worker forks.
+
+    Closes the master's pooled connections so no socket ends up shared with a
+    child, and moves everything loaded so far out of the garbage collector's
+    reach (gc.freeze) so collections in the workers do not write to, and so
+    copy, the pages they share with the master.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    gc.freeze()
+
+
+def after_fork(app):
+    """Run in each gunicorn worker right after it forks."""
+    with app.app_context():
+        for engine in db.engines.values():
+            # Drop inherited connections without closing them under the master's feet
+            engine.dispose(close=False)
+    logs.restart_after_fork()
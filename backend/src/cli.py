@@ -0,0 +1,367 @@
+"""``flask sdc`` maintenance commands.
+
+Bulk import/export of the core tables, for seeding staging environments and
+moving data between databases:
+
+    flask --app app sdc export users users.ndjson
+    flask --app app sdc export wallet_transactions - --format csv > wallet.csv
+    flask --app app sdc import kyc_documents kyc.parquet --batch-size 5000
+    flask --app app sdc seed --users 100000 --messages 2000000 --transactions 1000000
+    flask --app app sdc compact-notifications --days 90
+    flask --app app sdc purge-idempotency-keys
+    flask --app app sdc process-payment-events --retry-failed
+    flask --app app sdc sweep-subscriptions
+    flask --app app sdc settle-escrows
+
+Exports stream rows from a server-side cursor (``yield_per``), so memory stays
+flat however big the table is. Imports go through Core ``INSERT`` with one
+``executemany`` per batch. SQLAlchemy sends that as multi-row ``VALUES``
+statements on PostgreSQL, not a round trip per row the way the ORM scripts do.
+The format follows the file extension (``.ndjson``/``.jsonl``, ``.csv``,
+``.parquet``) unless ``--format`` is given. Parquet needs ``pyarrow``.
+"""
+import csv
+import io
+import json
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import JSON, Boolean, Date, DateTime, Float, Integer, Numeric, insert, select
+
+from .models import db, User, Agency, KycDocument, WalletTransaction, EscrowTransaction, JSONType
+
+TABLES = {
+    'users': User,
+    'agencies': Agency,
+    'kyc_documents': KycDocument,
+    'wallet_transactions': WalletTransaction,
+    'escrow_transactions': EscrowTransaction,
+}
+FORMATS = ('ndjson', 'csv', 'parquet')
+EXTENSIONS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'ndjson', '.csv': 'csv', '.parquet': 'parquet'}
+DEFAULT_BATCH_SIZE = 1000
+
+sdc_cli = AppGroup('sdc', help='SDC data maintenance commands.')
+
+
+def _format_for(path, fmt):
+    if fmt:
+        return fmt
+    for extension, name in EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return name
+    raise click.BadParameter(f'cannot tell the format of {path!r}; pass --format', param_hint='PATH')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise click.ClickException('Parquet support needs pyarrow: pip install pyarrow')
+    return pyarrow
+
+
+def _is_json(column):
+    return isinstance(column.type, (JSON, JSONType))
+
+
+def _to_text(value):
+    """Serialize one value for NDJSON/CSV/Parquet (JSON columns stay structured in NDJSON)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _coerce(column, value):
+    """Turn a value read from a file back into what ``column`` expects."""
+    if value is None:
+        return None
+    if _is_json(column):
+        return json.loads(value) if isinstance(value, str) else value
+    if isinstance(column.type, DateTime):
+        return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    if isinstance(column.type, Date):
+        if isinstance(value, datetime):
+            return value.date()
+        return value if isinstance(value, date) else date.fromisoformat(str(value))
+    if isinstance(column.type, Boolean):
+        return value if isinstance(value, bool) else str(value).strip().lower() in ('1', 'true', 't', 'yes')
+    if isinstance(column.type, Integer):
+        return int(value)
+    if isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+        return Decimal(str(value))
+    if isinstance(column.type, Float):
+        return float(value)
+    return value if isinstance(value, str) else str(value)
+
+
+# Writers: each takes the output stream, the exported columns and an iterator of row batches
+
+def _write_ndjson(out, columns, batches):
+    for rows in batches:
+        out.write(''.join(json.dumps({c.name: _to_text(v) for c, v in zip(columns, row)}) + '\n' for row in rows))
+
+
+def _write_csv(out, columns, batches):
+    writer = csv.writer(out)
+    writer.writerow([c.name for c in columns])
+    for rows in batches:
+        writer.writerows(
+            ['' if v is None else json.dumps(v) if _is_json(c) else _to_text(v) for c, v in zip(columns, row)]
+            for row in rows
+        )
+
+
+def _arrow_type(pa, column):
+    if _is_json(column):
+        return pa.string()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp('us')
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, Numeric):
+        return pa.decimal128(column.type.precision or 38, column.type.scale or 0)
+    return pa.string()
+
+
+def _write_parquet(out, columns, batches):
+    pa = _require_pyarrow()
+    schema = pa.schema([(c.name, _arrow_type(pa, c)) for c in columns])
+    with pa.parquet.ParquetWriter(out, schema) as writer:
+        for rows in batches:
+            data = {c.name: [json.dumps(r[i]) if _is_json(c) and r[i] is not None else r[i] for r in rows]
+                    for i, c in enumerate(columns)}
+            writer.write_table(pa.table(data, schema=schema))
+
+
+# Readers: each yields lists of dicts, roughly ``batch_size`` records at a time
+
+def _read_ndjson(stream, batch_size):
+    batch = []
+    for line in stream:
+        if line.strip():
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _read_csv(stream, batch_size):
+    batch = []
+    for record in csv.DictReader(stream):
+        # Exports write NULL as an empty cell
+        batch.append({key: None if value == '' else value for key, value in record.items()})
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _read_parquet(stream, batch_size):
+    pa = _require_pyarrow()
+    for record_batch in pa.parquet.ParquetFile(stream).iter_batches(batch_size=batch_size):
+        yield record_batch.to_pylist()
+
+
+WRITERS = {'ndjson': _write_ndjson, 'csv': _write_csv, 'parquet': _write_parquet}
+READERS = {'ndjson': _read_ndjson, 'csv': _read_csv, 'parquet': _read_parquet}
+
+
+def export_rows(model, out, fmt, batch_size=DEFAULT_BATCH_SIZE, columns=None):
+    """Stream every row of ``model``'s table to ``out``; returns the number of rows."""
+    table = model.__table__
+    selected = [table.c[name] for name in columns] if columns else list(table.c)
+    count = 0
+
+    with db.engine.connect() as connection:
+        result = connection.execution_options(yield_per=batch_size).execute(
+            select(*selected).order_by(*table.primary_key.columns)
+        )
+
+        def batches():
+            nonlocal count
+            for rows in result.partitions():
+                count += len(rows)
+                yield rows
+
+        WRITERS[fmt](out, selected, batches())
+    return count
+
+
+def _kyc_search_columns(record):
+    # Keep the extracted search columns in step with form_data, as the API does
+    if 'form_data' in record and isinstance(record['form_data'], dict):
+        document = KycDocument()
+        document.set_form_data(record['form_data'])
+        for column in ('location', 'date_of_birth', 'blood_group'):
+            record.setdefault(column, getattr(document, column))
+    return record
+
+
+def _insert_statement(table, on_conflict):
+    if on_conflict == 'error':
+        return insert(table)
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise click.ClickException(f'--on-conflict skip is not supported on {dialect}')
+    return dialect_insert(table).on_conflict_do_nothing()
+
+
+def import_rows(model, stream, fmt, batch_size=DEFAULT_BATCH_SIZE, on_conflict='error'):
+    """Bulk insert the records in ``stream`` into ``model``'s table; returns the number of records."""
+    table = model.__table__
+    statement = _insert_statement(table, on_conflict)
+    count = 0
+
+    for records in READERS[fmt](stream, batch_size):
+        unknown = set().union(*records) - set(table.c.keys())
+        if unknown:
+            raise click.ClickException(f'Unknown {table.name} columns: {", ".join(sorted(unknown))}')
+
+        # executemany needs the same keys in every row; records missing a column get its default
+        groups = {}
+        for record in records:
+            record = {key: _coerce(table.c[key], value) for key, value in record.items()}
+            if model is KycDocument:
+                record = _kyc_search_columns(record)
+            groups.setdefault(frozenset(record), []).append(record)
+        for rows in groups.values():
+            db.session.execute(statement, rows)
+        db.session.commit()
+        count += len(records)
+    return count
+
+
+@sdc_cli.command('export')
+@click.argument('table', type=click.Choice(sorted(TABLES)))
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True, help='Rows fetched per round trip.')
+@click.option('--columns', help='Comma-separated columns to export (default: all).')
+def export_command(table, path, fmt, batch_size, columns):
+    """Export TABLE to PATH ("-" for stdout)."""
+    fmt = _format_for(path, fmt)
+    columns = [c.strip() for c in columns.split(',')] if columns else None
+    unknown = set(columns or ()) - set(TABLES[table].__table__.c.keys())
+    if unknown:
+        raise click.BadParameter(f'unknown columns: {", ".join(sorted(unknown))}', param_hint='--columns')
+
+    if path == '-':
+        out = sys.stdout.buffer if fmt == 'parquet' else sys.stdout
+        count = export_rows(TABLES[table], out, fmt, batch_size, columns)
+    else:
+        with open(path, 'wb') if fmt == 'parquet' else open(path, 'w', newline='', encoding='utf-8') as out:
+            count = export_rows(TABLES[table], out, fmt, batch_size, columns)
+    click.echo(f'Exported {count} {table} rows', err=True)
+
+
+@sdc_cli.command('import')
+@click.argument('table', type=click.Choice(sorted(TABLES)))
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True, help='Rows inserted per statement.')
+@click.option('--on-conflict', type=click.Choice(['error', 'skip']), default='error', show_default=True,
+              help='What to do with rows whose primary or unique key already exists.')
+def import_command(table, path, fmt, batch_size, on_conflict):
+    """Import PATH ("-" for stdin) into TABLE."""
+    fmt = _format_for(path, fmt)
+    if path == '-':
+        stream = io.BytesIO(sys.stdin.buffer.read()) if fmt == 'parquet' else sys.stdin
+        count = import_rows(TABLES[table], stream, fmt, batch_size, on_conflict)
+    else:
+        with open(path, 'rb') if fmt == 'parquet' else open(path, newline='', encoding='utf-8') as stream:
+            count = import_rows(TABLES[table], stream, fmt, batch_size, on_conflict)
+    click.echo(f'Imported {count} {table} rows', err=True)
+
+
+@sdc_cli.command('seed')
+@click.option('--users', default=1000, show_default=True, help='Users to create, spread across all roles.')
+@click.option('--messages', type=int, help='Messages to create (default: 20 per user).')
+@click.option('--transactions', type=int, help='Wallet transactions to create (default: 10 per user).')
+@click.option('--seed', default=42, show_default=True, help='Random seed; the same seed gives the same data.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows inserted per statement.')
+def seed_command(users, messages, transactions, seed, batch_size):
+    """Fill an empty database with realistic synthetic data."""
+    from .seed import Seeder, SEED_EMAIL_DOMAIN, SEED_PASSWORD
+
+    if db.session.query(User.id).filter(User.email.like(f'%@{SEED_EMAIL_DOMAIN}')).first():
+        raise click.ClickException('This database already holds seeded users; seed a fresh one')
+    messages = users * 20 if messages is None else messages
+    transactions = users * 10 if transactions is None else transactions
+
+    counts = Seeder(seed, batch_size, echo=lambda m: click.echo(m, err=True)).run(users, messages, transactions)
+    for table, count in sorted(counts.items()):
+        click.echo(f'{table}: {count}', err=True)
+    click.echo(f'Seeded users log in as <role><n>@{SEED_EMAIL_DOMAIN} / {SEED_PASSWORD}', err=True)
+
+
+@sdc_cli.command('compact-notifications')
+@click.option('--days', type=int, help='Keep read notifications this many days (default: NOTIFICATION_RETENTION_DAYS).')
+@click.option('--batch-size', type=int, help='Rows moved per transaction (default: NOTIFICATION_COMPACTION_BATCH_SIZE).')
+@click.option('--archive/--delete', default=None, help='Copy rows to notifications_archive or just delete them '
+              '(default: NOTIFICATION_ARCHIVE).')
+def compact_notifications_command(days, batch_size, archive):
+    """Move old read notifications out of the notifications table."""
+    from .services.notifications import compact_notifications
+
+    count = compact_notifications(days, batch_size, archive)
+    click.echo(f'Compacted {count} notifications', err=True)
+
+
+@sdc_cli.command('purge-idempotency-keys')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Rows deleted per transaction.')
+def purge_idempotency_keys_command(batch_size):
+    """Delete stored Idempotency-Key responses older than IDEMPOTENCY_TTL."""
+    from .utils.idempotency import purge_expired
+
+    count = purge_expired(batch_size)
+    click.echo(f'Purged {count} idempotency keys', err=True)
+
+
+@sdc_cli.command('process-payment-events')
+@click.option('--older-than', type=int, default=300, show_default=True,
+              help='Only events received at least this many seconds ago.')
+@click.option('--retry-failed', is_flag=True, help='Also retry events that ran out of attempts.')
+def process_payment_events_command(older_than, retry_failed):
+    """Process payment webhook events whose background job never ran."""
+    from .services.payments import process_pending_events
+
+    count = process_pending_events(older_than, retry_failed)
+    click.echo(f'Processed {count} payment events', err=True)
+
+
+@sdc_cli.command('sweep-subscriptions')
+def sweep_subscriptions_command():
+    """Expire lapsed subscriptions and send renewal reminders now (the scheduler does this every few minutes)."""
+    from .services.subscriptions import sweep_subscriptions
+
+    reminded, expired = sweep_subscriptions()
+    click.echo(f'Sent {reminded} renewal reminders, expired {expired} subscriptions', err=True)
+
+
+@sdc_cli.command('settle-escrows')
+def settle_escrows_command():
+    """Release every held escrow that is due now (the scheduler does this hourly)."""
+    from .services.escrow import settle_escrows
+
+    count = settle_escrows()
+    click.echo(f'Released {count} escrows', err=True)
@@ -1,11 +1,54 @@
 import os
 from datetime import timedelta
+from decimal import Decimal
 
 class Config:
     # Database configuration
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///sdc_dev.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool (PostgreSQL and other server databases)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0)) or None
+    
+    # Read replicas (comma-separated URLs); read-only handlers use them, except for
+    # a caller who wrote within the last REPLICA_STICKY_SECONDS
+    SQLALCHEMY_REPLICA_URIS = [u.strip() for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u.strip()]
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    
+    # Per-request query counts (Server-Timing header) and slow-query logging with EXPLAIN plans
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'True').lower() == 'true'
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'True').lower() == 'true'
+    
+    # Prometheus metrics at /metrics; scrapers send METRICS_TOKEN as a Bearer token. Unset, only
+    # direct requests from this host (not relayed by nginx) may scrape.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # JSON logs to stdout, written off the request thread; LOG_SAMPLE_RATES keeps a fraction of the
+    # INFO/DEBUG records of busy loggers, e.g. "sdc.socketio=0.1,sdc.db=0.05"
+    LOG_JSON = os.environ.get('LOG_JSON', 'True').lower() == 'true'
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_SAMPLE_RATES = {
+        name.strip(): float(rate)
+        for name, _, rate in (item.partition('=') for item in os.environ.get('LOG_SAMPLE_RATES', '').split(','))
+        if name.strip() and rate.strip()
+    }
+    
+    # Admin sampling-profiler endpoints (/api/admin/profile); ?__profile=1 works in debug only
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILER_INTERVAL = float(os.environ.get('PROFILER_INTERVAL_MS', 5)) / 1000
+    
+    # SQLite connection PRAGMAs
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))
+    
     # JWT configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your-very-secret-key-change-me'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
@@ -25,4 +68,73 @@ class Config:
     MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL', 'False').lower() == 'true'
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
-    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
\ No newline at end of file
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
+
+    # Background jobs
+    JOB_QUEUE_WORKERS = int(os.environ.get('JOB_QUEUE_WORKERS', 2))
+    JOB_QUEUE_EAGER = os.environ.get('JOB_QUEUE_EAGER', 'False').lower() == 'true'
+
+    # Recipients per INSERT/commit when fanning out an admin notification broadcast
+    BROADCAST_CHUNK_SIZE = int(os.environ.get('BROADCAST_CHUNK_SIZE', 1000))
+
+    # Read notifications older than this are moved to notifications_archive (or deleted when
+    # NOTIFICATION_ARCHIVE is False) by `flask sdc compact-notifications`
+    NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 90))
+    NOTIFICATION_ARCHIVE = os.environ.get('NOTIFICATION_ARCHIVE', 'True').lower() == 'true'
+    NOTIFICATION_COMPACTION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_COMPACTION_BATCH_SIZE', 1000))
+
+    # Mobile push through the Expo push service; EXPO_ACCESS_TOKEN is needed only when
+    # "enhanced push security" is on for the project. Receipts are checked PUSH_RECEIPT_DELAY seconds later.
+    PUSH_ENABLED = os.environ.get('PUSH_ENABLED', 'True').lower() == 'true'
+    EXPO_PUSH_URL = os.environ.get('EXPO_PUSH_URL', 'https://exp.host/--/api/v2/push/send')
+    EXPO_RECEIPTS_URL = os.environ.get('EXPO_RECEIPTS_URL', 'https://exp.host/--/api/v2/push/getReceipts')
+    EXPO_ACCESS_TOKEN = os.environ.get('EXPO_ACCESS_TOKEN')
+    PUSH_RECEIPT_DELAY = int(os.environ.get('PUSH_RECEIPT_DELAY', 900))
+    PUSH_MAX_ATTEMPTS = int(os.environ.get('PUSH_MAX_ATTEMPTS', 5))
+
+    # Responses to requests with an Idempotency-Key are replayed to retries for IDEMPOTENCY_TTL seconds.
+    # A duplicate waits up to IDEMPOTENCY_WAIT_SECONDS for the first attempt, and a claim older than
+    # IDEMPOTENCY_LOCK_TIMEOUT is treated as abandoned.
+    IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 86400))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', 10))
+    IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', 60))
+
+    # Paystack webhooks are verified with the secret key; failed events are retried up to
+    # PAYMENT_EVENT_MAX_ATTEMPTS times with exponential backoff
+    PAYSTACK_SECRET_KEY = os.environ.get('PAYSTACK_SECRET_KEY')
+    PAYMENT_EVENT_MAX_ATTEMPTS = int(os.environ.get('PAYMENT_EVENT_MAX_ATTEMPTS', 5))
+
+    # Wallet debit (NGN) for unlocking a marketplace profile; matches UNLOCK_PRICE in screens/Marketplace.jsx
+    MARKETPLACE_UNLOCK_PRICE = Decimal(os.environ.get('MARKETPLACE_UNLOCK_PRICE', '5000'))
+
+    # Periodic tasks (src/services/scheduler.py) are claimed in the database every SCHEDULER_TICK
+    # seconds, so each runs once per interval however many workers serve the app
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'True').lower() == 'true'
+    SCHEDULER_TICK = int(os.environ.get('SCHEDULER_TICK', 30))
+
+    # Subscriptions are expired and renewal reminders sent every SUBSCRIPTION_SWEEP_INTERVAL seconds,
+    # SUBSCRIPTION_BATCH_SIZE rows per transaction. Agency plan lookups are cached SUBSCRIPTION_CACHE_TTL seconds.
+    SUBSCRIPTION_SWEEP_INTERVAL = int(os.environ.get('SUBSCRIPTION_SWEEP_INTERVAL', 300))
+    SUBSCRIPTION_BATCH_SIZE = int(os.environ.get('SUBSCRIPTION_BATCH_SIZE', 500))
+    SUBSCRIPTION_RENEWAL_NOTICE_DAYS = int(os.environ.get('SUBSCRIPTION_RENEWAL_NOTICE_DAYS', 3))
+    SUBSCRIPTION_CACHE_TTL = int(os.environ.get('SUBSCRIPTION_CACHE_TTL', 60))
+
+    # Marketplace unlock escrows are released ESCROW_HOLD_DAYS after purchase by a settlement job that runs
+    # every ESCROW_SETTLEMENT_INTERVAL seconds, ESCROW_SETTLEMENT_BATCH_SIZE escrows per transaction.
+    # Escrow types with no CommissionSetting pay ESCROW_DEFAULT_COMMISSION_PERCENT.
+    ESCROW_HOLD_DAYS = int(os.environ.get('ESCROW_HOLD_DAYS', 3))
+    ESCROW_SETTLEMENT_INTERVAL = int(os.environ.get('ESCROW_SETTLEMENT_INTERVAL', 3600))
+    ESCROW_SETTLEMENT_BATCH_SIZE = int(os.environ.get('ESCROW_SETTLEMENT_BATCH_SIZE', 500))
+    ESCROW_DEFAULT_COMMISSION_PERCENT = Decimal(os.environ.get('ESCROW_DEFAULT_COMMISSION_PERCENT', '5'))
+
+    # Socket.IO across several gunicorn workers (e.g. redis://localhost:6379/0); see gunicorn.conf.py
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+
+    # Video attachments (requires the ffmpeg binary on PATH)
+    FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+    VIDEO_MAX_HEIGHT = int(os.environ.get('VIDEO_MAX_HEIGHT', 720))
+    VIDEO_CRF = int(os.environ.get('VIDEO_CRF', 28))
+    VIDEO_DELETE_ORIGINAL = os.environ.get('VIDEO_DELETE_ORIGINAL', 'False').lower() == 'true'
+
+    # Seconds a user's badge set is cached in each worker (0 disables the cache)
+    BADGE_CACHE_TTL = int(os.environ.get('BADGE_CACHE_TTL', 300))
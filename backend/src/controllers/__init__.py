@@ -6,7 +6,7 @@ from .auth_controller import (
     resend_otp, verify_otp
 )
 from .user_controller import get_users, get_user
-from .kyc_controller import get_kyc_status, get_kyc_documents, submit_kyc_document
+from .kyc_controller import get_kyc_status, get_kyc_documents, submit_kyc_document, patch_kyc_document
 from .marketplace_controller import get_unlocks, unlock_profile, get_commission_settings, update_commission_settings, get_surrogates, get_surrogate_by_id, get_marketplace_profile
 from .agency_controller import get_agencies, get_agency, get_agency_roster, get_agency_subscription, get_agency_wallet
 from .favorite_controller import get_favorites, add_favorite, remove_favorite
@@ -15,13 +15,16 @@ from .admin_controller import (
     get_reports, get_financial_data, get_contracts, get_disputes, 
     get_contract_templates, add_contract_template, resolve_dispute,
     get_all_users, get_user_by_id, update_user, delete_user,
-    get_all_agencies, get_agency_by_id, update_agency, delete_agency
+    get_all_agencies, get_agency_by_id, update_agency, delete_agency,
+    get_kyc_queue, get_kyc_counts, review_kyc_documents, settle_escrows, create_broadcast, get_broadcast,
+    profile_worker, profile_route, get_route_profile
 )
 from .wallet_controller import get_transactions, get_balance
-from .notification_controller import get_notifications, mark_as_read
+from .notification_controller import get_notifications, get_unread_count, mark_as_read, mark_many_as_read, add_device, remove_device
 from .messages_controller import get_messages, send_message, initialize_mock_messages
 from .upload_controller import upload_file, serve_file
 from .referral_controller import get_code, get_stats
+from .payment_controller import paystack_webhook
 
 # Auth Blueprint
 auth_bp = Blueprint('auth', __name__)
@@ -53,6 +56,7 @@ kyc_bp = Blueprint('kyc', __name__)
 kyc_bp.add_url_rule('/status', view_func=get_kyc_status, methods=['GET'])
 kyc_bp.add_url_rule('/documents', view_func=get_kyc_documents, methods=['GET'])
 kyc_bp.add_url_rule('/documents', view_func=submit_kyc_document, methods=['POST'])
+kyc_bp.add_url_rule('/documents', view_func=patch_kyc_document, methods=['PATCH'])
 
 # Marketplace Blueprint
 marketplace_bp = Blueprint('marketplace', __name__)
@@ -99,6 +103,15 @@ admin_bp.add_url_rule('/disputes', view_func=get_disputes, methods=['GET'])
 admin_bp.add_url_rule('/contract-templates', view_func=get_contract_templates, methods=['GET'])
 admin_bp.add_url_rule('/contract-templates', view_func=add_contract_template, methods=['POST'])
 admin_bp.add_url_rule('/disputes/<dispute_id>/resolve', view_func=resolve_dispute, methods=['POST'])
+admin_bp.add_url_rule('/kyc', view_func=get_kyc_queue, methods=['GET'])
+admin_bp.add_url_rule('/kyc/counts', view_func=get_kyc_counts, methods=['GET'])
+admin_bp.add_url_rule('/kyc/review', view_func=review_kyc_documents, methods=['POST'])
+admin_bp.add_url_rule('/escrow/settle', view_func=settle_escrows, methods=['POST'])
+admin_bp.add_url_rule('/notifications/broadcasts', view_func=create_broadcast, methods=['POST'])
+admin_bp.add_url_rule('/notifications/broadcasts/<broadcast_id>', view_func=get_broadcast, methods=['GET'])
+admin_bp.add_url_rule('/profile', view_func=profile_worker, methods=['POST'])
+admin_bp.add_url_rule('/profile/routes', view_func=profile_route, methods=['POST'])
+admin_bp.add_url_rule('/profile/routes', view_func=get_route_profile, methods=['GET'])
 
 # Wallet Blueprint
 wallet_bp = Blueprint('wallet', __name__)
@@ -108,6 +121,10 @@ wallet_bp.add_url_rule('/balance', view_func=get_balance, methods=['GET'])
 # Notification Blueprint
 notification_bp = Blueprint('notifications', __name__)
 notification_bp.add_url_rule('', view_func=get_notifications, methods=['GET'])
+notification_bp.add_url_rule('/unread-count', view_func=get_unread_count, methods=['GET'])
+notification_bp.add_url_rule('/read', view_func=mark_many_as_read, methods=['PUT'])
+notification_bp.add_url_rule('/devices', view_func=add_device, methods=['POST'])
+notification_bp.add_url_rule('/devices', view_func=remove_device, methods=['DELETE'])
 notification_bp.add_url_rule('/<notification_id>/read', view_func=mark_as_read, methods=['PUT'])
 
 # Messages Blueprint
@@ -123,4 +140,8 @@ upload_bp.add_url_rule('/uploads/<conversation_id>/<filename>', view_func=serve_
 # Referral Blueprint
 referral_bp = Blueprint('referrals', __name__)
 referral_bp.add_url_rule('/code', view_func=get_code, methods=['GET'])
-referral_bp.add_url_rule('/stats', view_func=get_stats, methods=['GET'])
\ No newline at end of file
+referral_bp.add_url_rule('/stats', view_func=get_stats, methods=['GET'])
+
+# Payments Blueprint
+payments_bp = Blueprint('payments', __name__)
+payments_bp.add_url_rule('/paystack/webhook', view_func=paystack_webhook, methods=['POST'])
@@ -1,9 +1,18 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-from ..models import db, User, KycDocument, MarketplaceUnlock, Favorite, Contract, Dispute, ContractTemplate, EscrowTransaction, WalletTransaction, Agency
+from sqlalchemy import func, update, tuple_
+from ..models import db, User, KycDocument, MarketplaceUnlock, Favorite, Contract, Dispute, ContractTemplate, EscrowTransaction, WalletTransaction, Agency, NotificationBroadcast
+from ..utils.auth import admin_required
+from ..utils.pagination import encode_cursor, decode_cursor, page_size
+from ..database import read_replica
+from ..services.notifications import create_notifications
+from ..services.jobs import jobs
+from ..services import broadcasts, escrow
+from .. import profiler
 
 @jwt_required()
+@read_replica
 def get_reports():
     days = request.args.get('days', 30, type=int)
     since = datetime.utcnow() - timedelta(days=days)
@@ -129,18 +138,21 @@ def delete_agency(agency_id):
     return jsonify({"msg": "Agency deleted successfully"}), 200
 
 @jwt_required()
+@read_replica
 def get_financial_data():
     days = request.args.get('days', 30, type=int)
     since = datetime.utcnow() - timedelta(days=days)
     escrow_held = db.session.query(db.func.sum(EscrowTransaction.amount)).filter(EscrowTransaction.status == 'held', EscrowTransaction.created_at >= since).scalar() or 0
-    escrow_released = db.session.query(db.func.sum(EscrowTransaction.amount)).filter(EscrowTransaction.status == 'released', EscrowTransaction.created_at >= since).scalar() or 0
-    commission_earned = db.session.query(db.func.sum(EscrowTransaction.amount * 0.05)).filter(EscrowTransaction.status.in_(['released', 'completed']), EscrowTransaction.created_at >= since).scalar() or 0
+    # Commission is recorded on each escrow when it is released
+    escrow_released, commission_earned = db.session.query(
+        db.func.sum(EscrowTransaction.amount), db.func.sum(EscrowTransaction.commission)
+    ).filter(EscrowTransaction.status == 'released', EscrowTransaction.released_at >= since).one()
     referral_payouts = db.session.query(db.func.sum(WalletTransaction.amount)).filter(WalletTransaction.type == 'referral_bonus', WalletTransaction.status == 'completed', WalletTransaction.created_at >= since).scalar() or 0
     total_transactions = EscrowTransaction.query.filter(EscrowTransaction.created_at >= since).count()
     return jsonify({
         'escrow_held': float(escrow_held),
-        'escrow_released': float(escrow_released),
-        'commission_earned': float(commission_earned),
+        'escrow_released': float(escrow_released or 0),
+        'commission_earned': float(commission_earned or 0),
         'referral_payouts': float(referral_payouts),
         'total_transactions': total_transactions,
         'period_days': days
@@ -201,4 +213,239 @@ def add_contract_template():
     new_template = ContractTemplate(name=data['name'], body=data['body'], variables=data.get('variables', []))
     db.session.add(new_template)
     db.session.commit()
-    return jsonify({'id': new_template.id, 'name': new_template.name, 'created_at': new_template.created_at.isoformat()}), 201
\ No newline at end of file
+    return jsonify({'id': new_template.id, 'name': new_template.name, 'created_at': new_template.created_at.isoformat()}), 201
+
+# KYC review queue
+KYC_REVIEW_ACTIONS = {
+    'approve': ('approved', "KYC approved", "Your KYC submission has been approved."),
+    'reject': ('rejected', "KYC rejected", "Your KYC submission was not approved."),
+}
+
+ESCROW_ACTIONS = {
+    'release': (escrow.release, 'released'),
+    'refund': (escrow.refund, 'refunded'),
+}
+
+@admin_required()
+@read_replica
+def get_kyc_queue():
+    """List KYC submissions oldest-first, keyset-paginated on (status, updated_at, id)"""
+    status = request.args.get('status')
+    role = request.args.get('role')
+    agency_id = request.args.get('agency_id')
+    limit = page_size(request.args.get('limit', type=int))
+    
+    query = db.session.query(KycDocument, User).outerjoin(User, User.id == KycDocument.user_id)
+    if status:
+        query = query.filter(KycDocument.status == status)
+    if role:
+        query = query.filter(KycDocument.role == role)
+    if agency_id:
+        query = query.filter(KycDocument.agency_id == agency_id)
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            last = decode_cursor(cursor, str, datetime, str)
+        except ValueError:
+            return jsonify({"msg": "Invalid cursor"}), 400
+        query = query.filter(tuple_(KycDocument.status, KycDocument.updated_at, KycDocument.id) > tuple_(*last))
+    
+    rows = query.order_by(KycDocument.status, KycDocument.updated_at, KycDocument.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    next_cursor = None
+    if has_more:
+        last_doc = rows[-1][0]
+        next_cursor = encode_cursor(last_doc.status, last_doc.updated_at, last_doc.id)
+    
+    return jsonify({
+        'items': [{
+            'id': d.id,
+            'user_id': d.user_id,
+            'role': d.role,
+            'status': d.status,
+            'agency_id': d.agency_id,
+            'form_progress': d.form_progress,
+            'file_url': d.file_url,
+            'first_name': u.first_name if u else None,
+            'last_name': u.last_name if u else None,
+            'email': u.email if u else None,
+            'version': d.version,
+            'created_at': d.created_at.isoformat() if d.created_at else None,
+            'updated_at': d.updated_at.isoformat() if d.updated_at else None
+        } for d, u in rows],
+        'next_cursor': next_cursor
+    }), 200
+
+@admin_required()
+@read_replica
+def get_kyc_counts():
+    """Number of KYC submissions in each status, plus 'all', with one GROUP BY"""
+    query = db.session.query(KycDocument.status, func.count(KycDocument.id))
+    if request.args.get('role'):
+        query = query.filter(KycDocument.role == request.args['role'])
+    if request.args.get('agency_id'):
+        query = query.filter(KycDocument.agency_id == request.args['agency_id'])
+
+    rows = query.group_by(KycDocument.status).all()
+    counts = {status: count for status, count in rows if status}
+    counts['all'] = sum(count for _, count in rows)
+    return jsonify(counts), 200
+
+@admin_required()
+def review_kyc_documents():
+    """Approve or reject many KYC documents with one UPDATE and one notification INSERT"""
+    data = request.get_json() or {}
+    ids = data.get('ids') or []
+    action = data.get('action')
+    if action not in KYC_REVIEW_ACTIONS:
+        return jsonify({"msg": "action must be 'approve' or 'reject'"}), 400
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"msg": "ids must be a non-empty list"}), 400
+    if not all(isinstance(document_id, str) for document_id in ids):
+        return jsonify({"msg": "ids must be strings"}), 400
+    if len(ids) > 500:
+        return jsonify({"msg": "At most 500 documents per request"}), 400
+    
+    new_status, title, body = KYC_REVIEW_ACTIONS[action]
+    if data.get('reason'):
+        body = f"{body} Reason: {data['reason']}"
+    
+    # Bump version too so in-flight wizard PATCHes see the review as a conflict
+    stmt = update(KycDocument).where(
+        KycDocument.id.in_(ids),
+        KycDocument.status != new_status
+    ).values(
+        status=new_status,
+        updated_at=datetime.utcnow(),
+        version=KycDocument.version + 1
+    ).execution_options(synchronize_session=False)
+    
+    if db.session.get_bind().dialect.update_returning:
+        user_ids = db.session.execute(stmt.returning(KycDocument.user_id)).scalars().all()
+    else:
+        user_ids = [r.user_id for r in KycDocument.query.with_entities(KycDocument.user_id).filter(
+            KycDocument.id.in_(ids), KycDocument.status != new_status)]
+        db.session.execute(stmt)
+    
+    create_notifications(user_ids, title, body, severity='info' if action == 'approve' else 'warning')
+    db.session.commit()
+    
+    return jsonify({"msg": f"{len(user_ids)} KYC documents {new_status}", "updated": len(user_ids), "status": new_status}), 200
+
+@admin_required()
+def settle_escrows():
+    """Release or refund many escrows; those not in a state that allows it are skipped"""
+    data = request.get_json() or {}
+    ids = data.get('ids') or []
+    action = data.get('action')
+    if action not in ESCROW_ACTIONS:
+        return jsonify({"msg": "action must be 'release' or 'refund'"}), 400
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"msg": "ids must be a non-empty list"}), 400
+    if not all(isinstance(escrow_id, str) for escrow_id in ids):
+        return jsonify({"msg": "ids must be strings"}), 400
+    if len(ids) > 500:
+        return jsonify({"msg": "At most 500 escrows per request"}), 400
+
+    settle, new_status = ESCROW_ACTIONS[action]
+    updated = settle(ids)
+    db.session.commit()
+
+    return jsonify({"msg": f"{updated} escrows {new_status}", "updated": updated, "status": new_status}), 200
+
+@admin_required()
+def create_broadcast():
+    """Notify every active user of a role and/or agency; delivery runs as a background job"""
+    data = request.get_json() or {}
+    role = data.get('role')
+    agency_id = data.get('agency_id')
+    severity = data.get('severity', 'info')
+    if not data.get('title') or not data.get('body'):
+        return jsonify({"msg": "title and body are required"}), 400
+    if not role and not agency_id:
+        return jsonify({"msg": "role or agency_id is required"}), 400
+    if severity not in broadcasts.SEVERITIES:
+        return jsonify({"msg": f"severity must be one of {', '.join(broadcasts.SEVERITIES)}"}), 400
+    if agency_id and not db.session.get(Agency, agency_id):
+        return jsonify({"msg": "Agency not found"}), 404
+    
+    broadcast = NotificationBroadcast(
+        created_by=get_jwt_identity(),
+        title=data['title'],
+        body=data['body'],
+        severity=severity,
+        role=role,
+        agency_id=agency_id
+    )
+    db.session.add(broadcast)
+    db.session.commit()
+    jobs.enqueue(broadcasts.run_broadcast, broadcast.id)
+    
+    return jsonify(broadcasts.serialize_broadcast(broadcast)), 202
+
+@admin_required()
+def get_broadcast(broadcast_id):
+    """Delivery progress of a broadcast"""
+    broadcast = db.session.get(NotificationBroadcast, broadcast_id)
+    if not broadcast:
+        return jsonify({"msg": "Broadcast not found"}), 404
+    return jsonify(broadcasts.serialize_broadcast(broadcast)), 200
+
+# Live profiling (see src/profiler.py); every call profiles the worker that answers it
+def _profiling_disabled():
+    if not current_app.config.get('PROFILING_ENABLED'):
+        return jsonify({"msg": "Profiling is disabled"}), 404
+    return None
+
+@admin_required()
+def profile_worker():
+    """Sample every thread of this worker for ``seconds`` and return collapsed stacks"""
+    disabled = _profiling_disabled()
+    if disabled:
+        return disabled
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = float(data.get('seconds', 10))
+        interval = float(data.get('interval_ms', profiler.DEFAULT_INTERVAL * 1000)) / 1000
+    except (TypeError, ValueError):
+        return jsonify({"msg": "seconds and interval_ms must be numbers"}), 400
+    if not 0 < seconds <= profiler.MAX_SECONDS or not 0.001 <= interval <= 1:
+        return jsonify({"msg": f"seconds must be in (0, {profiler.MAX_SECONDS}] and interval_ms in [1, 1000]"}), 400
+    
+    stacks = profiler.sample_worker(seconds, interval)
+    return Response(profiler.render(stacks), mimetype='text/plain')
+
+@admin_required()
+def profile_route():
+    """Arm profiling of the next ``requests`` requests to route ``rule`` on this worker"""
+    disabled = _profiling_disabled()
+    if disabled:
+        return disabled
+    data = request.get_json(silent=True) or {}
+    rule = data.get('rule')
+    requests = data.get('requests', 20)
+    known_rules = {r.rule for r in current_app.url_map.iter_rules()}
+    if rule not in known_rules:
+        return jsonify({"msg": "rule must be a route rule, e.g. /api/marketplace/surrogates/<surrogate_id>"}), 400
+    if not isinstance(requests, int) or not 0 < requests <= profiler.MAX_ROUTE_REQUESTS:
+        return jsonify({"msg": f"requests must be between 1 and {profiler.MAX_ROUTE_REQUESTS}"}), 400
+    
+    profiler.route_captures.arm(rule, requests)
+    return jsonify({"msg": f"Profiling the next {requests} requests to {rule}", "rule": rule, "requests": requests}), 202
+
+@admin_required()
+def get_route_profile():
+    """Collapsed stacks captured so far for route ``rule``"""
+    disabled = _profiling_disabled()
+    if disabled:
+        return disabled
+    capture = profiler.route_captures.get(request.args.get('rule'))
+    if not capture:
+        return jsonify({"msg": "No profile armed for that rule on this worker"}), 404
+    return Response(profiler.render(capture['stacks']), mimetype='text/plain', headers={
+        'X-Profiled-Requests': str(capture['profiled']),
+        'X-Profile-Remaining': str(capture['remaining']),
+    })
@@ -1,5 +1,7 @@
 from flask import jsonify
-from ..models import Agency, KycDocument, Subscription, WalletTransaction, User
+from sqlalchemy.orm import load_only
+from ..models import Agency, KycDocument, WalletTransaction, User
+from ..services import subscriptions
 
 def get_agencies():
     agencies = Agency.query.filter_by(status='approved').all()
@@ -25,8 +27,10 @@ def get_agency(agency_id):
     }), 200
 
 def get_agency_roster(agency_id):
-    # Fetch all KYC documents associated with this agency
-    documents = KycDocument.query.filter_by(agency_id=agency_id).all()
+    # Fetch all KYC documents associated with this agency (form_data is not needed here)
+    documents = KycDocument.query.options(
+        load_only(KycDocument.user_id, KycDocument.status, KycDocument.created_at)
+    ).filter_by(agency_id=agency_id).all()
     user_ids = [doc.user_id for doc in documents]
     
     # Fetch corresponding users
@@ -49,23 +53,14 @@ def get_agency_roster(agency_id):
     return jsonify(roster), 200
 
 def get_agency_subscription(agency_id):
-    agency = Agency.query.filter_by(id=agency_id).first()
-    if not agency:
+    found, subscription = subscriptions.effective_subscription(agency_id)
+    if not found:
         return jsonify({"msg": "Agency not found"}), 404
-        
-    subscription = Subscription.query.filter_by(user_id=agency.id).first()
-    if not subscription and agency.owner_id:
-        subscription = Subscription.query.filter_by(user_id=agency.owner_id).first()
-        
+
     if not subscription:
         return jsonify(None), 200
-        
-    return jsonify({
-        "id": subscription.id,
-        "plan": subscription.plan,
-        "status": subscription.status,
-        "expires_at": subscription.expires_at.isoformat() if subscription.expires_at else None
-    }), 200
+
+    return jsonify(subscriptions.serialize_subscription(subscription)), 200
 
 def get_agency_wallet(agency_id):
     agency = Agency.query.filter_by(id=agency_id).first()
@@ -2,15 +2,21 @@ from flask import request, jsonify
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required, get_jwt
 import bcrypt
 from datetime import datetime
-from ..models import db, User, KycDocument, mail
-from flask_mail import Message
+from ..models import db, User, KycDocument
+from .. import metrics
+from ..services.mail import send_mail
+from ..utils.idempotency import idempotent
+import logging
 import os
 import random
 import string
 
+logger = logging.getLogger(__name__)
+
 # Store for revoked tokens (in production, use Redis)
 revoked_tokens = set()
 
+@idempotent
 def register():
     data = request.get_json()
     email = data.get('email')
@@ -42,7 +48,8 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({"msg": "User already exists"}), 400
         
-    hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    with metrics.track('bcrypt_hash'):
+        hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
     
     # Generate username from email if not provided
     username = data.get('username') or email.split('@')[0]
@@ -63,9 +70,9 @@ def register():
     new_kyc = KycDocument(
         user_id=new_user.id,
         role=role,
-        form_data=data.get('form_data', {}),
         status='in_progress'
     )
+    new_kyc.set_form_data(data.get('form_data', {}))
     db.session.add(new_kyc)
     db.session.commit()
     
@@ -99,7 +106,9 @@ def login():
         return jsonify({"msg": "Please verify your email first"}), 401
     
     # Check password
-    if not bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8')):
+    with metrics.track('bcrypt_check'):
+        password_ok = bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8'))
+    if not password_ok:
         return jsonify({"msg": "Invalid credentials"}), 401
     
     access_token = create_access_token(identity=str(user.id))
@@ -132,8 +141,6 @@ def get_current_user():
 
 def reset_password():
     data = request.get_json()
-    print(f"--- reset_password request ---")
-    print(f"Data: {data}")
     token = data.get('token')
     new_password = data.get('password')
     
@@ -147,7 +154,8 @@ def reset_password():
         if not user:
             return jsonify({"msg": "Invalid or expired token"}), 400
         
-        hashed_pw = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        with metrics.track('bcrypt_hash'):
+            hashed_pw = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
         user.password_hash = hashed_pw
         db.session.commit()
         
@@ -155,13 +163,12 @@ def reset_password():
     
     # Otherwise, it's a forgot password request
     email = data.get('email')
-    print(f"Forgot password for email: {email}")
     user = User.query.filter_by(email=email).first()
     if not user:
-        print(f"User not found for email: {email}")
+        logger.info('Password reset requested for an unknown email')
         return jsonify({"msg": "If that email exists, a reset code has been sent"}), 200
     
-    print(f"User found: {user.email} (ID: {user.id})")
+    logger.info('Password reset requested', extra={'user_id': user.id})
     
     # Generate numeric code
     code = user.generate_reset_code()
@@ -169,17 +176,15 @@ def reset_password():
     
     # Send email
     try:
-        msg = Message(
+        send_mail(
             "Password Reset Code",
             recipients=[email],
             body=f"Your password reset code is: {code}\n\nThis code will expire in 15 minutes."
         )
-        mail.send(msg)
     except Exception as e:
         import traceback
         error_msg = traceback.format_exc()
-        print(f"Error sending email: {str(e)}")
-        print(f"Full traceback: {error_msg}")
+        logger.exception('Failed to send the password reset email', extra={'user_id': user.id})
         return jsonify({
             "msg": "Failed to send reset email",
             "error": str(e),
@@ -201,7 +206,8 @@ def update_password():
     if not user:
         return jsonify({"msg": "User not found"}), 404
         
-    hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    with metrics.track('bcrypt_hash'):
+        hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
     user.password_hash = hashed_pw
     db.session.commit()
     
@@ -224,22 +230,22 @@ def forgot_password():
 
 def reset_password_with_token():
     data = request.get_json()
-    print(f"--- reset_password_with_token request ---")
-    print(f"Data: {data}")
     email = data.get('email')
     code = data.get('code')
     new_password = data.get('password')
     
     if not email or not code or not new_password:
-        print(f"Missing fields: email={bool(email)}, code={bool(code)}, password={bool(new_password)}")
+        logger.info('Password reset with missing fields',
+                    extra={'has_email': bool(email), 'has_code': bool(code), 'has_password': bool(new_password)})
         return jsonify({"msg": "Missing email, code, or password"}), 400
     
-    print(f"Verifying code for {email}")
     user = User.verify_reset_code(email, code)
     if not user:
+        logger.info('Password reset with an invalid or expired code')
         return jsonify({"msg": "Invalid or expired code"}), 400
     
-    hashed_pw = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    with metrics.track('bcrypt_hash'):
+        hashed_pw = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
     user.password_hash = hashed_pw
     user.reset_code = None  # Clear code after use
     user.reset_code_expires_at = None
@@ -337,10 +343,13 @@ def change_password():
     if not current_password or not new_password:
         return jsonify({"msg": "Missing current_password or new_password"}), 400
     
-    if not bcrypt.checkpw(current_password.encode('utf-8'), user.password_hash.encode('utf-8')):
+    with metrics.track('bcrypt_check'):
+        password_ok = bcrypt.checkpw(current_password.encode('utf-8'), user.password_hash.encode('utf-8'))
+    if not password_ok:
         return jsonify({"msg": "Current password is incorrect"}), 400
     
-    hashed_pw = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    with metrics.track('bcrypt_hash'):
+        hashed_pw = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
     user.password_hash = hashed_pw
     db.session.commit()
     
@@ -362,14 +371,13 @@ def resend_otp():
     db.session.commit()
     
     try:
-        msg = Message(
+        send_mail(
             f"Verification Code",
             recipients=[email],
             body=f"Your verification code is: {code}"
         )
-        mail.send(msg)
     except Exception as e:
-        print(f"Error resending OTP: {str(e)}")
+        logger.exception('Failed to resend the verification code', extra={'user_id': user.id})
         return jsonify({"msg": "Failed to send code", "error": str(e)}), 500
         
     return jsonify({"msg": "Verification code resent"}), 200
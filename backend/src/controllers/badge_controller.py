@@ -1,11 +1,14 @@
 from flask import request, jsonify
-from ..models import VerificationBadge
+from ..services.badges import get_badges_for
+from ..database import read_replica
 
+MAX_BADGE_USER_IDS = 500
+
+@read_replica
 def get_badges():
-    user_ids = request.args.getlist('user_ids')
-    badges = VerificationBadge.query.filter(VerificationBadge.user_id.in_(user_ids)).all()
-    return jsonify([{
-        "user_id": str(b.user_id),
-        "type": b.type,
-        "status": b.status
-    } for b in badges])
\ No newline at end of file
+    # Accept repeated ?user_ids=a&user_ids=b as well as ?user_ids=a,b
+    user_ids = [u for value in request.args.getlist('user_ids') for u in value.split(',') if u]
+    if len(user_ids) > MAX_BADGE_USER_IDS:
+        return jsonify({"msg": f"At most {MAX_BADGE_USER_IDS} user_ids per request"}), 400
+    badges = get_badges_for(user_ids)
+    return jsonify([b for user_id in dict.fromkeys(user_ids) for b in badges[user_id]])
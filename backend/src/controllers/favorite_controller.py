@@ -1,6 +1,7 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, Favorite
+from ..utils.idempotency import idempotent
 
 @jwt_required()
 def get_favorites():
@@ -9,6 +10,7 @@ def get_favorites():
     return jsonify([str(f.target_user_id) for f in favs])
 
 @jwt_required()
+@idempotent
 def add_favorite():
     user_id = get_jwt_identity()
     data = request.get_json()
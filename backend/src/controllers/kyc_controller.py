@@ -1,6 +1,20 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm.exc import StaleDataError
 from ..models import db, KycDocument, User
+from ..services.kyc import merge_patch, compute_form_progress, extract_name_fields
+from ..utils.idempotency import idempotent
+
+def _sync_user_name(user, names):
+    """Copy name fields onto the User, writing only values that differ."""
+    for field in ('first_name', 'last_name'):
+        if field in names and getattr(user, field) != names[field]:
+            setattr(user, field, names[field])
+
+def _form_progress(role, form_data, fallback):
+    """Progress computed from the stored form; the client's figure only for roles without wizard sections."""
+    progress = compute_form_progress(role, form_data)
+    return fallback if progress is None else progress
 
 @jwt_required()
 def get_kyc_status():
@@ -12,7 +26,8 @@ def get_kyc_status():
         "status": kyc.status,
         "role": kyc.role,
         "form_progress": kyc.form_progress,
-        "form_data": kyc.form_data
+        "form_data": kyc.form_data,
+        "version": kyc.version
     }), 200
 
 @jwt_required()
@@ -26,59 +41,122 @@ def get_kyc_documents():
         "form_progress": d.form_progress,
         "form_data": d.form_data,
         "file_url": d.file_url,
+        "version": d.version,
         "created_at": d.created_at.isoformat() if d.created_at else None,
         "updated_at": d.updated_at.isoformat() if d.updated_at else None
     } for d in documents]), 200
 
 @jwt_required()
+@idempotent
 def submit_kyc_document():
     user_id = get_jwt_identity()
     data = request.get_json()
     
+    # Clients may send only the changed fields as a JSON merge patch
+    form_data_patch = data.get('form_data_patch')
+    
     # Check if user already has a KYC document
     existing_kyc = KycDocument.query.filter_by(user_id=user_id).first()
     if existing_kyc:
         # Update existing document
-        form_data = data.get('form_data', existing_kyc.form_data)
-        existing_kyc.form_data = form_data
-        existing_kyc.form_progress = data.get('form_progress', existing_kyc.form_progress)
+        if form_data_patch is not None:
+            form_data = merge_patch(existing_kyc.form_data, form_data_patch)
+        else:
+            form_data = data.get('form_data', existing_kyc.form_data)
+        existing_kyc.set_form_data(form_data)
+        existing_kyc.form_progress = _form_progress(existing_kyc.role, form_data,
+                                                    data.get('form_progress', existing_kyc.form_progress))
         existing_kyc.status = data.get('status', existing_kyc.status)
         existing_kyc.file_url = data.get('file_url', existing_kyc.file_url)
         
         # Sync name with User model if present
         if isinstance(form_data, dict):
-            user = User.query.filter_by(id=user_id).first()
+            names = {k: form_data[k] for k in ('first_name', 'last_name') if k in form_data}
+            user = User.query.filter_by(id=user_id).first() if names else None
             if user:
-                if 'first_name' in form_data:
-                    user.first_name = form_data['first_name']
-                if 'last_name' in form_data:
-                    user.last_name = form_data['last_name']
+                _sync_user_name(user, names)
         
         db.session.commit()
-        return jsonify({"msg": "KYC document updated", "id": str(existing_kyc.id)}), 200
+        return jsonify({"msg": "KYC document updated", "id": str(existing_kyc.id), "version": existing_kyc.version}), 200
     else:
         # Create new document
         user = User.query.filter_by(id=user_id).first()
         if not user:
             return jsonify({"msg": "User not found"}), 404
             
-        form_data = data.get('form_data', {})
+        if form_data_patch is not None:
+            form_data = merge_patch({}, form_data_patch)
+        else:
+            form_data = data.get('form_data', {})
         new_kyc = KycDocument(
             user_id=user_id,
             role=user.role,
-            form_data=form_data,
-            form_progress=data.get('form_progress', 0),
+            form_progress=_form_progress(user.role, form_data, data.get('form_progress', 0)),
             status=data.get('status', 'in_progress'),
             file_url=data.get('file_url')
         )
+        new_kyc.set_form_data(form_data)
         
         # Sync name with User model if present
         if isinstance(form_data, dict):
-            if 'first_name' in form_data:
-                user.first_name = form_data['first_name']
-            if 'last_name' in form_data:
-                user.last_name = form_data['last_name']
+            _sync_user_name(user, {k: form_data[k] for k in ('first_name', 'last_name') if k in form_data})
         
         db.session.add(new_kyc)
         db.session.commit()
-        return jsonify({"msg": "KYC document created", "id": str(new_kyc.id)}), 201
\ No newline at end of file
+        return jsonify({"msg": "KYC document created", "id": str(new_kyc.id), "version": new_kyc.version}), 201
+
+@jwt_required()
+def patch_kyc_document():
+    """Apply a field-level diff to the caller's KYC document.
+
+    Body: ``{"version": <int>, "changes": {...merge patch...}, "status": ..., "file_url": ...}``.
+    ``version`` must match the stored document or the request is rejected with 409.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    
+    version = data.get('version')
+    changes = data.get('changes') or {}
+    if not isinstance(version, int) or isinstance(version, bool):
+        return jsonify({"msg": "version is required"}), 400
+    if not isinstance(changes, dict):
+        return jsonify({"msg": "changes must be an object"}), 400
+    
+    kyc = KycDocument.query.filter_by(user_id=user_id).first()
+    if not kyc:
+        return jsonify({"msg": "KYC not found"}), 404
+    if kyc.version != version:
+        return jsonify({"msg": "KYC document was modified", "version": kyc.version}), 409
+    
+    if changes:
+        form_data = merge_patch(kyc.form_data, changes)
+        kyc.set_form_data(form_data)
+        progress = compute_form_progress(kyc.role, form_data)
+        if progress is not None:
+            kyc.form_progress = progress
+    if 'status' in data:
+        kyc.status = data['status']
+    if 'file_url' in data:
+        kyc.file_url = data['file_url']
+    
+    # Only load and touch the User when the diff carries name fields
+    names = extract_name_fields(changes)
+    if names:
+        user = User.query.filter_by(id=user_id).first()
+        if user:
+            _sync_user_name(user, names)
+    
+    try:
+        db.session.commit()
+    except StaleDataError:
+        # Another save won the race between our read and the versioned UPDATE
+        db.session.rollback()
+        current = db.session.query(KycDocument.version).filter_by(user_id=user_id).scalar()
+        return jsonify({"msg": "KYC document was modified", "version": current}), 409
+    
+    return jsonify({
+        "msg": "KYC document updated",
+        "id": str(kyc.id),
+        "version": kyc.version,
+        "form_progress": kyc.form_progress
+    }), 200
\ No newline at end of file
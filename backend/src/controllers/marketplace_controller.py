@@ -1,20 +1,55 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import date
+from sqlalchemy import select
 from ..models import db, MarketplaceUnlock, CommissionSetting, Surrogate, SurrogateProfile, User, KycDocument
+from ..services.badges import get_badges_for
+from ..services.marketplace import unlock_listing, serialize_unlock, UnlockError, InsufficientFunds
+from ..database import read_replica
+from ..utils.idempotency import idempotent
 
+@read_replica
 def get_surrogates():
     """Get all available surrogates for marketplace"""
     # Get surrogates with status 'active'
-    surrogates = Surrogate.query.filter_by(status='active').all()
+    query = Surrogate.query.filter_by(status='active')
+    
+    # Optional filters served from the indexed KYC columns
+    location = request.args.get('location')
+    blood_group = request.args.get('blood_group')
+    min_age = request.args.get('min_age', type=int)
+    max_age = request.args.get('max_age', type=int)
+    if location or blood_group or min_age is not None or max_age is not None:
+        query = query.join(KycDocument, KycDocument.user_id == Surrogate.user_id)
+        if location:
+            query = query.filter(KycDocument.location == location)
+        if blood_group:
+            query = query.filter(KycDocument.blood_group == blood_group.strip().upper())
+        today = date.today()
+        if min_age is not None:
+            query = query.filter(KycDocument.date_of_birth <= _years_before(today, min_age))
+        if max_age is not None:
+            query = query.filter(KycDocument.date_of_birth > _years_before(today, max_age + 1))
+    
+    # Profiles come back on the same rows and badges in one batched lookup. Only the
+    # latest profile is joined, so a database without the unique surrogate_id
+    # constraint still lists each surrogate once.
+    latest_profile = select(SurrogateProfile.id) \
+        .where(SurrogateProfile.surrogate_id == Surrogate.id) \
+        .order_by(SurrogateProfile.updated_at.desc(), SurrogateProfile.id.desc()) \
+        .limit(1).correlate(Surrogate).scalar_subquery()
+    rows = query.outerjoin(SurrogateProfile, SurrogateProfile.id == latest_profile) \
+        .add_entity(SurrogateProfile).all()
+    badges = get_badges_for([surrogate.user_id for surrogate, _ in rows])
     
     result = []
-    for surrogate in surrogates:
-        profile = SurrogateProfile.query.filter_by(surrogate_id=surrogate.id).first()
+    for surrogate, profile in rows:
         surrogate_data = {
             "id": surrogate.id,
             "user_id": surrogate.user_id,
             "status": surrogate.status,
-            "created_at": surrogate.created_at.isoformat() if surrogate.created_at else None
+            "created_at": surrogate.created_at.isoformat() if surrogate.created_at else None,
+            "badges": badges.get(surrogate.user_id, [])
         }
         
         if profile:
@@ -27,6 +62,14 @@ def get_surrogates():
         result.append(surrogate_data)
     return jsonify(result), 200
 
+def _years_before(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        # 29 February in a non-leap target year
+        return day.replace(year=day.year - years, day=28)
+
+@read_replica
 def get_surrogate_by_id(surrogate_id):
     """Get a specific surrogate by ID"""
     surrogate = Surrogate.query.get(surrogate_id)
@@ -57,19 +100,35 @@ def get_unlocks():
     return jsonify([u.listing_id for u in unlocks])
 
 @jwt_required()
+@idempotent
 def unlock_profile():
+    """Unlock a listing, paying MARKETPLACE_UNLOCK_PRICE from the wallet.
+
+    Retries are safe: unlocking a listing twice returns the first unlock with a
+    200, and an optional Idempotency-Key header ties a retry to its first attempt.
+    """
     user_id = get_jwt_identity()
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     listing_id = data.get('listing_id')
-    
-    if MarketplaceUnlock.query.filter_by(user_id=user_id, listing_id=listing_id).first():
-        return jsonify({"msg": "Already unlocked"}), 400
-        
-    new_unlock = MarketplaceUnlock(user_id=user_id, listing_id=listing_id)
-    db.session.add(new_unlock)
-    db.session.commit()
-    return jsonify({"msg": "Profile unlocked"}), 201
+    idempotency_key = request.headers.get('Idempotency-Key')
 
+    if not listing_id or not isinstance(listing_id, str) or len(listing_id) > 50:
+        return jsonify({"msg": "listing_id is required"}), 400
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+        return jsonify({"msg": "Idempotency-Key must be 1-255 characters"}), 400
+
+    try:
+        unlock, created = unlock_listing(user_id, listing_id, idempotency_key)
+    except InsufficientFunds as e:
+        return jsonify({"msg": str(e), "balance": float(e.balance), "price": float(e.price)}), e.status_code
+    except UnlockError as e:
+        return jsonify({"msg": str(e)}), e.status_code
+
+    if not created:
+        return jsonify({"msg": "Already unlocked", "unlock": serialize_unlock(unlock)}), 200
+    return jsonify({"msg": "Profile unlocked", "unlock": serialize_unlock(unlock)}), 201
+
+@read_replica
 def get_commission_settings():
     settings = CommissionSetting.query.all()
     return jsonify({s.category: float(s.percent) for s in settings})
@@ -95,13 +154,15 @@ def update_commission_settings():
     return jsonify({"msg": "Commission setting updated"}), 200
 
 @jwt_required()
+@read_replica
 def get_marketplace_profile(user_id):
     """Unified endpoint to get full user profile including KYC data"""
-    user = User.query.get(user_id)
-    if not user:
+    row = db.session.query(User, KycDocument) \
+        .outerjoin(KycDocument, KycDocument.user_id == User.id) \
+        .filter(User.id == user_id).first()
+    if not row:
         return jsonify({"msg": "User not found"}), 404
-        
-    kyc = KycDocument.query.filter_by(user_id=user_id).first()
+    user, kyc = row
     
     # Base user data
     result = {
@@ -119,16 +180,16 @@ def get_marketplace_profile(user_id):
         }
     }
     
-    # Try to find role-specific profile info
-    if user.role == 'SURROGATE':
-        surrogate = Surrogate.query.filter_by(user_id=user_id).first()
-        if surrogate:
-            profile = SurrogateProfile.query.filter_by(surrogate_id=surrogate.id).first()
-            if profile:
-                result["profile"] = {
-                    "bio": profile.bio,
-                    "location": profile.location,
-                    "occupation": profile.occupation
-                }
+    # Try to find role-specific profile info (roles are stored lowercase by register)
+    if (user.role or '').lower() == 'surrogate':
+        profile = SurrogateProfile.query \
+            .join(Surrogate, SurrogateProfile.surrogate_id == Surrogate.id) \
+            .filter(Surrogate.user_id == user_id).first()
+        if profile:
+            result["profile"] = {
+                "bio": profile.bio,
+                "location": profile.location,
+                "occupation": profile.occupation
+            }
     
     return jsonify(result), 200
\ No newline at end of file
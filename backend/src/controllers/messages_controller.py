@@ -4,6 +4,9 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 import uuid
 from ..models import db, Message
+from ..services.media import resolve_attachment
+from ..services.push import queue_push
+from ..utils.idempotency import idempotent
 
 messages_bp = Blueprint('messages', __name__)
 
@@ -28,6 +31,7 @@ def get_messages(conversation_id):
                 'content': msg.content,
                 'attachment_url': msg.attachment_url,
                 'attachment_type': msg.attachment_type,
+                'attachment_thumbnail_url': msg.attachment_thumbnail_url,
                 'created_at': msg.created_at.isoformat() if msg.created_at else None,
                 'updated_at': msg.updated_at.isoformat() if msg.updated_at else None
             })
@@ -39,6 +43,7 @@ def get_messages(conversation_id):
 
 @messages_bp.route('/messages', methods=['POST'])
 @jwt_required()
+@idempotent
 def send_message():
     """Send a new message"""
     try:
@@ -61,10 +66,26 @@ def send_message():
             attachment_type=data.get('attachment_type')
         )
         
+        # Point at the transcoded video if processing already finished
+        asset = resolve_attachment(message.attachment_url)
+        if asset:
+            message.attachment_url = asset.url
+            message.attachment_type = 'video'
+            message.attachment_thumbnail_url = asset.poster_url
+        
         # Save to database
         db.session.add(message)
         db.session.commit()
         
+        # There is no participants table, so everyone else who has posted in the conversation gets a
+        # push; nobody does for its first message (see the Notifications section of the README)
+        recipients = [r.sender_user_id for r in db.session.query(Message.sender_user_id).filter(
+            Message.conversation_id == message.conversation_id,
+            Message.sender_user_id != current_user_id
+        ).distinct()]
+        queue_push(recipients, 'New message', (message.content or 'Sent an attachment')[:180],
+                   {'type': 'message', 'conversation_id': message.conversation_id})
+        
         # Return the saved message
         return jsonify({
             'id': message.id,
@@ -73,6 +94,7 @@ def send_message():
             'content': message.content,
             'attachment_url': message.attachment_url,
             'attachment_type': message.attachment_type,
+            'attachment_thumbnail_url': message.attachment_thumbnail_url,
             'created_at': message.created_at.isoformat() if message.created_at else None,
             'updated_at': message.updated_at.isoformat() if message.updated_at else None
         }), 201
@@ -1,39 +1,120 @@
-from flask import jsonify
+from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-from ..models import db, Notification
+from sqlalchemy import func, literal_column, tuple_, update
+from ..models import db, Notification, DeviceToken
+from ..database import read_replica
+from ..services.notifications import serialize_notification
+from ..services.push import is_expo_token, register_device
+from ..utils.pagination import encode_cursor, decode_cursor, page_size
+
+MAX_READ_IDS = 500
+
+# Literal status so the planner can use the partial ix_notifications_user_unread index
+UNREAD = Notification.status == literal_column("'unread'")
+
+def _unread_count(user_id):
+    return db.session.query(func.count(Notification.id)).filter(Notification.user_id == user_id, UNREAD).scalar()
 
 @jwt_required()
+@read_replica
 def get_notifications():
+    """Newest first, keyset-paginated on (created_at, id); the next page's cursor is in X-Next-Cursor"""
     user_id = get_jwt_identity()
-    
-    # Query actual notifications from the database
-    notifications = Notification.query.filter_by(user_id=user_id).order_by(Notification.created_at.desc()).all()
-    
-    notifications_list = []
-    for notification in notifications:
-        notifications_list.append({
-            "id": notification.id,
-            "user_id": notification.user_id,
-            "title": notification.title,
-            "body": notification.body,
-            "severity": notification.severity,
-            "status": notification.status,
-            "created_at": notification.created_at.isoformat() if notification.created_at else None
-        })
-    
-    return jsonify(notifications_list), 200
+    limit = page_size(request.args.get('limit', type=int))
+
+    query = Notification.query.filter_by(user_id=user_id)
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            last = decode_cursor(cursor, datetime, str)
+        except ValueError:
+            return jsonify({"msg": "Invalid cursor"}), 400
+        query = query.filter(tuple_(Notification.created_at, Notification.id) < tuple_(*last))
+
+    notifications = query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1).all()
+    has_more = len(notifications) > limit
+    notifications = notifications[:limit]
+
+    response = jsonify([serialize_notification(n) for n in notifications])
+    if has_more:
+        response.headers['X-Next-Cursor'] = encode_cursor(notifications[-1].created_at, notifications[-1].id)
+    return response, 200
+
+@jwt_required()
+@read_replica
+def get_unread_count():
+    return jsonify({"unread_count": _unread_count(get_jwt_identity())}), 200
+
+@jwt_required()
+def mark_many_as_read():
+    """Mark the listed notifications, or every one at or before a cursor, read with a single UPDATE"""
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    before = data.get('before')
+
+    stmt = update(Notification).where(Notification.user_id == user_id, UNREAD)
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            return jsonify({"msg": "ids must be a non-empty list"}), 400
+        if len(ids) > MAX_READ_IDS:
+            return jsonify({"msg": f"At most {MAX_READ_IDS} ids per request; use before"}), 400
+        stmt = stmt.where(Notification.id.in_([str(i) for i in ids]))
+    elif before:
+        try:
+            last = decode_cursor(before, datetime, str)
+        except ValueError:
+            return jsonify({"msg": "Invalid cursor"}), 400
+        stmt = stmt.where(tuple_(Notification.created_at, Notification.id) <= tuple_(*last))
+    else:
+        return jsonify({"msg": "ids or before is required"}), 400
+
+    updated = db.session.execute(stmt.values(status='read').execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+
+    return jsonify({
+        "msg": f"{updated} notifications marked as read",
+        "updated": updated,
+        "unread_count": _unread_count(user_id)
+    }), 200
 
 @jwt_required()
 def mark_as_read(notification_id):
     user_id = get_jwt_identity()
-    
+
     # Update notification status in database
     notification = Notification.query.filter_by(id=notification_id, user_id=user_id).first()
     if not notification:
         return jsonify({"msg": "Notification not found"}), 404
-    
+
     notification.status = 'read'
     db.session.commit()
-    
-    return jsonify({"msg": "Notification marked as read"}), 200
\ No newline at end of file
+
+    return jsonify({"msg": "Notification marked as read"}), 200
+
+@jwt_required()
+def add_device():
+    """Register this install's Expo push token for the signed-in user"""
+    data = request.get_json(silent=True) or {}
+    token = data.get('token')
+    if not is_expo_token(token):
+        return jsonify({"msg": "token must be an Expo push token"}), 400
+    platform = data.get('platform')
+    if platform not in (None, 'ios', 'android', 'web'):
+        return jsonify({"msg": "platform must be ios, android or web"}), 400
+
+    register_device(get_jwt_identity(), token, platform)
+    db.session.commit()
+
+    return jsonify({"msg": "Device registered"}), 201
+
+@jwt_required()
+def remove_device():
+    """Stop pushing to this install, e.g. on sign-out"""
+    data = request.get_json(silent=True) or {}
+    deleted = DeviceToken.query.filter_by(token=data.get('token'), user_id=get_jwt_identity()).delete()
+    db.session.commit()
+    if not deleted:
+        return jsonify({"msg": "Device not found"}), 404
+    return jsonify({"msg": "Device removed"}), 200
@@ -0,0 +1,13 @@
+from flask import request, jsonify
+from ..services.payments import verify_signature, receive_event, SIGNATURE_HEADER
+
+def paystack_webhook():
+    """Acknowledge a Paystack event as soon as it is stored; it is processed on the job queue."""
+    body = request.get_data()
+    if not verify_signature(body, request.headers.get(SIGNATURE_HEADER)):
+        return jsonify({"msg": "Invalid signature"}), 401
+    try:
+        receive_event(body)
+    except ValueError:
+        return jsonify({"msg": "Malformed event"}), 400
+    return jsonify({"msg": "Received"}), 200
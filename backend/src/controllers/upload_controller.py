@@ -5,6 +5,10 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 from datetime import datetime
+from ..models import db, MediaAsset
+from ..services import media
+from ..services.jobs import jobs
+from .. import metrics
 
 upload_bp = Blueprint('upload', __name__)
 
@@ -60,19 +64,31 @@ def upload_file():
         # Save file
         file_path = os.path.join(upload_path, unique_filename)
         file.save(file_path)
+        size = os.path.getsize(file_path)
+        metrics.UPLOAD_BYTES.labels(filename.rsplit('.', 1)[1].lower()).inc(size)
         
         # Generate URL (in production, use CDN or cloud storage)
         # Convert path separators to forward slashes for the URL
         url_subfolder = target_subfolder.replace(os.sep, '/')
         file_url = f"/uploads/{url_subfolder}/{unique_filename}"
         
-        # Return file info
-        return jsonify({
+        result = {
             'url': file_url,
             'filename': filename,
-            'size': os.path.getsize(file_path),
+            'size': size,
             'uploaded_at': datetime.now().isoformat()
-        }), 201
+        }
+        
+        # Videos are served raw until the background transcode swaps them out
+        if media.is_video(filename) and media.transcoding_available():
+            asset = MediaAsset(user_id=get_jwt_identity(), original_url=file_url)
+            db.session.add(asset)
+            db.session.commit()
+            jobs.enqueue(media.process_video, asset.id, file_path)
+            result.update({'media_id': asset.id, 'processing': True})
+        
+        # Return file info
+        return jsonify(result), 201
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
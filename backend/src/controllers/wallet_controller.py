@@ -2,6 +2,7 @@ from flask import jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from ..models import db, WalletTransaction
+from ..services import wallet
 
 @jwt_required()
 def get_transactions():
@@ -29,15 +30,8 @@ def get_transactions():
 def get_balance():
     user_id = get_jwt_identity()
     
-    # Calculate actual wallet balance from database
-    # Sum all completed transactions (positive for credits, negative for debits)
-    completed_transactions = WalletTransaction.query.filter_by(
-        user_id=user_id,
-        status='completed'
-    ).all()
-    
-    balance = sum(float(t.amount) if t.type in ['credit', 'referral_bonus', 'payment'] else -float(t.amount) 
-              for t in completed_transactions)
+    # Completed credits minus completed debits, summed in SQL
+    balance = float(wallet.balance(user_id))
     
     # Calculate referral balance separately
     referral_transactions = WalletTransaction.query.filter_by(
@@ -0,0 +1,290 @@
+"""Engine configuration and read-replica routing.
+
+``engine_options`` turns the ``DB_*`` / ``SQLITE_*`` settings into
+``SQLALCHEMY_ENGINE_OPTIONS`` for the configured URL, and ``configure_engines``
+installs per-connection PRAGMAs on SQLite engines once Flask-SQLAlchemy has
+created them. ``RoutingSession`` is the session class behind ``db.session``.
+``init_query_stats`` times every statement for the per-request query report.
+"""
+import logging
+import random
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def engine_options(config, uri=None):
+    uri = uri or config.get('SQLALCHEMY_DATABASE_URI')
+    if not uri:
+        return {}
+    if is_sqlite(uri):
+        # The driver-level timeout is what makes writers wait instead of failing with "database is locked"
+        return {'connect_args': {'timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000}}
+
+    options = {
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+    }
+    if make_url(uri).get_backend_name() == 'postgresql':
+        statement_timeout = config.get('DB_STATEMENT_TIMEOUT_MS')
+        if statement_timeout:
+            options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+
+def sqlite_pragmas(config):
+    return {
+        'journal_mode': config.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': config.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'mmap_size': config.get('SQLITE_MMAP_SIZE', 268435456),
+    }
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    in_memory = engine.url.database in (None, '', ':memory:')
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if value is None or (in_memory and name == 'journal_mode'):
+                continue
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def configure_engines(app, db):
+    """Attach SQLite PRAGMAs to every SQLite engine of ``db`` for ``app``."""
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                install_sqlite_pragmas(engine, sqlite_pragmas(app.config))
+
+
+def insert_ignoring_conflicts(table, engine):
+    """``INSERT ... ON CONFLICT DO NOTHING`` into ``table`` for PostgreSQL or SQLite ``engine``.
+
+    ``rowcount`` of the result tells whether the row went in.
+    """
+    if engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table).on_conflict_do_nothing()
+
+
+# Read replicas
+#
+# Replicas are ordinary Flask-SQLAlchemy binds named ``replica_<n>``. Handlers
+# decorated with ``@read_replica`` send their SELECTs to a replica unless:
+#   * the session has uncommitted writes (flush or DML),
+#   * the statement is not a SELECT, or
+#   * the caller wrote something within REPLICA_STICKY_SECONDS (read-your-writes).
+# The write window is tracked per worker process, so deployments with several
+# workers should also route a user to the same worker, or accept replica lag
+# on their first read from another worker.
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+
+def replica_binds(config):
+    """SQLALCHEMY_BINDS entries for the configured replica URLs."""
+    return {
+        f'{REPLICA_BIND_PREFIX}{i}': {'url': uri, **engine_options(config, uri)}
+        for i, uri in enumerate(config.get('SQLALCHEMY_REPLICA_URIS') or [])
+    }
+
+
+class RecentWriters:
+    """Remembers which identities wrote recently, for read-your-writes routing."""
+
+    def __init__(self):
+        self._writes = {}
+        self._lock = threading.Lock()
+
+    def mark(self, identity):
+        with self._lock:
+            self._writes[identity] = time.monotonic()
+            if len(self._writes) > 10000:
+                self._prune()
+
+    def wrote_within(self, identity, seconds):
+        with self._lock:
+            last = self._writes.get(identity)
+        return last is not None and time.monotonic() - last < seconds
+
+    def clear(self):
+        with self._lock:
+            self._writes.clear()
+
+    def _prune(self):
+        cutoff = time.monotonic() - 3600
+        self._writes = {k: v for k, v in self._writes.items() if v >= cutoff}
+
+
+recent_writers = RecentWriters()
+
+
+def _request_identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+def read_replica(fn):
+    """Route the SELECTs of a read-only handler to a replica when one is configured."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.db_read_replica = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            g.pop('db_read_replica', None)
+    return wrapper
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._should_use_replica(clause):
+            replicas = [e for key, e in self._db.engines.items()
+                        if key and key.startswith(REPLICA_BIND_PREFIX)]
+            if replicas:
+                return random.choice(replicas)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _should_use_replica(self, clause):
+        if not has_request_context() or not g.get('db_read_replica'):
+            return False
+        if self._flushing or self.info.get('wrote'):
+            return False
+        if clause is not None and not getattr(clause, 'is_select', False):
+            return False
+        identity = _request_identity()
+        window = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+        return not (identity and recent_writers.wrote_within(identity, window))
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _remember_flush(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _remember_dml(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _mark_recent_writer(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        identity = _request_identity()
+        if identity:
+            recent_writers.mark(identity)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_rolled_back_writes(session):
+    session.info.pop('wrote', None)
+
+
+# Query instrumentation
+#
+# Every engine reports each statement's duration. Inside a request the numbers
+# are collected in ``g.db_stats``; ``after_request`` turns them into a
+# ``Server-Timing`` header and a log line. Statements slower than SLOW_QUERY_MS
+# are logged wherever they run, SELECTs with their EXPLAIN plan.
+
+query_logger = logging.getLogger('sdc.db')
+
+SLOWEST_KEPT = 3
+
+
+def _explain(cursor, statement, parameters, dialect):
+    prefix = {'sqlite': 'EXPLAIN QUERY PLAN ', 'postgresql': 'EXPLAIN '}.get(dialect)
+    if not prefix or statement.lstrip()[:6].upper() != 'SELECT':
+        return None
+    # A raw DBAPI cursor, so the EXPLAIN itself is not instrumented. On PostgreSQL a
+    # savepoint keeps a failed EXPLAIN from aborting the request's transaction.
+    savepoint = dialect == 'postgresql' and not getattr(cursor.connection, 'autocommit', True)
+    explain_cursor = cursor.connection.cursor()
+    try:
+        if savepoint:
+            explain_cursor.execute('SAVEPOINT sdc_explain')
+        explain_cursor.execute(prefix + statement, parameters)
+        plan = '\n'.join(' '.join(str(col) for col in row) for row in explain_cursor.fetchall())
+        if savepoint:
+            explain_cursor.execute('RELEASE SAVEPOINT sdc_explain')
+        return plan
+    except Exception as exc:  # the plan is best effort; never fail the query being measured
+        if savepoint:
+            explain_cursor.execute('ROLLBACK TO SAVEPOINT sdc_explain')
+        return f'(EXPLAIN failed: {exc})'
+    finally:
+        explain_cursor.close()
+
+
+def install_query_stats(engine, config):
+    slow_ms = config.get('SLOW_QUERY_MS')
+    explain = config.get('SLOW_QUERY_EXPLAIN', True)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info['query_started'].pop()) * 1000
+        if has_request_context():
+            stats = g.setdefault('db_stats', {'count': 0, 'ms': 0.0, 'slowest': []})
+            stats['count'] += 1
+            stats['ms'] += elapsed_ms
+            stats['slowest'].append((elapsed_ms, statement))
+            stats['slowest'] = sorted(stats['slowest'], reverse=True)[:SLOWEST_KEPT]
+
+        if slow_ms is not None and elapsed_ms >= slow_ms:
+            plan = _explain(cursor, statement, parameters, engine.dialect.name) if explain and not executemany else None
+            query_logger.warning(
+                'Slow query (%.1f ms): %s%s', elapsed_ms, statement, f'\nPlan:\n{plan}' if plan else '',
+                extra={'db_ms': round(elapsed_ms, 1), 'statement': statement, 'plan': plan}
+            )
+
+
+def _report_query_stats(response):
+    stats = g.pop('db_stats', None)
+    if stats:
+        response.headers.add('Server-Timing', f'db;dur={stats["ms"]:.1f};desc="{stats["count"]} queries"')
+        query_logger.info(
+            '%s %s: %d queries, %.1f ms in the database', request.method, request.path, stats['count'], stats['ms'],
+            extra={
+                'method': request.method, 'path': request.path, 'status': response.status_code,
+                'db_queries': stats['count'], 'db_ms': round(stats['ms'], 1),
+                'db_slowest': [{'ms': round(ms, 1), 'statement': s} for ms, s in stats['slowest']],
+            }
+        )
+    return response
+
+
+def init_query_stats(app, db):
+    """Instrument every engine of ``db`` and report per-request totals for ``app``."""
+    if not app.config.get('QUERY_STATS_ENABLED', True):
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            install_query_stats(engine, app.config)
+    app.after_request(_report_query_stats)
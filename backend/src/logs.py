@@ -0,0 +1,159 @@
+"""Structured JSON logging.
+
+``configure_logging`` sends every record through a ``QueueHandler``. The
+request thread only builds the JSON line and appends it to an in-memory
+queue; a ``QueueListener`` thread does the actual write to stdout, so a slow
+journald never stalls a request.
+
+Each line carries a ``request_id``. For HTTP requests it is the incoming
+``X-Request-ID`` header, or a new one, and it is echoed back on the response.
+Socket.IO events take the ``X-Request-ID`` of the handshake, or the socket id,
+so one client's events can be grepped together. Values under sensitive keys
+(passwords, tokens, codes) are replaced with ``[REDACTED]`` in the structured
+fields. Below WARNING, the loggers named in ``LOG_SAMPLE_RATES`` keep only a
+fraction of their records.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+REDACTED = '[REDACTED]'
+SENSITIVE_KEYS = {'password', 'new_password', 'current_password', 'code', 'otp', 'token', 'access_token',
+                  'refresh_token', 'reset_code', 'authorization', 'cookie', 'secret', 'api_key'}
+SENSITIVE_PARTS = ('password', 'secret', 'token')
+# Keys with this prefix hold whether a value was given (``has_password``), never the value
+FLAG_PREFIX = 'has_'
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+_listener = None
+_handler = None
+_output = None
+
+
+def is_sensitive(key):
+    key = str(key).lower()
+    if key in SENSITIVE_KEYS:
+        return True
+    return not key.startswith(FLAG_PREFIX) and any(part in key for part in SENSITIVE_PARTS)
+
+
+def redact(value):
+    """Copy of ``value`` with every sensitive dict key masked, at any depth."""
+    if isinstance(value, dict):
+        return {k: REDACTED if is_sensitive(k) else redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    return value
+
+
+def request_id():
+    """The id of the current HTTP request or Socket.IO event, or None outside one."""
+    if not has_request_context():
+        return None
+    if 'request_id' not in g:
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        if _VALID_REQUEST_ID.match(incoming):
+            g.request_id = incoming
+        else:
+            g.request_id = getattr(request, 'sid', None) or uuid.uuid4().hex
+    return g.request_id
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id()
+        sid = getattr(request, 'sid', None) if has_request_context() else None
+        if sid:
+            record.sid = sid
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep ``rate`` of the records below WARNING from the configured loggers."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition('.')[0]
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = REDACTED if is_sensitive(key) else redact(value)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _attach_request_id(response):
+    rid = request_id()
+    if rid:
+        response.headers[REQUEST_ID_HEADER] = rid
+    return response
+
+
+def _start_listener(handler, output):
+    global _listener
+    handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def configure_logging(app):
+    """Install the JSON queue handler on the root logger (once per process) and tag responses for ``app``."""
+    global _handler, _output
+    app.after_request(_attach_request_id)
+    if not app.config.get('LOG_JSON', not app.testing) or _listener is not None:
+        return
+
+    _handler = QueueHandler(queue.SimpleQueue())
+    _handler.addFilter(RequestContextFilter())
+    _handler.addFilter(SamplingFilter(app.config.get('LOG_SAMPLE_RATES') or {}))
+    # Formatting (and so redaction) happens here, while the request context is still there;
+    # the listener only writes the finished line
+    _handler.setFormatter(JsonFormatter())
+
+    _output = logging.StreamHandler(sys.stdout)
+    _output.setFormatter(logging.Formatter('%(message)s'))
+    _start_listener(_handler, _output)
+    atexit.register(lambda: _listener.stop())
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+
+
+def restart_after_fork():
+    """The listener thread does not survive fork(); give a forked worker its own queue and thread."""
+    if _listener is not None:
+        _start_listener(_handler, _output)
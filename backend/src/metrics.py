@@ -0,0 +1,212 @@
+"""Prometheus metrics, served at ``/metrics``.
+
+Under gunicorn every worker is a separate process. Export
+``PROMETHEUS_MULTIPROC_DIR`` (an empty directory, wiped on each deploy) before
+the workers start. Each process then writes its samples there and ``/metrics``
+merges them, whichever worker answers the scrape. Gauges use the ``livesum``
+mode, so they report the sum over live workers; call ``mark_process_dead``
+from gunicorn's ``child_exit`` hook.
+
+What is measured:
+  * HTTP latency histograms and status counters per blueprint and route rule
+  * DB pool connections checked out, overflow and size per bind
+  * Socket.IO connected clients, room memberships and distinct rooms
+  * uploaded bytes by file extension
+  * background job queue depth, runs and failures
+  * mobile push messages by outcome
+  * mail sends and bcrypt hashes in flight, with their durations. Both run
+    inline on request workers, so "in flight" is how many workers are busy
+    with them.
+
+Scrapers must send METRICS_TOKEN as a Bearer token. If no token is set, only
+direct requests from this host are answered, not ones relayed by nginx.
+"""
+import hmac
+import os
+import threading
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager
+
+from flask import Response, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HTTP_LATENCY = Histogram('sdc_http_request_duration_seconds', 'HTTP request latency',
+                         ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS)
+HTTP_REQUESTS = Counter('sdc_http_requests_total', 'HTTP responses by status code',
+                        ['blueprint', 'endpoint', 'method', 'status'])
+
+DB_POOL_CHECKED_OUT = Gauge('sdc_db_pool_checked_out', 'Connections currently checked out of the pool',
+                            ['bind'], multiprocess_mode='livesum')
+DB_POOL_OVERFLOW = Gauge('sdc_db_pool_overflow', 'Connections open beyond the pool size',
+                         ['bind'], multiprocess_mode='livesum')
+DB_POOL_SIZE = Gauge('sdc_db_pool_size', 'Configured pool size', ['bind'], multiprocess_mode='livesum')
+
+SOCKETIO_CLIENTS = Gauge('sdc_socketio_connected_clients', 'Connected Socket.IO clients',
+                         multiprocess_mode='livesum')
+SOCKETIO_MEMBERSHIPS = Gauge('sdc_socketio_room_memberships', 'Client memberships of conversation rooms',
+                             multiprocess_mode='livesum')
+SOCKETIO_ROOMS = Gauge('sdc_socketio_rooms', 'Conversation rooms with at least one client (summed per worker)',
+                       multiprocess_mode='livesum')
+
+UPLOAD_BYTES = Counter('sdc_upload_bytes_total', 'Bytes received through /api/upload', ['extension'])
+
+JOB_QUEUE_DEPTH = Gauge('sdc_job_queue_depth', 'Background jobs waiting for a worker', multiprocess_mode='livesum')
+JOBS = Counter('sdc_jobs_total', 'Background jobs run', ['job', 'outcome'])
+
+IDEMPOTENT_REQUESTS = Counter('sdc_idempotent_requests_total', 'Requests sent with an Idempotency-Key by outcome',
+                              ['outcome'])
+
+PAYMENT_EVENTS = Counter('sdc_payment_events_total', 'Payment webhook events by outcome', ['event', 'outcome'])
+
+PUSH_MESSAGES = Counter('sdc_push_messages_total', 'Mobile push messages by ticket or receipt outcome', ['outcome'])
+
+IN_FLIGHT = Gauge('sdc_blocking_in_flight', 'Blocking calls currently running on request workers',
+                  ['operation'], multiprocess_mode='livesum')
+BLOCKING_DURATION = Histogram('sdc_blocking_duration_seconds', 'Duration of blocking calls',
+                              ['operation'], buckets=LATENCY_BUCKETS)
+BLOCKING_FAILURES = Counter('sdc_blocking_failures_total', 'Blocking calls that raised', ['operation'])
+
+
+@contextmanager
+def track(operation):
+    """Count ``operation`` (e.g. "mail", "bcrypt_hash") as in flight while the block runs."""
+    IN_FLIGHT.labels(operation).inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        BLOCKING_FAILURES.labels(operation).inc()
+        raise
+    finally:
+        BLOCKING_DURATION.labels(operation).observe(time.perf_counter() - start)
+        IN_FLIGHT.labels(operation).dec()
+
+
+# Socket.IO bookkeeping; the server only knows rooms per process, so neither do we
+
+_socket_lock = threading.Lock()
+_socket_rooms = {}
+_room_members = Tally()
+
+
+def _leave(room):
+    _room_members[room] -= 1
+    if _room_members[room] <= 0:
+        del _room_members[room]
+
+
+def _publish_rooms():
+    SOCKETIO_MEMBERSHIPS.set(sum(_room_members.values()))
+    SOCKETIO_ROOMS.set(len(_room_members))
+
+
+def socket_connected(sid):
+    with _socket_lock:
+        _socket_rooms.setdefault(sid, set())
+        SOCKETIO_CLIENTS.set(len(_socket_rooms))
+
+
+def socket_disconnected(sid):
+    with _socket_lock:
+        for room in _socket_rooms.pop(sid, ()):
+            _leave(room)
+        SOCKETIO_CLIENTS.set(len(_socket_rooms))
+        _publish_rooms()
+
+
+def socket_joined(sid, room):
+    with _socket_lock:
+        rooms = _socket_rooms.setdefault(sid, set())
+        if room not in rooms:
+            rooms.add(room)
+            _room_members[room] += 1
+            _publish_rooms()
+
+
+def socket_left(sid, room):
+    with _socket_lock:
+        rooms = _socket_rooms.get(sid, set())
+        if room in rooms:
+            rooms.discard(room)
+            _leave(room)
+            _publish_rooms()
+
+
+def mark_process_dead(pid):
+    """gunicorn ``child_exit`` hook: drop the live gauges of a dead worker."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+def _labels():
+    rule = request.url_rule.rule if request.url_rule else 'unmatched'
+    return request.blueprint or 'app', rule, request.method
+
+
+def _start_timer():
+    g.metrics_start = time.perf_counter()
+
+
+def _observe_request(response):
+    start = g.pop('metrics_start', None)
+    if start is not None:
+        blueprint, endpoint, method = _labels()
+        HTTP_LATENCY.labels(blueprint, endpoint, method).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(blueprint, endpoint, method, str(response.status_code)).inc()
+    return response
+
+
+LOOPBACK = ('127.0.0.1', '::1')
+
+
+def _scrape_allowed():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    # Without a token only a scraper on this host may read it. Requests relayed by the
+    # local nginx also arrive from loopback, but they carry X-Forwarded-For.
+    return request.remote_addr in LOOPBACK and 'X-Forwarded-For' not in request.headers
+
+
+def metrics_view():
+    if not _scrape_allowed():
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def install_pool_metrics(engine, bind):
+    pool = engine.pool
+
+    def publish(*args):
+        if hasattr(pool, 'checkedout'):
+            DB_POOL_CHECKED_OUT.labels(bind).set(pool.checkedout())
+        if hasattr(pool, 'overflow'):
+            DB_POOL_OVERFLOW.labels(bind).set(max(pool.overflow(), 0))
+
+    if hasattr(pool, 'size'):
+        DB_POOL_SIZE.labels(bind).set(pool.size())
+    for name in ('checkout', 'checkin', 'close'):
+        event.listen(engine, name, publish)
+
+
+def init_metrics(app, db):
+    """Register the request hooks, the DB pool listeners and the ``/metrics`` route."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
+    with app.app_context():
+        for key, engine in db.engines.items():
+            install_pool_metrics(engine, key or 'default')
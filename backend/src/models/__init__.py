@@ -1,42 +1,26 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy import TypeDecorator, String
+from sqlalchemy import TypeDecorator, JSON
 import uuid
-from datetime import datetime
-import json
+from datetime import datetime, date
+
+from ..database import RoutingSession
 
 class JSONType(TypeDecorator):
     """Platform-independent JSON type.
-    Uses JSONB for PostgreSQL, String for SQLite.
+    Uses JSONB for PostgreSQL and the native JSON type (JSON1 functions) elsewhere,
+    so documents can be queried with json_extract / ->> instead of loaded wholesale.
     """
-    impl = String
+    impl = JSON
     cache_ok = True
 
     def load_dialect_impl(self, dialect):
         if dialect.name == 'postgresql':
-            return dialect.type_descriptor(JSONB)
+            return dialect.type_descriptor(JSONB(none_as_null=True))
         else:
-            return dialect.type_descriptor(String)
-
-    def process_bind_param(self, value, dialect):
-        if value is not None:
-            if dialect.name == 'postgresql':
-                return value
-            else:
-                return json.dumps(value)
-        return value
-
-    def process_result_value(self, value, dialect):
-        if value is not None:
-            if dialect.name == 'postgresql':
-                return value
-            else:
-                return json.loads(value)
-        return value
-
-db = SQLAlchemy()
-mail = Mail()
+            return dialect.type_descriptor(JSON(none_as_null=True))
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Agency(db.Model):
     __tablename__ = 'agencies'
@@ -49,17 +33,76 @@ class Agency(db.Model):
 
 class KycDocument(db.Model):
     __tablename__ = 'kyc_documents'
+    __table_args__ = (
+        db.Index('ix_kyc_documents_role_location', 'role', 'location'),
+        db.Index('ix_kyc_documents_status_updated_at', 'status', 'updated_at', 'id'),
+    )
+    # form_data paths, in priority order, copied into the indexed columns below
+    INDEXED_FIELDS = {
+        'location': (('location',), ('personal', 'location'), ('personal', 'state_of_birth')),
+        'date_of_birth': (('dob',), ('date_of_birth',), ('personal', 'dob')),
+        'blood_group': (('blood_group',), ('medical', 'blood_group')),
+    }
+    DOB_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y')
+
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), index=True, nullable=False, unique=True)
     role = db.Column(db.String(50), nullable=False)
     status = db.Column(db.String(50), default='in_progress')
     form_data = db.Column(JSONType, default={})
     form_progress = db.Column(db.Integer, default=0)
-    agency_id = db.Column(db.String(36), db.ForeignKey('agencies.id'))
+    agency_id = db.Column(db.String(36), db.ForeignKey('agencies.id'), index=True)
     file_url = db.Column(db.Text)
+    location = db.Column(db.String(255))
+    date_of_birth = db.Column(db.Date, index=True)
+    blood_group = db.Column(db.String(10), index=True)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Every UPDATE is guarded by "WHERE version = :old" and bumps the counter
+    __mapper_args__ = {'version_id_col': version}
+
+    @property
+    def age(self):
+        if not self.date_of_birth:
+            return None
+        today = date.today()
+        dob = self.date_of_birth
+        return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+    def set_form_data(self, form_data):
+        """Replace form_data and refresh the indexed columns extracted from it.
+
+        Anything but a dict clears the indexed columns, so filters never match stale values.
+        """
+        self.form_data = form_data
+        source = form_data if isinstance(form_data, dict) else {}
+        values = {}
+        for column, paths in self.INDEXED_FIELDS.items():
+            values[column] = None
+            for path in paths:
+                value = source
+                for key in path:
+                    value = value.get(key) if isinstance(value, dict) else None
+                if value not in (None, ''):
+                    values[column] = value
+                    break
+        self.location = str(values['location']).strip()[:255] if values['location'] else None
+        self.blood_group = str(values['blood_group']).strip().upper()[:10] if values['blood_group'] else None
+        self.date_of_birth = self._parse_dob(values['date_of_birth'])
+
+    @classmethod
+    def _parse_dob(cls, value):
+        if not value:
+            return None
+        for fmt in cls.DOB_FORMATS:
+            try:
+                return datetime.strptime(str(value).strip()[:10], fmt).date()
+            except ValueError:
+                continue
+        return None
+
 class User(db.Model):
     __tablename__ = 'users'
     __table_args__ = (
@@ -220,24 +263,45 @@ class IntendingParent(db.Model):
 
 class Subscription(db.Model):
     __tablename__ = 'subscriptions'
+    __table_args__ = (
+        db.Index('uq_subscriptions_reference', 'reference', unique=True),
+        # The scheduler's expiry and reminder sweeps
+        db.Index('ix_subscriptions_status_expires_at', 'status', 'expires_at'),
+        # An agency's effective plan
+        db.Index('ix_subscriptions_user_id_expires_at', 'user_id', 'expires_at'),
+    )
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36))
     plan = db.Column(db.String(50), nullable=False)
     amount = db.Column(db.Numeric(10, 2), default=0)
     status = db.Column(db.String(50), default='pending')
+    # Paystack transaction reference of the payment that bought it
+    reference = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime)
+    reminded_at = db.Column(db.DateTime)  # renewal reminder sent
 
 class EscrowTransaction(db.Model):
+    """Money held for a payment; see services.escrow for the pending/held/released/refunded states."""
     __tablename__ = 'escrow_transactions'
+    __table_args__ = (
+        # The settlement job's scan for held escrows that are due
+        db.Index('ix_escrow_transactions_status_release_at', 'status', 'release_at'),
+        # Released volume and commission in the admin finance report
+        db.Index('ix_escrow_transactions_status_released_at', 'status', 'released_at'),
+    )
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36))
+    payee_id = db.Column(db.String(36))  # credited with the amount less commission on release
     amount = db.Column(db.Numeric(10, 2), nullable=False)
+    commission = db.Column(db.Numeric(10, 2))  # set on release from CommissionSetting
     currency = db.Column(db.String(10), default='NGN')
     type = db.Column(db.String(50), nullable=False)
     status = db.Column(db.String(50), default='held')
     reference = db.Column(db.String(255), unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    release_at = db.Column(db.DateTime)  # released by the settlement job from then; None waits for an admin
+    released_at = db.Column(db.DateTime)
 
 class Dispute(db.Model):
     __tablename__ = 'disputes'
@@ -271,9 +335,18 @@ class Contract(db.Model):
 
 class MarketplaceUnlock(db.Model):
     __tablename__ = 'marketplace_unlocks'
+    __table_args__ = (
+        # The ON CONFLICT target of services.marketplace.unlock_listing
+        db.Index('uq_marketplace_unlocks_user_listing', 'user_id', 'listing_id', unique=True),
+        db.Index('uq_marketplace_unlocks_user_idempotency_key', 'user_id', 'idempotency_key', unique=True),
+    )
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     listing_id = db.Column(db.String(50), nullable=False)
+    # Price paid and the platform's cut at the commission rate in force when unlocked
+    amount = db.Column(db.Numeric(10, 2))
+    commission = db.Column(db.Numeric(10, 2))
+    idempotency_key = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Favorite(db.Model):
@@ -286,7 +359,7 @@ class Favorite(db.Model):
 class VerificationBadge(db.Model):
     __tablename__ = 'verification_badges'
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
     type = db.Column(db.String(50), nullable=False)
     status = db.Column(db.String(50), default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -301,18 +374,41 @@ class CommissionSetting(db.Model):
 
 class Message(db.Model):
     __tablename__ = 'messages'
+    __table_args__ = (
+        # Conversation history, and the participants a new message is pushed to
+        db.Index('ix_messages_conversation_id_sender_user_id', 'conversation_id', 'sender_user_id'),
+    )
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     conversation_id = db.Column(db.String(36), nullable=False)
     sender_user_id = db.Column(db.String(36), nullable=False)
     content = db.Column(db.Text)
     attachment_url = db.Column(db.Text)
     attachment_type = db.Column(db.String(50))
+    attachment_thumbnail_url = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class MediaAsset(db.Model):
+    """Tracks background processing (transcode + poster frame) of an uploaded video."""
+    __tablename__ = 'media_assets'
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36))
+    original_url = db.Column(db.Text, nullable=False, index=True)
+    url = db.Column(db.Text)
+    poster_url = db.Column(db.Text)
+    status = db.Column(db.String(20), default='pending')  # pending, ready, failed
+    error = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class WalletTransaction(db.Model):
     __tablename__ = 'wallet_transactions'
+    __table_args__ = (
+        # Balances are summed over a user's completed transactions
+        db.Index('ix_wallet_transactions_user_id_status', 'user_id', 'status'),
+    )
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), nullable=False)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
@@ -325,6 +421,17 @@ class WalletTransaction(db.Model):
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
+    # Partial indexes only match a literal predicate, never a bound parameter
+    UNREAD = "status = 'unread'"
+    READ = "status = 'read'"
+    __table_args__ = (
+        db.Index('ix_notifications_user_created_at', 'user_id', 'created_at', 'id'),
+        db.Index('ix_notifications_user_unread', 'user_id',
+                 postgresql_where=db.text(UNREAD), sqlite_where=db.text(UNREAD)),
+        # Retention compaction picks the oldest read rows from here
+        db.Index('ix_notifications_read_created_at', 'created_at',
+                 postgresql_where=db.text(READ), sqlite_where=db.text(READ)),
+    )
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), nullable=False)
     title = db.Column(db.String(255), nullable=False)
@@ -333,6 +440,92 @@ class Notification(db.Model):
     status = db.Column(db.String(20), default='unread')  # unread, read
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class DeviceToken(db.Model):
+    """An Expo push token of a signed-in app install; a token belongs to the last user to register it."""
+    __tablename__ = 'device_tokens'
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), nullable=False, index=True)
+    token = db.Column(db.String(255), nullable=False, unique=True)
+    platform = db.Column(db.String(20))  # ios, android, web
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class IdempotencyKey(db.Model):
+    """The first response to a request sent with an Idempotency-Key, replayed to its retries."""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.Index('uq_idempotency_keys_scope_key', 'scope', 'key', unique=True),
+        db.Index('ix_idempotency_keys_expires_at', 'expires_at'),
+    )
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    scope = db.Column(db.String(64), nullable=False)  # caller's user id, '' when unauthenticated
+    key = db.Column(db.String(255), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of method, path and body
+    status = db.Column(db.String(20), nullable=False, default='processing')  # processing, completed
+    response_status = db.Column(db.Integer)
+    response_body = db.Column(db.LargeBinary)
+    content_type = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class ScheduledTask(db.Model):
+    """When a periodic job last ran and is next due; claimed with a conditional UPDATE."""
+    __tablename__ = 'scheduled_tasks'
+    name = db.Column(db.String(100), primary_key=True)
+    next_run_at = db.Column(db.DateTime, nullable=False)
+    last_run_at = db.Column(db.DateTime)
+
+class PaymentEvent(db.Model):
+    """A Paystack webhook delivery, stored verbatim before it is processed on the job queue."""
+    __tablename__ = 'payment_events'
+    __table_args__ = (
+        # Redeliveries of an event are dropped at ingestion
+        db.Index('uq_payment_events_event_reference', 'event', 'reference', unique=True),
+        db.Index('ix_payment_events_status_received_at', 'status', 'received_at'),
+    )
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    provider = db.Column(db.String(20), nullable=False, default='paystack')
+    event = db.Column(db.String(100), nullable=False)  # e.g. charge.success
+    reference = db.Column(db.String(255))
+    payload = db.Column(db.Text, nullable=False)  # the raw signed body
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, processed, ignored, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+
+class NotificationArchive(db.Model):
+    """Read notifications moved out of the hot ``notifications`` table by retention compaction."""
+    __tablename__ = 'notifications_archive'
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.String(36), nullable=False, index=True)
+    title = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    severity = db.Column(db.String(20))
+    status = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class NotificationBroadcast(db.Model):
+    """One notification fanned out to every active user matching role and/or agency."""
+    __tablename__ = 'notification_broadcasts'
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    created_by = db.Column(db.String(36))
+    title = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    severity = db.Column(db.String(20), default='info')
+    role = db.Column(db.String(50))
+    agency_id = db.Column(db.String(36), db.ForeignKey('agencies.id'))
+    status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed
+    total = db.Column(db.Integer)
+    sent = db.Column(db.Integer, nullable=False, default=0)
+    # Highest user id already notified; a re-run resumes after it
+    last_user_id = db.Column(db.String(36))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+
 class ContractTemplate(db.Model):
     __tablename__ = 'contract_templates'
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -0,0 +1,175 @@
+"""Statistical profiler for live workers.
+
+A ``Sampler`` runs on its own OS thread. Every ``interval`` seconds it reads
+``sys._current_frames()`` and counts the stack of each profiled thread.
+Nothing is hooked into the code being profiled, so overhead is one stack
+walk per sample. Results are in the collapsed-stack format
+(``module:func;module:func count``). flamegraph.pl, inferno and
+speedscope.app read it as is.
+
+Three ways in, all per worker process:
+  * ``POST /api/admin/profile``: sample every thread of the worker that
+    answers for N seconds (admin, PROFILING_ENABLED)
+  * ``POST /api/admin/profile/routes``: profile the next N requests to one
+    route rule; fetch the result with ``GET /api/admin/profile/routes``
+  * ``?__profile=1`` on any request: the response body is replaced by that
+    request's profile (debug and testing configs only)
+
+Under eventlet every greenlet shares one OS thread, and patched
+``threading.get_ident()`` returns a greenlet id that ``sys._current_frames()``
+never reports. Thread ids are therefore always taken from the original
+``threading`` module, so a request profile samples the worker's OS thread.
+That shows whatever greenlet was running on it, not only the profiled
+request. ``sample_worker`` waits with the (possibly green) ``time.sleep``, so
+the worker keeps serving other requests while it is sampled.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, current_app, g, request
+
+DEFAULT_INTERVAL = 0.005
+MAX_SECONDS = 60
+MAX_ROUTE_REQUESTS = 1000
+
+
+def _os_threading():
+    # The sampler must be a real thread even when eventlet has patched threading
+    patcher = sys.modules.get('eventlet.patcher')
+    if patcher and patcher.is_monkey_patched('thread'):
+        return patcher.original('threading'), patcher.original('time')
+    return threading, time
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def render(stacks):
+    """Collapsed-stack text, heaviest stacks first."""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+class Sampler:
+    def __init__(self, thread_ids=None, interval=DEFAULT_INTERVAL):
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = None
+        self._thread = None
+
+    def start(self):
+        os_threading, os_time = _os_threading()
+        self._stop = os_threading.Event()
+        self._thread = os_threading.Thread(target=self._run, args=(os_time,), name='sdc-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self, os_time):
+        own = _os_threading()[0].get_ident()
+        while not self._stop.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own and (self.thread_ids is None or thread_id in self.thread_ids):
+                    self.stacks[collapse(frame)] += 1
+            self.samples += 1
+            os_time.sleep(self.interval)
+
+
+def sample_worker(seconds, interval=DEFAULT_INTERVAL):
+    """Sample every thread of this process for ``seconds``; the caller waits meanwhile.
+
+    Under eventlet the wait yields to the hub, so other requests keep running and are sampled.
+    """
+    sampler = Sampler(interval=interval).start()
+    time.sleep(seconds)
+    return sampler.stop()
+
+
+class RouteCaptures:
+    """Profiles of the next N requests to armed route rules, kept per process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._captures = {}
+
+    def arm(self, rule, requests, interval=DEFAULT_INTERVAL):
+        with self._lock:
+            self._captures[rule] = {'remaining': requests, 'profiled': 0, 'interval': interval, 'stacks': Counter()}
+
+    def claim(self, rule):
+        """Reserve one profiled request for ``rule``; returns the sampling interval or None."""
+        with self._lock:
+            capture = self._captures.get(rule)
+            if not capture or capture['remaining'] <= 0:
+                return None
+            capture['remaining'] -= 1
+            return capture['interval']
+
+    def record(self, rule, stacks):
+        with self._lock:
+            capture = self._captures.get(rule)
+            if capture:
+                capture['stacks'].update(stacks)
+                capture['profiled'] += 1
+
+    def get(self, rule):
+        with self._lock:
+            capture = self._captures.get(rule)
+            return dict(capture, stacks=Counter(capture['stacks'])) if capture else None
+
+    def clear(self, rule=None):
+        with self._lock:
+            if rule is None:
+                self._captures.clear()
+            else:
+                self._captures.pop(rule, None)
+
+
+route_captures = RouteCaptures()
+
+
+def _start_request_profile():
+    rule = request.url_rule.rule if request.url_rule else None
+    interval = None
+    if request.args.get('__profile') == '1' and (current_app.debug or current_app.testing):
+        g.profile_inline = True
+        interval = current_app.config.get('PROFILER_INTERVAL', DEFAULT_INTERVAL)
+    elif rule and current_app.config.get('PROFILING_ENABLED'):
+        interval = route_captures.claim(rule)
+        g.profile_rule = rule
+    if interval:
+        g.profiler = Sampler({_os_threading()[0].get_ident()}, interval).start()
+
+
+def _finish_request_profile(response):
+    sampler = g.pop('profiler', None)
+    if sampler is None:
+        return response
+    stacks = sampler.stop()
+    if g.pop('profile_inline', False):
+        return Response(render(stacks), mimetype='text/plain',
+                        headers={'X-Profile-Samples': str(sampler.samples), 'X-Profiled-Status': str(response.status_code)})
+    route_captures.record(g.pop('profile_rule'), stacks)
+    return response
+
+
+def init_profiler(app):
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
@@ -0,0 +1,217 @@
+"""Synthetic data for staging and load tests (``flask sdc seed``).
+
+Generates users across every role with the rows that hang off them: agencies,
+donor/surrogate/intending-parent records, surrogate profiles, KYC documents
+with nested form data, verification badges, conversations full of messages,
+wallet transactions and notifications. Output is deterministic for a given
+``seed``. Rows are written with Core ``executemany`` in batches, so a
+100k-user / 2M-message dataset takes minutes.
+
+Every seeded user can log in as ``<role><n>@seed.sdc.test`` (``n`` counts from
+0 per role) with ``SEED_PASSWORD``; the load tests in ``loadtest/`` rely on that.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import bcrypt
+from sqlalchemy import insert
+
+from .models import (
+    db, User, Agency, Donor, Surrogate, SurrogateProfile, IntendingParent, KycDocument,
+    VerificationBadge, Message, WalletTransaction, Notification
+)
+from .services.kyc import compute_form_progress
+
+SEED_PASSWORD = 'Password123!'
+SEED_EMAIL_DOMAIN = 'seed.sdc.test'
+
+ROLE_SHARES = (
+    ('donor', 0.35),
+    ('surrogate', 0.30),
+    ('intending_parent', 0.25),
+    ('agency', 0.09),
+    ('admin', 0.01),
+)
+KYC_ROLES = ('donor', 'surrogate', 'intending_parent')
+KYC_STATUSES = (('in_progress', 0.3), ('submitted', 0.25), ('approved', 0.4), ('rejected', 0.05))
+WALLET_TYPES = (('credit', 0.35), ('payment', 0.25), ('debit', 0.3), ('withdrawal', 0.08), ('referral_bonus', 0.02))
+
+FIRST_NAMES = ('Adaeze', 'Chioma', 'Ngozi', 'Amaka', 'Funmilayo', 'Yetunde', 'Aisha', 'Zainab', 'Blessing',
+               'Grace', 'Temitope', 'Kemi', 'Ifeoma', 'Halima', 'Esther', 'Chinedu', 'Emeka', 'Tunde',
+               'Ibrahim', 'Segun', 'Olumide', 'Uche', 'Babajide', 'Musa', 'David')
+LAST_NAMES = ('Okafor', 'Adeyemi', 'Okonkwo', 'Balogun', 'Eze', 'Ibrahim', 'Nwosu', 'Bello', 'Obi',
+              'Adebayo', 'Ogunleye', 'Mohammed', 'Chukwu', 'Afolabi', 'Okeke', 'Lawal', 'Danjuma')
+STATES = ('Lagos', 'Abuja', 'Rivers', 'Oyo', 'Kano', 'Enugu', 'Anambra', 'Delta', 'Ogun', 'Kaduna',
+          'Edo', 'Imo', 'Kwara', 'Plateau', 'Akwa Ibom')
+BLOOD_GROUPS = (('O+', 0.47), ('A+', 0.22), ('B+', 0.21), ('AB+', 0.03), ('O-', 0.04), ('A-', 0.01), ('B-', 0.01), ('AB-', 0.01))
+OCCUPATIONS = ('Teacher', 'Nurse', 'Trader', 'Civil servant', 'Student', 'Accountant', 'Hairdresser', 'Banker')
+MESSAGE_TEXTS = ('Hello, I saw your profile on the marketplace.', 'Thank you for getting back to me!',
+                 'When would be a good time for a call?', 'I have uploaded my medical report.',
+                 'Could you share more about your previous pregnancies?', 'The agency confirmed the appointment.',
+                 'Okay, that works for me.', 'Please check the contract draft.', 'Good morning!',
+                 'I will send the documents this evening.')
+NOTIFICATION_TITLES = (('KYC update', 'Your KYC submission was reviewed.'),
+                       ('New message', 'You have a new message.'),
+                       ('Wallet', 'Your wallet was credited.'))
+
+
+def seed_email(role, n):
+    return f'{role}{n}@{SEED_EMAIL_DOMAIN}'
+
+
+class Seeder:
+    def __init__(self, seed=42, batch_size=5000, echo=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.echo = echo or (lambda message: None)
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.counts = {}
+        self._buffers = {}
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def weighted(self, choices):
+        return self.rng.choices([c for c, _ in choices], weights=[w for _, w in choices])[0]
+
+    def past(self, days):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def add(self, model, row):
+        buffer = self._buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model=None):
+        models = [model] if model else list(self._buffers)
+        for model in models:
+            rows = self._buffers.pop(model, None)
+            if rows:
+                db.session.execute(insert(model.__table__), rows)
+                db.session.commit()
+                self.counts[model.__tablename__] = self.counts.get(model.__tablename__, 0) + len(rows)
+
+    def run(self, users, messages, transactions, notifications_per_user=3):
+        password_hash = bcrypt.hashpw(SEED_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        by_role = {role: [] for role, _ in ROLE_SHARES}
+
+        self.echo(f'Seeding {users} users...')
+        totals = {role: int(users * share) for role, share in ROLE_SHARES}
+        totals['donor'] += users - sum(totals.values())
+        for role, total in totals.items():
+            for n in range(total):
+                user_id = self.uuid()
+                by_role[role].append(user_id)
+                first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+                self.add(User, {
+                    'id': user_id, 'role': role, 'email': seed_email(role, n), 'username': f'{role}{n}',
+                    'password_hash': password_hash, 'first_name': first, 'last_name': last,
+                    'is_verified': True, 'is_active': self.rng.random() > 0.02,
+                    'referral_code': f'SEED{role[:2].upper()}{n}', 'created_at': self.past(730),
+                })
+        self.flush()
+
+        agency_ids = [self.uuid() for _ in by_role['agency']]
+        for owner_id, agency_id in zip(by_role['agency'], agency_ids):
+            self.add(Agency, {
+                'id': agency_id, 'owner_id': owner_id, 'name': f'{self.rng.choice(LAST_NAMES)} Fertility Partners',
+                'email': f'agency-{agency_id[:8]}@{SEED_EMAIL_DOMAIN}',
+                'status': self.weighted((('active', 0.8), ('pending', 0.2))), 'created_at': self.past(730),
+            })
+        self.flush()
+
+        self.echo('Seeding role records, profiles and KYC documents...')
+        for role in KYC_ROLES:
+            for user_id in by_role[role]:
+                agency_id = self.rng.choice(agency_ids) if agency_ids and self.rng.random() < 0.4 else None
+                self._role_rows(role, user_id, agency_id)
+        self.flush()
+
+        self.echo(f'Seeding {messages} messages...')
+        self._messages(messages, by_role)
+        self.echo(f'Seeding {transactions} wallet transactions...')
+        members = [u for role in KYC_ROLES + ('agency',) for u in by_role[role]]
+        for _ in range(transactions):
+            self.add(WalletTransaction, {
+                'id': self.uuid(), 'user_id': self.rng.choice(members),
+                'amount': Decimal(self.rng.randrange(100000, 50000000)) / 100, 'currency': 'NGN',
+                'type': self.weighted(WALLET_TYPES),
+                'status': self.weighted((('completed', 0.85), ('pending', 0.1), ('failed', 0.05))),
+                'reference': f'SEED-{self.uuid()}', 'created_at': self.past(365),
+            })
+        self.flush()
+
+        self.echo('Seeding notifications...')
+        for user_id in members:
+            for _ in range(self.rng.randrange(notifications_per_user * 2 + 1)):
+                title, body = self.rng.choice(NOTIFICATION_TITLES)
+                self.add(Notification, {
+                    'id': self.uuid(), 'user_id': user_id, 'title': title, 'body': body,
+                    'status': self.weighted((('read', 0.6), ('unread', 0.4))), 'created_at': self.past(90),
+                })
+        self.flush()
+        return self.counts
+
+    def _role_rows(self, role, user_id, agency_id):
+        created_at = self.past(700)
+        dob = (self.now - timedelta(days=365 * self.rng.randint(21, 45) + self.rng.randrange(365))).date()
+        location = self.rng.choice(STATES)
+        blood_group = self.weighted(BLOOD_GROUPS)
+
+        if role == 'surrogate':
+            surrogate_id = self.uuid()
+            self.add(Surrogate, {'id': surrogate_id, 'user_id': user_id, 'agency_id': agency_id,
+                                 'status': self.weighted((('active', 0.85), ('inactive', 0.15))), 'created_at': created_at})
+            self.add(SurrogateProfile, {
+                'id': self.uuid(), 'surrogate_id': surrogate_id, 'date_of_birth': dob, 'location': location,
+                'occupation': self.rng.choice(OCCUPATIONS), 'bio': 'Healthy, supportive family, previous successful pregnancies.',
+                'pregnancy_history': f'{self.rng.randint(1, 3)} successful pregnancies', 'updated_at': created_at,
+            })
+        elif role == 'donor':
+            self.add(Donor, {'id': self.uuid(), 'user_id': user_id, 'agency_id': agency_id, 'created_at': created_at})
+        else:
+            self.add(IntendingParent, {'id': self.uuid(), 'user_id': user_id, 'agency_id': agency_id, 'created_at': created_at})
+
+        if self.rng.random() > 0.85:
+            return
+        status = self.weighted(KYC_STATUSES)
+        form_data = {
+            'personal': {'surname': self.rng.choice(LAST_NAMES), 'first_name': self.rng.choice(FIRST_NAMES),
+                         'dob': dob.isoformat(), 'state_of_birth': location, 'phone': f'+23480{self.rng.randrange(10**8):08d}'},
+            'medical': {'blood_group': blood_group, 'genotype': self.rng.choice(('AA', 'AS'))},
+        }
+        if status != 'in_progress':
+            form_data['identification'] = {'id_type': 'NIN', 'id_number': f'{self.rng.randrange(10**11):011d}'}
+            form_data['emergency'] = {'name': self.rng.choice(FIRST_NAMES), 'phone': f'+23481{self.rng.randrange(10**8):08d}'}
+        self.add(KycDocument, {
+            'id': self.uuid(), 'user_id': user_id, 'role': role, 'status': status, 'form_data': form_data,
+            'form_progress': compute_form_progress(role, form_data), 'agency_id': agency_id,
+            'location': location, 'date_of_birth': dob, 'blood_group': blood_group,
+            'created_at': created_at, 'updated_at': created_at + timedelta(hours=self.rng.randrange(1, 500)),
+        })
+        if status == 'approved':
+            self.add(VerificationBadge, {'id': self.uuid(), 'user_id': user_id, 'type': 'id_verified', 'status': 'approved'})
+
+    def _messages(self, total, by_role):
+        seekers = by_role['intending_parent'] or by_role['donor']
+        providers = by_role['surrogate'] + by_role['donor']
+        if not total or not seekers or not providers:
+            return
+        written = 0
+        while written < total:
+            # Conversations are bursty: most are short, a few run for hundreds of messages
+            length = min(total - written, int(self.rng.paretovariate(1.2) * 8))
+            conversation_id = self.uuid()
+            participants = (self.rng.choice(seekers), self.rng.choice(providers))
+            at = self.past(365)
+            for _ in range(length):
+                at += timedelta(seconds=self.rng.randrange(30, 6 * 3600))
+                self.add(Message, {
+                    'id': self.uuid(), 'conversation_id': conversation_id, 'sender_user_id': self.rng.choice(participants),
+                    'content': self.rng.choice(MESSAGE_TEXTS), 'created_at': at, 'updated_at': at,
+                })
+            written += length
+        self.flush()
@@ -0,0 +1,102 @@
+"""Per-user verification badge lookups with an in-process cache.
+
+Marketplace cards need the badge set of every listed user. Lookups go through
+``get_badges_for``, which serves cached users from memory and fetches all misses
+with one chunked ``IN`` query. Entries are dropped after the transaction that
+changes a user's ``VerificationBadge`` rows commits; the TTL bounds staleness in
+the other worker processes, which do not see that invalidation.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..models import db, VerificationBadge
+
+QUERY_CHUNK_SIZE = 100
+
+
+class BadgeCache:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, user_ids, ttl):
+        now = time.monotonic()
+        hits = {}
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry and now - entry[0] < ttl:
+                    hits[user_id] = entry[1]
+        return hits
+
+    def set_many(self, badges_by_user):
+        now = time.monotonic()
+        with self._lock:
+            for user_id, badges in badges_by_user.items():
+                self._entries[user_id] = (now, badges)
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+badge_cache = BadgeCache()
+
+
+def serialize_badge(badge):
+    return {"user_id": str(badge.user_id), "type": badge.type, "status": badge.status}
+
+
+def get_badges_for(user_ids):
+    """Return ``{user_id: [badge, ...]}`` for every requested id (empty list if none)."""
+    user_ids = list(dict.fromkeys(str(u) for u in user_ids if u))
+    ttl = current_app.config.get('BADGE_CACHE_TTL', 300)
+    result = badge_cache.get_many(user_ids, ttl) if ttl else {}
+
+    misses = [u for u in user_ids if u not in result]
+    fetched = {u: [] for u in misses}
+    for start in range(0, len(misses), QUERY_CHUNK_SIZE):
+        chunk = misses[start:start + QUERY_CHUNK_SIZE]
+        rows = db.session.query(VerificationBadge.user_id, VerificationBadge.type, VerificationBadge.status) \
+            .filter(VerificationBadge.user_id.in_(chunk)) \
+            .order_by(VerificationBadge.user_id, VerificationBadge.created_at).all()
+        for row in rows:
+            fetched[row.user_id].append(serialize_badge(row))
+
+    if ttl:
+        badge_cache.set_many(fetched)
+    result.update(fetched)
+    return result
+
+
+@event.listens_for(VerificationBadge, 'after_insert')
+@event.listens_for(VerificationBadge, 'after_update')
+@event.listens_for(VerificationBadge, 'after_delete')
+def _badge_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        user_ids = session.info.setdefault('badge_user_ids', set())
+        user_ids.add(target.user_id)
+        # A badge moved to another user invalidates the previous owner too
+        user_ids.update(inspect(target).attrs.user_id.history.deleted or ())
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_badges(session):
+    user_ids = session.info.pop('badge_user_ids', None)
+    if user_ids:
+        badge_cache.invalidate(user_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_badges(session):
+    session.info.pop('badge_user_ids', None)
@@ -0,0 +1,142 @@
+"""Escrow states and settlement.
+
+An ``EscrowTransaction`` moves through::
+
+    pending --(charge.success)--> held --(release)--> released
+       |                            |
+       +-------(refund)-------------+----------------> refunded
+
+``TRANSITIONS`` maps each state to the states it can be entered from. Every
+move is one conditional UPDATE of the whole set of rows
+(``WHERE id IN (...) AND status IN (...)``), so a row already moved by a
+concurrent release or refund is skipped rather than moved twice.
+
+Release records the commission at the ``CommissionSetting`` rate in force at
+that moment. Types without a setting use ESCROW_DEFAULT_COMMISSION_PERCENT.
+If the escrow has a ``payee_id``, the payee's wallet is credited with the
+amount less commission. Marketplace unlocks have no payee (listings record no
+owner): the fee is platform revenue, so the whole amount is booked as
+commission. The commission values go in one executemany UPDATE and the wallet
+credits in one executemany INSERT. The finance report then sums the stored
+commission instead of deriving it.
+
+Escrows with a ``release_at`` are released by ``settle_escrows``. It runs on
+the scheduler every ESCROW_SETTLEMENT_INTERVAL seconds and commits every
+ESCROW_SETTLEMENT_BATCH_SIZE rows. Escrows without one wait for an admin
+(``POST /api/admin/escrow/settle``). A refund returns wallet-funded escrows to
+the wallet by marking the debit that funded them refunded. Refunding an unlock
+also revokes it.
+"""
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import delete, insert, select, update
+
+from ..models import db, EscrowTransaction, WalletTransaction, CommissionSetting, MarketplaceUnlock
+from .scheduler import scheduler
+from .wallet import CREDIT_TYPES
+
+CENTS = Decimal('0.01')
+TRANSITIONS = {
+    'held': ('pending',),
+    'released': ('held',),
+    'refunded': ('pending', 'held'),
+}
+# Fees the platform keeps in full; there is no payee to pay out to
+PLATFORM_REVENUE_TYPES = ('marketplace_unlock',)
+UNLOCK_REFERENCE_PREFIX = 'unlock:'
+
+
+def hold_until(now):
+    """When an escrow created at ``now`` becomes due for automatic release."""
+    return now + timedelta(days=current_app.config.get('ESCROW_HOLD_DAYS', 3))
+
+
+def _transition(ids, status, **values):
+    """Move the escrows in ``ids`` that may enter ``status``; returns the moved rows."""
+    columns = (EscrowTransaction.id, EscrowTransaction.payee_id, EscrowTransaction.amount,
+               EscrowTransaction.currency, EscrowTransaction.type, EscrowTransaction.reference)
+    movable = (EscrowTransaction.id.in_(ids), EscrowTransaction.status.in_(TRANSITIONS[status]))
+    stmt = update(EscrowTransaction).where(*movable).values(status=status, **values) \
+        .execution_options(synchronize_session=False)
+    if db.session.get_bind().dialect.update_returning:
+        return db.session.execute(stmt.returning(*columns)).all()
+    rows = db.session.query(*columns).filter(*movable).with_for_update().all()
+    db.session.execute(stmt)
+    return rows
+
+
+def commission_rates():
+    default = Decimal(str(current_app.config.get('ESCROW_DEFAULT_COMMISSION_PERCENT', 5)))
+    rates = {category: Decimal(str(percent)) for category, percent
+             in db.session.query(CommissionSetting.category, CommissionSetting.percent)}
+    return rates, default
+
+
+def release(ids):
+    """Release the held escrows in ``ids`` and credit their payees; returns how many were released.
+
+    The caller commits.
+    """
+    now = datetime.utcnow()
+    rows = _transition(ids, 'released', released_at=now)
+    if not rows:
+        return 0
+    rates, default = commission_rates()
+    commissions, credits = [], []
+    for row in rows:
+        amount = Decimal(str(row.amount))
+        if row.type in PLATFORM_REVENUE_TYPES:
+            commission = amount
+        else:
+            commission = (amount * rates.get(row.type, default) / 100).quantize(CENTS)
+        commissions.append({'id': row.id, 'commission': commission})
+        if row.payee_id:
+            credits.append({
+                'id': str(uuid.uuid4()), 'user_id': row.payee_id, 'amount': amount - commission,
+                'currency': row.currency or 'NGN', 'type': 'escrow_release', 'status': 'completed',
+                'reference': f'release:{row.id}', 'created_at': now
+            })
+    db.session.execute(update(EscrowTransaction), commissions)
+    if credits:
+        db.session.execute(insert(WalletTransaction), credits)
+    return len(rows)
+
+
+def refund(ids):
+    """Refund the pending or held escrows in ``ids``; returns how many were refunded.
+
+    Escrows paid from the wallet go back to it, and refunded unlocks are revoked.
+    The caller commits.
+    """
+    rows = _transition(ids, 'refunded')
+    references = [row.reference for row in rows if row.reference]
+    if references:
+        db.session.execute(update(WalletTransaction).where(
+            WalletTransaction.reference.in_(references), WalletTransaction.status == 'completed',
+            WalletTransaction.type.notin_(CREDIT_TYPES)
+        ).values(status='refunded'))
+    unlock_ids = [row.reference[len(UNLOCK_REFERENCE_PREFIX):] for row in rows
+                  if row.type == 'marketplace_unlock' and (row.reference or '').startswith(UNLOCK_REFERENCE_PREFIX)]
+    if unlock_ids:
+        db.session.execute(delete(MarketplaceUnlock).where(MarketplaceUnlock.id.in_(unlock_ids)))
+    return len(rows)
+
+
+@scheduler.task('ESCROW_SETTLEMENT_INTERVAL', 3600)
+def settle_escrows():
+    """Job: release every held escrow whose ``release_at`` has passed; returns how many were released."""
+    now = datetime.utcnow()
+    batch_size = current_app.config.get('ESCROW_SETTLEMENT_BATCH_SIZE', 500)
+    due = select(EscrowTransaction.id).where(
+        EscrowTransaction.status == 'held', EscrowTransaction.release_at <= now
+    ).order_by(EscrowTransaction.release_at).limit(batch_size)
+    total = 0
+    while True:
+        ids = db.session.scalars(due).all()
+        if not ids:
+            return total
+        total += release(ids)
+        db.session.commit()
@@ -0,0 +1,90 @@
+"""In-process background job queue.
+
+Jobs are plain module-level functions that take simple arguments (ids, paths).
+They run on daemon worker threads inside a fresh application context, so they
+can use ``db.session`` exactly like a request handler does. Workers are started
+lazily on the first ``enqueue`` so nothing is spawned at import time.
+
+Set ``JOB_QUEUE_EAGER = True`` (as the tests do) to run jobs inline instead.
+"""
+import logging
+import queue
+import threading
+
+from flask import current_app
+
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    def __init__(self, app=None):
+        self._queue = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JOB_QUEUE_WORKERS', 2)
+        app.config.setdefault('JOB_QUEUE_EAGER', False)
+        app.extensions['job_queue'] = self
+
+    def enqueue(self, func, *args, delay=0, **kwargs):
+        """Schedule ``func(*args, **kwargs)`` to run in the background."""
+        app = current_app._get_current_object()
+        if app.config.get('JOB_QUEUE_EAGER'):
+            self._run(app, func, args, kwargs)
+            return
+
+        self._ensure_workers(app)
+        job = (app, func, args, kwargs)
+        if delay:
+            timer = threading.Timer(delay, self._put, args=(job,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._put(job)
+
+    def _put(self, job):
+        self._queue.put(job)
+        metrics.JOB_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def pending(self):
+        """Approximate number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def _ensure_workers(self, app):
+        with self._lock:
+            self._workers = [w for w in self._workers if w.is_alive()]
+            missing = app.config.get('JOB_QUEUE_WORKERS', 2) - len(self._workers)
+            for _ in range(max(missing, 0)):
+                worker = threading.Thread(target=self._work, name='sdc-job-worker', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _work(self):
+        while True:
+            app, func, args, kwargs = self._queue.get()
+            metrics.JOB_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                self._run(app, func, args, kwargs)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, app, func, args, kwargs):
+        name = getattr(func, '__name__', str(func))
+        with app.app_context():
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                metrics.JOBS.labels(name, 'failed').inc()
+                logger.exception('Background job %s failed', name)
+                from ..models import db
+                db.session.rollback()
+            else:
+                metrics.JOBS.labels(name, 'succeeded').inc()
+
+
+jobs = JobQueue()
@@ -0,0 +1,81 @@
+"""Helpers for partial KYC form updates."""
+
+
+def merge_patch(target, patch):
+    """Apply a JSON merge patch (RFC 7396) to ``target`` and return the result.
+
+    Nested objects are merged key by key, ``None`` removes a key, and any other
+    value replaces what was there. ``target`` is not modified.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+# Wizard sections per role, mirroring the steps of the mobile KYC screens
+KYC_SECTIONS = {
+    'surrogate': ('personal', 'medical', 'identification', 'referral', 'emergency'),
+    'donor': ('personal', 'medical', 'reproductive', 'identification', 'referral', 'emergency'),
+    'intending_parent': ('personal', 'marital', 'medical', 'financial', 'identification', 'referral', 'emergency'),
+}
+
+# Flat keys that count towards a section. DonorKycWizard.jsx keeps every field at
+# the top level of form_data instead of nesting it under the section name.
+FLAT_SECTION_FIELDS = {
+    'donor': {
+        'personal': ('first_name', 'last_name', 'dob', 'phone', 'nationality'),
+        'medical': ('blood_group', 'genotype', 'height', 'weight', 'eye_color'),
+        'reproductive': ('donated_before', 'num_donations', 'conditions'),
+        'identification': ('id_type', 'id_number'),
+        'referral': ('referral',),
+        'emergency': ('emergency_name', 'emergency_phone'),
+    },
+}
+
+ROLE_ALIASES = {'ip': 'intending_parent'}
+
+
+def _is_filled(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, dict):
+        return any(_is_filled(v) for v in value.values())
+    return value is not None and str(value).strip() != ''
+
+
+def compute_form_progress(role, form_data):
+    """Percentage of wizard sections with at least one filled field, or None for unknown roles.
+
+    A section counts whether its fields are nested under the section name or,
+    for roles in ``FLAT_SECTION_FIELDS``, kept at the top level.
+    """
+    role = (role or '').lower()
+    role = ROLE_ALIASES.get(role, role)
+    sections = KYC_SECTIONS.get(role)
+    if not sections or not isinstance(form_data, dict):
+        return None
+    flat = FLAT_SECTION_FIELDS.get(role, {})
+    completed = sum(1 for section in sections
+                    if _is_filled(form_data.get(section))
+                    or any(_is_filled(form_data.get(key)) for key in flat.get(section, ())))
+    return round(completed * 100 / len(sections))
+
+
+def extract_name_fields(form_data):
+    """Pull first/last name out of a (possibly partial) form, flat or under ``personal``."""
+    if not isinstance(form_data, dict):
+        return {}
+    names = {}
+    personal = form_data.get('personal') if isinstance(form_data.get('personal'), dict) else {}
+    for field, keys in (('first_name', ('first_name',)), ('last_name', ('last_name', 'surname'))):
+        for source in (form_data, personal):
+            for key in keys:
+                if source.get(key):
+                    names.setdefault(field, source[key])
+    return names
@@ -0,0 +1,25 @@
+"""Outgoing email.
+
+Flask-Mail is imported and bound to the app on the first send, so processes
+that never send mail (workers between resets, the CLI, migrations) skip it.
+"""
+from flask import current_app
+
+from .. import metrics
+
+
+def _mail_state(app):
+    state = app.extensions.get('mail')
+    if state is None:
+        from flask_mail import Mail
+        state = Mail().init_app(app)
+    return state
+
+
+def send_mail(subject, recipients, body):
+    """Send a plain-text email with the app's MAIL_* settings; raises on SMTP errors."""
+    from flask_mail import Message
+
+    state = _mail_state(current_app._get_current_object())
+    with metrics.track('mail'):
+        state.send(Message(subject, recipients=recipients, body=body))
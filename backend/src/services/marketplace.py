@@ -0,0 +1,108 @@
+"""Paid marketplace profile unlocks.
+
+``unlock_listing`` does the whole purchase in one transaction:
+
+1. ``INSERT ... ON CONFLICT DO NOTHING`` of the unlock, against the unique
+   (user_id, listing_id) and (user_id, idempotency_key) indexes. Of several
+   concurrent taps on one listing exactly one row goes in; the others see no
+   row inserted and return the existing unlock. Because it is the first
+   statement, it also takes SQLite's write lock before anything is read.
+2. On PostgreSQL the buyer's ``users`` row is locked, so unlocks of different
+   listings by the same user check the balance one at a time.
+3. The balance is summed and, if it covers ``MARKETPLACE_UNLOCK_PRICE``, the
+   wallet is debited and the payment held in an ``EscrowTransaction``. Both
+   carry the reference ``unlock:<unlock id>``. Otherwise everything is rolled
+   back.
+
+The unlock records the 'unlock' ``CommissionSetting`` in force at that moment.
+The escrow is released by the settlement job ESCROW_HOLD_DAYS later (see
+``escrow``), which books the whole fee as platform revenue, unless it is
+refunded first; a refund also deletes the unlock.
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import select
+
+from ..database import insert_ignoring_conflicts
+from ..models import db, User, MarketplaceUnlock, WalletTransaction, EscrowTransaction, CommissionSetting
+from . import escrow, wallet
+
+CENTS = Decimal('0.01')
+
+
+class UnlockError(Exception):
+    status_code = 400
+
+
+class InsufficientFunds(UnlockError):
+    status_code = 402
+
+    def __init__(self, balance, price):
+        super().__init__('Insufficient wallet balance')
+        self.balance = balance
+        self.price = price
+
+
+class IdempotencyKeyReused(UnlockError):
+    status_code = 422
+
+    def __init__(self):
+        super().__init__('Idempotency-Key was already used for another listing')
+
+
+def unlock_price():
+    return Decimal(str(current_app.config.get('MARKETPLACE_UNLOCK_PRICE', 5000))).quantize(CENTS)
+
+
+def commission_for(category, amount):
+    percent = db.session.query(CommissionSetting.percent).filter_by(category=category).scalar()
+    return (amount * Decimal(str(percent or 0)) / 100).quantize(CENTS)
+
+
+def serialize_unlock(unlock):
+    return {
+        "id": unlock.id,
+        "listing_id": unlock.listing_id,
+        "amount": float(unlock.amount) if unlock.amount is not None else None,
+        "commission": float(unlock.commission) if unlock.commission is not None else None,
+        "created_at": unlock.created_at.isoformat() if unlock.created_at else None
+    }
+
+
+def unlock_listing(user_id, listing_id, idempotency_key=None):
+    """Unlock ``listing_id`` for ``user_id`` and pay for it; returns ``(unlock, created)``.
+
+    Raises ``InsufficientFunds`` or ``IdempotencyKeyReused``, with nothing written.
+    """
+    user_id, unlock_id, price = str(user_id), str(uuid.uuid4()), unlock_price()
+    result = db.session.execute(insert_ignoring_conflicts(MarketplaceUnlock.__table__, db.engine).values(
+        id=unlock_id, user_id=user_id, listing_id=listing_id, amount=price,
+        idempotency_key=idempotency_key, created_at=datetime.utcnow()
+    ))
+    if result.rowcount == 0:
+        existing = MarketplaceUnlock.query.filter_by(user_id=user_id, listing_id=listing_id).first()
+        db.session.rollback()
+        if existing is None:
+            raise IdempotencyKeyReused()
+        return existing, False
+
+    db.session.execute(select(User.id).where(User.id == user_id).with_for_update())
+    available = wallet.balance(user_id)
+    if available < price:
+        db.session.rollback()
+        raise InsufficientFunds(available, price)
+
+    unlock = db.session.get(MarketplaceUnlock, unlock_id)
+    unlock.commission = commission_for('unlock', price)
+    if price:
+        reference = f'unlock:{unlock_id}'
+        db.session.add(WalletTransaction(user_id=user_id, amount=price, type='unlock',
+                                         status='completed', reference=reference))
+        db.session.add(EscrowTransaction(user_id=user_id, amount=price, type='marketplace_unlock',
+                                         status='held', reference=reference,
+                                         release_at=escrow.hold_until(datetime.utcnow())))
+    db.session.commit()
+    return unlock, True
@@ -0,0 +1,104 @@
+"""Video post-processing for uploaded chat attachments.
+
+Uploaded ``mp4``/``mov`` files are stored as-is so the upload request returns
+immediately; a background job then transcodes them to a bandwidth-friendly
+H.264/AAC MP4, grabs a poster frame, and repoints any messages that already
+reference the raw upload.
+"""
+import os
+import shutil
+import subprocess
+
+from flask import current_app
+
+from ..models import db, MediaAsset, Message
+
+VIDEO_EXTENSIONS = {'mp4', 'mov'}
+
+
+def is_video(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in VIDEO_EXTENSIONS
+
+
+def transcoding_available():
+    return shutil.which(current_app.config.get('FFMPEG_BINARY', 'ffmpeg')) is not None
+
+
+def transcode_command(src_path, dest_path):
+    max_height = current_app.config.get('VIDEO_MAX_HEIGHT', 720)
+    return [
+        current_app.config.get('FFMPEG_BINARY', 'ffmpeg'), '-y', '-i', src_path,
+        # Main profile plays on every Android/iOS hardware decoder we target
+        '-c:v', 'libx264', '-profile:v', 'main', '-preset', 'veryfast',
+        '-crf', str(current_app.config.get('VIDEO_CRF', 28)),
+        '-vf', f"scale=-2:'min({max_height},ih)'", '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-b:a', '96k',
+        '-movflags', '+faststart',
+        dest_path,
+    ]
+
+
+def poster_command(src_path, dest_path):
+    return [
+        current_app.config.get('FFMPEG_BINARY', 'ffmpeg'), '-y', '-ss', '1', '-i', src_path,
+        '-frames:v', '1', '-vf', 'scale=640:-2', dest_path,
+    ]
+
+
+def _run_ffmpeg(command):
+    subprocess.run(
+        command,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        timeout=current_app.config.get('VIDEO_TRANSCODE_TIMEOUT', 600),
+    )
+
+
+def _sibling(path_or_url, suffix):
+    stem = path_or_url.rsplit('.', 1)[0]
+    return f"{stem}{suffix}"
+
+
+def process_video(asset_id, file_path):
+    """Background job: transcode ``file_path`` and publish the results on ``asset_id``."""
+    asset = MediaAsset.query.get(asset_id)
+    if not asset:
+        return
+
+    video_path = _sibling(file_path, '_h264.mp4')
+    poster_path = _sibling(file_path, '_poster.jpg')
+    try:
+        _run_ffmpeg(transcode_command(file_path, video_path))
+        _run_ffmpeg(poster_command(video_path, poster_path))
+    except (subprocess.SubprocessError, OSError) as e:
+        stderr = getattr(e, 'stderr', None)
+        asset.status = 'failed'
+        asset.error = stderr.decode(errors='replace')[-2000:] if stderr else str(e)
+        db.session.commit()
+        return
+
+    asset.url = _sibling(asset.original_url, '_h264.mp4')
+    asset.poster_url = _sibling(asset.original_url, '_poster.jpg') if os.path.exists(poster_path) else None
+    asset.status = 'ready'
+
+    # Messages sent while we were transcoding still point at the raw upload
+    Message.query.filter_by(attachment_url=asset.original_url).update({
+        'attachment_url': asset.url,
+        'attachment_type': 'video',
+        'attachment_thumbnail_url': asset.poster_url,
+    }, synchronize_session=False)
+    db.session.commit()
+
+    if current_app.config.get('VIDEO_DELETE_ORIGINAL', False):
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
+def resolve_attachment(attachment_url):
+    """Return the processed asset for a raw upload URL, if it is ready."""
+    if not attachment_url:
+        return None
+    return MediaAsset.query.filter_by(original_url=attachment_url, status='ready').first()
@@ -0,0 +1,169 @@
+"""Creating notifications and pushing them to connected clients.
+
+``create_notification`` / ``create_notifications`` add rows to the current
+session; nothing is sent until that transaction commits, so a rolled-back
+request never pushes a notification that does not exist. Each one is then
+emitted as a ``notification`` event to the ``user:<id>`` Socket.IO room, which
+every authenticated socket of that user joins on connect (see sockets.py), and
+sent to the user's phones through the push service (see push.py).
+
+``compact_notifications`` is the retention job. It moves read notifications
+older than NOTIFICATION_RETENTION_DAYS into ``notifications_archive`` (or
+deletes them) in bounded batches, which keeps the hot table and its indexes
+small.
+
+Processes without a Socket.IO server (the CLI, job runners) emit through the
+message queue when SOCKETIO_MESSAGE_QUEUE is set, and skip the push otherwise;
+the app still sees the row on its next fetch.
+"""
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+from ..models import db, Notification, NotificationArchive
+from ..utils.pagination import encode_cursor
+from .push import queue_push
+
+logger = logging.getLogger(__name__)
+
+
+def user_room(user_id):
+    return f'user:{user_id}'
+
+
+def serialize_notification(notification):
+    return {
+        "id": notification.id,
+        "user_id": notification.user_id,
+        "title": notification.title,
+        "body": notification.body,
+        "severity": notification.severity,
+        "status": notification.status,
+        "created_at": notification.created_at.isoformat() if notification.created_at else None,
+        # PUT /api/notifications/read {"before": cursor} marks this one and everything older
+        "cursor": encode_cursor(notification.created_at, notification.id) if notification.created_at else None
+    }
+
+
+def _new_row(user_id, title, body, severity, created_at):
+    return {
+        'id': str(uuid.uuid4()),
+        'user_id': str(user_id),
+        'title': title,
+        'body': body,
+        'severity': severity,
+        'status': 'unread',
+        'created_at': created_at,
+    }
+
+
+def _queue_push(session, payloads):
+    session.info.setdefault('pending_notifications', []).extend(payloads)
+
+
+def create_notification(user_id, title, body, severity='info'):
+    """Add a notification to the session; it is pushed once the caller commits."""
+    notification = Notification(**_new_row(user_id, title, body, severity, datetime.utcnow()))
+    db.session.add(notification)
+    _queue_push(db.session, [serialize_notification(notification)])
+    return notification
+
+
+def create_notifications(user_ids, title, body, severity='info'):
+    """Insert the same notification for many users with one executemany INSERT."""
+    now = datetime.utcnow()
+    rows = [_new_row(user_id, title, body, severity, now) for user_id in dict.fromkeys(user_ids)]
+    if rows:
+        db.session.execute(insert(Notification), rows)
+        _queue_push(db.session, [serialize_notification(Notification(**row)) for row in rows])
+    return len(rows)
+
+
+def _emitter(app):
+    socketio = app.extensions.get('socketio')
+    if socketio is None and app.config.get('SOCKETIO_MESSAGE_QUEUE'):
+        socketio = app.extensions.get('socketio_emitter')
+        if socketio is None:
+            # Write-only: publishes to the queue for the web workers to deliver
+            from flask_socketio import SocketIO
+            socketio = app.extensions['socketio_emitter'] = SocketIO(
+                message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'])
+    return socketio
+
+
+def push(payloads):
+    """Emit serialized notifications to their users' rooms; failures are logged, not raised."""
+    socketio = _emitter(current_app)
+    if socketio is None:
+        return
+    for payload in payloads:
+        try:
+            socketio.emit('notification', payload, to=user_room(payload['user_id']))
+        except Exception:
+            logger.warning('Could not push notification %s', payload['id'], exc_info=True)
+
+
+def compact_notifications(retention_days=None, batch_size=None, archive=None):
+    """Archive or delete read notifications older than the retention window.
+
+    Each batch of at most ``batch_size`` rows (oldest first) is copied and
+    deleted in its own short transaction, so locks are held only briefly.
+    Returns the number of notifications removed from ``notifications``.
+    """
+    config = current_app.config
+    retention_days = config.get('NOTIFICATION_RETENTION_DAYS', 90) if retention_days is None else retention_days
+    batch_size = batch_size or config.get('NOTIFICATION_COMPACTION_BATCH_SIZE', 1000)
+    archive = config.get('NOTIFICATION_ARCHIVE', True) if archive is None else archive
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+
+    # Literal status so the oldest rows come straight off ix_notifications_read_created_at
+    oldest = select(Notification.id).where(text(Notification.READ), Notification.created_at < cutoff) \
+        .order_by(Notification.created_at).limit(batch_size)
+    columns = ['id', 'user_id', 'title', 'body', 'severity', 'status', 'created_at']
+
+    removed = 0
+    while True:
+        ids = db.session.execute(oldest).scalars().all()
+        if not ids:
+            break
+        if archive:
+            db.session.execute(insert(NotificationArchive).from_select(
+                columns + ['archived_at'],
+                select(*(getattr(Notification, c) for c in columns), literal(datetime.utcnow()))
+                .where(Notification.id.in_(ids))
+            ))
+        db.session.execute(delete(Notification).where(Notification.id.in_(ids)))
+        db.session.commit()
+        removed += len(ids)
+        # Let request handlers run between batches (a no-op unless monkey-patched)
+        time.sleep(0)
+
+    logger.info('Compacted %s read notifications older than %s days', removed, retention_days)
+    return removed
+
+
+def push_to_devices(payloads):
+    """Queue mobile pushes for serialized notifications, one job per distinct message."""
+    recipients = {}
+    for payload in payloads:
+        recipients.setdefault((payload['title'], payload['body']), []).append(payload['user_id'])
+    for (title, body), user_ids in recipients.items():
+        queue_push(user_ids, title, body, {'type': 'notification'})
+
+
+@event.listens_for(Session, 'after_commit')
+def _push_committed_notifications(session):
+    payloads = session.info.pop('pending_notifications', None)
+    if payloads and has_app_context():
+        push(payloads)
+        push_to_devices(payloads)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_notifications(session):
+    session.info.pop('pending_notifications', None)
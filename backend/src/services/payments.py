@@ -0,0 +1,240 @@
+"""Paystack payment events.
+
+Paystack reports payments to ``POST /api/payments/paystack/webhook``. Once the
+``X-Paystack-Signature`` HMAC checks out, ``receive_event`` stores the raw body
+as a ``PaymentEvent`` and queues ``process_payment_event``, so the webhook is
+acknowledged straight away. A redelivery of an event (same event type and
+reference) hits the unique index, is acknowledged, and is neither stored nor
+processed again.
+
+Processing applies an event to the rows carrying its reference:
+
+* ``charge.success`` completes a pending ``WalletTransaction``, funds a pending
+  ``EscrowTransaction`` (status ``held``) and activates the ``Subscription``
+  bought with it. Subscriptions and wallet top-ups paid straight from the app
+  are created from the checkout ``metadata`` (``purpose``, ``user_id`` and
+  ``plan``).
+* ``refund.processed`` marks those rows refunded or cancelled.
+
+The plan a subscription payment buys comes from client-side checkout metadata,
+so the amount and currency paid are checked against ``subscriptions.PRICES``.
+A payment for less, or in another currency, raises ``PaymentRejected``. Nothing
+is applied, and the event is marked ignored with the reason in ``error``.
+
+Every change is a conditional UPDATE, or an INSERT ... ON CONFLICT DO NOTHING
+on a unique reference. Processing an event twice, or two events for one
+reference at the same time, gives the same result as processing it once. A
+failed run is rolled back and retried with exponential backoff, up to
+PAYMENT_EVENT_MAX_ATTEMPTS, then the event is marked failed. ``flask sdc
+process-payment-events`` picks up events whose job was lost in a restart.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import func, select, update
+
+from .. import metrics
+from ..database import insert_ignoring_conflicts
+from ..models import db, PaymentEvent, WalletTransaction, EscrowTransaction, Subscription
+from .jobs import jobs
+from .notifications import create_notification
+from . import escrow, subscriptions
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Paystack-Signature'
+MAX_BACKOFF = 300
+
+
+class PaymentRejected(Exception):
+    """The event is genuine but must not be applied (e.g. it underpays the plan)."""
+
+
+def verify_signature(body, signature):
+    """Paystack signs the raw body with HMAC-SHA512 keyed by the secret key."""
+    secret = current_app.config.get('PAYSTACK_SECRET_KEY')
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def _reference(event, data):
+    reference = data.get('transaction_reference') if event.startswith('refund.') else data.get('reference')
+    return str(reference)[:255] if reference else None
+
+
+def receive_event(body):
+    """Store a verified webhook body and queue it; returns the event id, or None for a redelivery.
+
+    Raises ``ValueError`` if the body is not a Paystack event.
+    """
+    payload = json.loads(body)
+    if not isinstance(payload, dict) or not isinstance(payload.get('event'), str):
+        raise ValueError('Not a Paystack event')
+    data = payload.get('data') if isinstance(payload.get('data'), dict) else {}
+
+    event_id = str(uuid.uuid4())
+    result = db.session.execute(insert_ignoring_conflicts(PaymentEvent.__table__, db.engine).values(
+        id=event_id, provider='paystack', event=payload['event'][:100], reference=_reference(payload['event'], data),
+        payload=body.decode('utf-8'), status='pending', attempts=0, received_at=datetime.utcnow()
+    ))
+    db.session.commit()
+    if result.rowcount == 0:
+        metrics.PAYMENT_EVENTS.labels(payload['event'][:100], 'duplicate').inc()
+        return None
+    jobs.enqueue(process_payment_event, event_id)
+    return event_id
+
+
+def _metadata(data):
+    metadata = data.get('metadata')
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            return {}
+    # Paystack sends 0 or "" when the checkout had no metadata
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def _check_subscription_price(plan, amount, currency):
+    price = subscriptions.PRICES.get(plan)
+    if price is None:
+        return
+    if currency != subscriptions.CURRENCY or amount < price:
+        raise PaymentRejected(f'{currency} {amount} paid for the {plan} plan, which costs '
+                              f'{subscriptions.CURRENCY} {price}')
+
+
+def _activate_subscription(reference, user_id, plan, amount, now):
+    period = subscriptions.PERIODS.get(plan)
+    if period is None or not user_id:
+        logger.warning('Subscription payment %s has no user or an unknown plan %r', reference, plan)
+        return
+    # A renewal paid before the current period ends starts when that period ends
+    current_end = db.session.query(func.max(Subscription.expires_at)) \
+        .filter(Subscription.user_id == user_id, Subscription.status == 'active').scalar()
+    expires_at = max(now, current_end or now) + period
+
+    result = db.session.execute(insert_ignoring_conflicts(Subscription.__table__, db.engine).values(
+        id=str(uuid.uuid4()), user_id=user_id, plan=plan, amount=amount, status='active',
+        reference=reference, created_at=now, expires_at=expires_at
+    ))
+    if result.rowcount == 0:
+        result = db.session.execute(update(Subscription).where(
+            Subscription.reference == reference, Subscription.status == 'pending'
+        ).values(status='active', expires_at=expires_at))
+    if result.rowcount:
+        subscriptions.changed([user_id])
+        create_notification(user_id, 'Subscription active',
+                            f'Your {plan} plan is active until {expires_at:%d %b %Y}.')
+
+
+def _charge_success(data):
+    reference = data['reference']
+    amount = (Decimal(str(data['amount'])) / 100).quantize(Decimal('0.01'))
+    metadata = _metadata(data)
+    user_id = str(metadata['user_id']) if metadata.get('user_id') else None
+    now = datetime.utcnow()
+    purpose = metadata.get('purpose')
+    if purpose == 'agency_subscription':
+        _check_subscription_price(metadata.get('plan'), amount, data.get('currency') or 'NGN')
+
+    # Rows created before checkout that were waiting on this payment
+    db.session.execute(update(WalletTransaction).where(
+        WalletTransaction.reference == reference, WalletTransaction.status == 'pending'
+    ).values(status='completed'))
+    db.session.execute(update(EscrowTransaction).where(
+        EscrowTransaction.reference == reference, EscrowTransaction.status.in_(escrow.TRANSITIONS['held'])
+    ).values(status='held'))
+
+    if purpose == 'agency_subscription':
+        _activate_subscription(reference, user_id, metadata.get('plan'), amount, now)
+    elif purpose == 'wallet_topup' and user_id:
+        result = db.session.execute(insert_ignoring_conflicts(WalletTransaction.__table__, db.engine).values(
+            id=str(uuid.uuid4()), user_id=user_id, amount=amount, currency=data.get('currency') or 'NGN',
+            type='payment', status='completed', reference=reference, created_at=now
+        ))
+        if result.rowcount:
+            create_notification(user_id, 'Wallet funded', f'₦{amount:,.2f} was added to your wallet.')
+
+
+def _refund_processed(data):
+    reference = data['transaction_reference']
+    db.session.execute(update(WalletTransaction).where(
+        WalletTransaction.reference == reference, WalletTransaction.status.in_(['pending', 'completed'])
+    ).values(status='refunded'))
+    db.session.execute(update(EscrowTransaction).where(
+        EscrowTransaction.reference == reference, EscrowTransaction.status.in_(escrow.TRANSITIONS['refunded'])
+    ).values(status='refunded'))
+    subscriptions.changed(db.session.scalars(select(Subscription.user_id).where(Subscription.reference == reference)))
+    db.session.execute(update(Subscription).where(
+        Subscription.reference == reference, Subscription.status.in_(['pending', 'active'])
+    ).values(status='cancelled'))
+
+
+HANDLERS = {
+    'charge.success': _charge_success,
+    'refund.processed': _refund_processed,
+}
+
+
+def process_payment_event(event_id, attempt=1):
+    """Job: apply one stored event, retrying with backoff if it fails."""
+    event = db.session.get(PaymentEvent, event_id)
+    if event is None or event.status in ('processed', 'ignored'):
+        return
+    handler = HANDLERS.get(event.event)
+    try:
+        if handler is not None:
+            handler(json.loads(event.payload).get('data') or {})
+        event.status = 'processed' if handler is not None else 'ignored'
+        event.attempts = attempt
+        event.error = None
+        event.processed_at = datetime.utcnow()
+        db.session.commit()
+    except PaymentRejected as e:
+        db.session.rollback()
+        logger.warning('Payment event %s (%s) rejected: %s', event_id, event.event, e)
+        event = db.session.get(PaymentEvent, event_id)
+        event.status = 'ignored'
+        event.attempts = attempt
+        event.error = str(e)[:2000]
+        event.processed_at = datetime.utcnow()
+        db.session.commit()
+        metrics.PAYMENT_EVENTS.labels(event.event, 'rejected').inc()
+        return
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Payment event %s (%s) failed on attempt %s', event_id, event.event, attempt)
+        event = db.session.get(PaymentEvent, event_id)
+        event.attempts = attempt
+        event.error = f'{type(e).__name__}: {e}'[:2000]
+        retry = attempt < current_app.config.get('PAYMENT_EVENT_MAX_ATTEMPTS', 5)
+        if not retry:
+            event.status = 'failed'
+        db.session.commit()
+        metrics.PAYMENT_EVENTS.labels(event.event, 'retried' if retry else 'failed').inc()
+        if retry:
+            jobs.enqueue(process_payment_event, event_id, attempt=attempt + 1, delay=min(2 ** attempt, MAX_BACKOFF))
+        return
+    metrics.PAYMENT_EVENTS.labels(event.event, event.status).inc()
+
+
+def process_pending_events(older_than=300, retry_failed=False):
+    """Process events still pending ``older_than`` seconds after arrival; returns how many were run."""
+    statuses = ['pending', 'failed'] if retry_failed else ['pending']
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    events = db.session.query(PaymentEvent.id, PaymentEvent.status, PaymentEvent.attempts) \
+        .filter(PaymentEvent.status.in_(statuses), PaymentEvent.received_at <= cutoff) \
+        .order_by(PaymentEvent.received_at).all()
+    for event_id, status, attempts in events:
+        process_payment_event(event_id, attempt=1 if status == 'failed' else attempts + 1)
+    return len(events)
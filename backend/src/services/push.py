@@ -0,0 +1,165 @@
+"""Mobile push through the Expo push service.
+
+The app registers its Expo push token after sign-in (``DeviceToken``). Pushes
+are always sent from the job queue, never from a request:
+
+* ``queue_push`` enqueues ``deliver_push`` for a set of users and one message.
+* ``deliver_push`` looks the users' tokens up in chunked ``IN`` queries and
+  hands them to ``send_messages`` in chunks of ``SEND_CHUNK_SIZE``, the most
+  the push API accepts per request.
+* ``send_messages`` posts a single chunk. Network errors, 429s and 5xxs are
+  retried with exponential backoff, up to PUSH_MAX_ATTEMPTS. The tickets that
+  come back are checked ``PUSH_RECEIPT_DELAY`` seconds later by
+  ``check_receipts``.
+* A ``DeviceNotRegistered`` error, in a ticket or in a receipt, means the app
+  was uninstalled or the token rotated, and the token is deleted.
+
+EXPO_PUSH_URL and EXPO_RECEIPTS_URL can point at a local stand-in server, which
+is how the tests exercise the whole round trip.
+"""
+import json
+import logging
+import urllib.error
+import urllib.request
+
+from flask import current_app
+from sqlalchemy import delete
+
+from .. import metrics
+from ..models import db, DeviceToken
+from .jobs import jobs
+
+logger = logging.getLogger(__name__)
+
+SEND_CHUNK_SIZE = 100
+RECEIPT_CHUNK_SIZE = 1000
+QUERY_CHUNK_SIZE = 500
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+MAX_BACKOFF = 300
+REQUEST_TIMEOUT = 10
+
+
+def is_expo_token(token):
+    return isinstance(token, str) and token.startswith(('ExponentPushToken[', 'ExpoPushToken[')) \
+        and token.endswith(']') and len(token) <= 255
+
+
+def register_device(user_id, token, platform=None):
+    """Attach ``token`` to ``user_id``, moving it from whoever registered it before."""
+    device = DeviceToken.query.filter_by(token=token).first()
+    if device is None:
+        device = DeviceToken(token=token)
+        db.session.add(device)
+    device.user_id = str(user_id)
+    device.platform = platform
+    return device
+
+
+def queue_push(user_ids, title, body, data=None):
+    """Push one message to every registered device of ``user_ids`` from the job queue."""
+    if not current_app.config.get('PUSH_ENABLED') or not user_ids:
+        return
+    jobs.enqueue(deliver_push, list(dict.fromkeys(str(u) for u in user_ids)), title, body, data or {})
+
+
+def deliver_push(user_ids, title, body, data):
+    """Job: send the message to every token of ``user_ids``."""
+    tokens = []
+    for start in range(0, len(user_ids), QUERY_CHUNK_SIZE):
+        chunk = user_ids[start:start + QUERY_CHUNK_SIZE]
+        tokens.extend(t for t, in db.session.query(DeviceToken.token).filter(DeviceToken.user_id.in_(chunk)))
+
+    messages = [{'to': token, 'title': title, 'body': body, 'data': data, 'sound': 'default'} for token in tokens]
+    for start in range(0, len(messages), SEND_CHUNK_SIZE):
+        send_messages(messages[start:start + SEND_CHUNK_SIZE])
+
+
+def _post(url, payload):
+    headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+    if current_app.config.get('EXPO_ACCESS_TOKEN'):
+        headers['Authorization'] = f"Bearer {current_app.config['EXPO_ACCESS_TOKEN']}"
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), headers=headers, method='POST')
+    with metrics.track('expo_push'):
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            return json.loads(response.read())
+
+
+def _retry(func, payload, attempt, error, retry_after=None):
+    """Re-enqueue ``func(payload)`` with exponential backoff; returns False once attempts run out."""
+    if attempt >= current_app.config.get('PUSH_MAX_ATTEMPTS', 5):
+        logger.error('%s gave up after %s attempts: %s', func.__name__, attempt, error)
+        return False
+    delay = retry_after if retry_after is not None else min(2 ** attempt, MAX_BACKOFF)
+    logger.warning('%s failed (%s); retrying in %ss', func.__name__, error, delay)
+    jobs.enqueue(func, payload, attempt=attempt + 1, delay=delay)
+    return True
+
+
+def _call(func, url, payload, body, attempt):
+    """POST ``body``; on a retryable failure re-enqueue ``func(payload)`` and return None."""
+    try:
+        return _post(url, body)
+    except urllib.error.HTTPError as e:
+        if e.code not in RETRYABLE_STATUSES:
+            logger.error('%s rejected by the push service: HTTP %s %s', func.__name__, e.code, e.read()[:500])
+            return None
+        retry_after = e.headers.get('Retry-After')
+        _retry(func, payload, attempt, f'HTTP {e.code}',
+               int(retry_after) if retry_after and retry_after.isdigit() else None)
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        _retry(func, payload, attempt, e)
+    return None
+
+
+def _forget(tokens):
+    if tokens:
+        db.session.execute(delete(DeviceToken).where(DeviceToken.token.in_(tokens)))
+        db.session.commit()
+        metrics.PUSH_MESSAGES.labels('unregistered').inc(len(tokens))
+        logger.info('Removed %s unregistered push tokens', len(tokens))
+
+
+def send_messages(messages, attempt=1):
+    """Job: post one chunk of at most SEND_CHUNK_SIZE messages and queue their receipt check."""
+    response = _call(send_messages, current_app.config['EXPO_PUSH_URL'], messages, messages, attempt)
+    if response is None:
+        return
+    if response.get('errors'):
+        logger.error('Push request failed: %s', response['errors'])
+        metrics.PUSH_MESSAGES.labels('error').inc(len(messages))
+        return
+
+    pending, unregistered = {}, []
+    for message, ticket in zip(messages, response.get('data') or []):
+        if ticket.get('status') == 'ok':
+            pending[ticket['id']] = message['to']
+        elif (ticket.get('details') or {}).get('error') == 'DeviceNotRegistered':
+            unregistered.append(message['to'])
+        else:
+            metrics.PUSH_MESSAGES.labels('error').inc()
+            logger.warning('Push ticket error: %s', ticket.get('message'))
+    metrics.PUSH_MESSAGES.labels('sent').inc(len(pending))
+    _forget(unregistered)
+    if pending:
+        jobs.enqueue(check_receipts, pending, delay=current_app.config.get('PUSH_RECEIPT_DELAY', 900))
+
+
+def check_receipts(tickets, attempt=1):
+    """Job: fetch receipts for ``{ticket_id: token}`` and drop tokens the service no longer knows."""
+    ids = list(tickets)
+    for start in range(0, len(ids), RECEIPT_CHUNK_SIZE):
+        chunk = {ticket_id: tickets[ticket_id] for ticket_id in ids[start:start + RECEIPT_CHUNK_SIZE]}
+        response = _call(check_receipts, current_app.config['EXPO_RECEIPTS_URL'], chunk, {'ids': list(chunk)}, attempt)
+        if response is None:
+            continue
+
+        unregistered = []
+        for ticket_id, receipt in (response.get('data') or {}).items():
+            if receipt.get('status') == 'ok':
+                metrics.PUSH_MESSAGES.labels('delivered').inc()
+            elif (receipt.get('details') or {}).get('error') == 'DeviceNotRegistered':
+                unregistered.append(chunk.get(ticket_id))
+            else:
+                metrics.PUSH_MESSAGES.labels('error').inc()
+                logger.warning('Push receipt error: %s', receipt.get('message'))
+        _forget([t for t in unregistered if t])
@@ -0,0 +1,84 @@
+"""Periodic jobs run inside the backend.
+
+Tasks register with ``@scheduler.task(INTERVAL_CONFIG_KEY, default_seconds)``.
+Each serving process starts one daemon ticker thread on its first request (never
+in the CLI or during a preload), and only when SCHEDULER_ENABLED is set. Every
+SCHEDULER_TICK seconds the ticker tries to claim each due task in
+``scheduled_tasks``, with a conditional UPDATE that moves ``next_run_at``
+forward. Only the process whose UPDATE matched enqueues the task on the job
+queue, so running several gunicorn workers (or hosts) still runs a task once per
+interval.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import update
+
+from ..database import insert_ignoring_conflicts
+from ..models import db, ScheduledTask
+from .jobs import jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    def __init__(self, app=None):
+        self._tasks = {}
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SCHEDULER_ENABLED', False)
+        app.config.setdefault('SCHEDULER_TICK', 30)
+        app.extensions['scheduler'] = self
+        if app.config['SCHEDULER_ENABLED']:
+            app.before_request(self._ensure_started)
+
+    def task(self, interval_key, default):
+        """Run the decorated job every ``app.config[interval_key]`` (or ``default``) seconds."""
+        def decorator(func):
+            self._tasks[func.__name__] = (func, interval_key, default)
+            return func
+        return decorator
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            app = current_app._get_current_object()
+            self._thread = threading.Thread(target=self._tick, args=(app,), name='sdc-scheduler', daemon=True)
+            self._thread.start()
+
+    def _tick(self, app):
+        while True:
+            try:
+                self.run_pending(app)
+            except Exception:
+                logger.exception('Scheduler tick failed')
+            time.sleep(app.config.get('SCHEDULER_TICK', 30))
+
+    def run_pending(self, app):
+        """Enqueue every due task this process manages to claim; returns their names."""
+        with app.app_context():
+            claimed = []
+            for name, (func, interval_key, default) in self._tasks.items():
+                if self._claim(name, app.config.get(interval_key, default)):
+                    claimed.append(name)
+                    jobs.enqueue(func)
+            return claimed
+
+    def _claim(self, name, interval):
+        table, now = ScheduledTask.__table__, datetime.utcnow()
+        with db.engine.begin() as connection:
+            connection.execute(insert_ignoring_conflicts(table, db.engine).values(name=name, next_run_at=now))
+            result = connection.execute(update(table).where(table.c.name == name, table.c.next_run_at <= now)
+                                        .values(next_run_at=now + timedelta(seconds=interval), last_run_at=now))
+        return result.rowcount == 1
+
+
+scheduler = Scheduler()
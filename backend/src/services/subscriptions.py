@@ -0,0 +1,197 @@
+"""Subscription lifecycle and each agency's effective plan.
+
+Paid renewals arrive through the Paystack webhook (see ``payments``). A renewal
+paid early starts when the current period ends. ``sweep_subscriptions`` runs on
+the scheduler every SUBSCRIPTION_SWEEP_INTERVAL seconds and works through the
+(status, expires_at) index, SUBSCRIPTION_BATCH_SIZE rows per transaction:
+
+* subscriptions ending within SUBSCRIPTION_RENEWAL_NOTICE_DAYS, with no renewal
+  after them, get one renewal reminder;
+* active subscriptions past ``expires_at`` become ``expired``, and users left
+  without any active plan are told so.
+
+``effective_subscription`` resolves an agency's plan with one query. It picks
+the active, unexpired subscription of the agency or of its owner that runs
+longest, otherwise the latest one. Results are cached per agency for
+SUBSCRIPTION_CACHE_TTL seconds. Entries are dropped when a transaction that
+changes a subscription of the agency or its owner commits; the TTL bounds
+staleness in other workers.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import and_, case, event, exists, update
+from sqlalchemy.orm import Session, aliased
+
+from ..models import db, Agency, Subscription
+from .notifications import create_notification
+from .scheduler import scheduler
+
+PERIODS = {'monthly': timedelta(days=30), 'yearly': timedelta(days=365)}
+# What each plan costs; a payment for less does not activate it. PLAN_PRICES_NGN in
+# screens/AgencySubscription.jsx shows the same prices at checkout.
+PRICES = {'monthly': Decimal('20000'), 'yearly': Decimal('200000')}
+CURRENCY = 'NGN'
+
+
+class PlanCache:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, agency_id, ttl):
+        with self._lock:
+            entry = self._entries.get(agency_id)
+        if entry and time.monotonic() - entry[0] < ttl:
+            return entry
+        return None
+
+    def set(self, agency_id, user_ids, subscription):
+        with self._lock:
+            self._entries[agency_id] = (time.monotonic(), subscription, frozenset(user_ids))
+
+    def invalidate_users(self, user_ids):
+        user_ids = set(user_ids)
+        with self._lock:
+            for agency_id in [a for a, entry in self._entries.items() if entry[2] & user_ids]:
+                del self._entries[agency_id]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+plan_cache = PlanCache()
+
+
+def changed(user_ids, session=None):
+    """Drop the cached plans of ``user_ids`` once the current transaction commits."""
+    session = session or db.session()
+    session.info.setdefault('subscription_user_ids', set()).update(u for u in user_ids if u)
+
+
+def _effective_status(subscription):
+    if subscription['status'] == 'active' and subscription['expires_at'] and subscription['expires_at'] <= datetime.utcnow():
+        return 'expired'
+    return subscription['status']
+
+
+def serialize_subscription(subscription):
+    return {
+        "id": subscription['id'],
+        "plan": subscription['plan'],
+        "status": _effective_status(subscription),
+        "expires_at": subscription['expires_at'].isoformat() if subscription['expires_at'] else None
+    }
+
+
+def effective_subscription(agency_id):
+    """Return ``(found, subscription)`` for an agency; ``subscription`` is a dict or None."""
+    ttl = current_app.config.get('SUBSCRIPTION_CACHE_TTL', 60)
+    cached = plan_cache.get(agency_id, ttl) if ttl else None
+    if cached:
+        return True, cached[1]
+
+    now = datetime.utcnow()
+    current = case((and_(Subscription.status == 'active', Subscription.expires_at > now), 0), else_=1)
+    row = db.session.query(
+        Agency.id, Agency.owner_id, Subscription.id, Subscription.plan, Subscription.status, Subscription.expires_at
+    ).outerjoin(Subscription, Subscription.user_id.in_([Agency.id, Agency.owner_id])) \
+        .filter(Agency.id == agency_id) \
+        .order_by(current, Subscription.expires_at.desc().nulls_last(), Subscription.created_at.desc()) \
+        .first()
+    if row is None:
+        return False, None
+
+    subscription = None
+    if row[2] is not None:
+        subscription = {'id': row[2], 'plan': row[3], 'status': row[4], 'expires_at': row[5]}
+    if ttl:
+        plan_cache.set(agency_id, {row[0], row[1]} - {None}, subscription)
+    return True, subscription
+
+
+def _batch_size():
+    return current_app.config.get('SUBSCRIPTION_BATCH_SIZE', 500)
+
+
+def remind_expiring():
+    """Send one renewal reminder per subscription about to end; returns how many were sent."""
+    now = datetime.utcnow()
+    notice = now + timedelta(days=current_app.config.get('SUBSCRIPTION_RENEWAL_NOTICE_DAYS', 3))
+    later = aliased(Subscription)
+    renewed = exists().where(later.user_id == Subscription.user_id, later.status == 'active',
+                             later.expires_at > Subscription.expires_at)
+    total = 0
+    while True:
+        rows = db.session.query(Subscription.id, Subscription.user_id, Subscription.plan, Subscription.expires_at) \
+            .filter(Subscription.status == 'active', Subscription.expires_at > now, Subscription.expires_at <= notice,
+                    Subscription.reminded_at.is_(None), ~renewed) \
+            .order_by(Subscription.expires_at).limit(_batch_size()).all()
+        if not rows:
+            return total
+        db.session.execute(update(Subscription).where(Subscription.id.in_([r.id for r in rows]))
+                           .values(reminded_at=now))
+        for row in rows:
+            if row.user_id:
+                create_notification(row.user_id, 'Subscription ending soon',
+                                    f'Your {row.plan} plan ends on {row.expires_at:%d %b %Y}. Renew to keep access.',
+                                    severity='warning')
+        db.session.commit()
+        total += len(rows)
+
+
+def expire_lapsed():
+    """Mark active subscriptions past their end as expired; returns how many were expired."""
+    now = datetime.utcnow()
+    total = 0
+    while True:
+        rows = db.session.query(Subscription.id, Subscription.user_id, Subscription.plan) \
+            .filter(Subscription.status == 'active', Subscription.expires_at <= now) \
+            .order_by(Subscription.expires_at).limit(_batch_size()).all()
+        if not rows:
+            return total
+        db.session.execute(update(Subscription).where(Subscription.id.in_([r.id for r in rows]),
+                                                      Subscription.status == 'active').values(status='expired'))
+        user_ids = {r.user_id for r in rows if r.user_id}
+        # Users who renewed in advance still have a plan and need no notice
+        covered = {u for u, in db.session.query(Subscription.user_id).filter(
+            Subscription.user_id.in_(user_ids), Subscription.status == 'active', Subscription.expires_at > now)}
+        for row in rows:
+            if row.user_id and row.user_id not in covered:
+                create_notification(row.user_id, 'Subscription expired',
+                                    f'Your {row.plan} plan has expired. Renew to restore access.', severity='warning')
+                covered.add(row.user_id)
+        changed(user_ids)
+        db.session.commit()
+        total += len(rows)
+
+
+@scheduler.task('SUBSCRIPTION_SWEEP_INTERVAL', 300)
+def sweep_subscriptions():
+    """Job: send renewal reminders, then expire lapsed subscriptions; returns both counts."""
+    return remind_expiring(), expire_lapsed()
+
+
+@event.listens_for(Subscription, 'after_insert')
+@event.listens_for(Subscription, 'after_update')
+@event.listens_for(Subscription, 'after_delete')
+def _subscription_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        changed([target.user_id], session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_plans(session):
+    user_ids = session.info.pop('subscription_user_ids', None)
+    if user_ids:
+        plan_cache.invalidate_users(user_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_plans(session):
+    session.info.pop('subscription_user_ids', None)
@@ -0,0 +1,23 @@
+"""Wallet balances.
+
+A user's balance is not stored anywhere; it is the sum of their completed
+``WalletTransaction`` rows, credits positive and every other type negative.
+It is summed in SQL over the (user_id, status) index rather than by loading
+the rows.
+"""
+from decimal import Decimal
+
+from sqlalchemy import case, func
+
+from ..models import db, WalletTransaction
+
+CREDIT_TYPES = ('credit', 'referral_bonus', 'payment', 'escrow_release')
+
+
+def balance(user_id):
+    signed = case((WalletTransaction.type.in_(CREDIT_TYPES), WalletTransaction.amount),
+                  else_=-WalletTransaction.amount)
+    total = db.session.query(func.sum(signed)) \
+        .filter(WalletTransaction.user_id == str(user_id), WalletTransaction.status == 'completed') \
+        .scalar()
+    return Decimal(str(total or 0)).quantize(Decimal('0.01'))
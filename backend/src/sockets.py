@@ -0,0 +1,86 @@
+"""Socket.IO server and event handlers.
+
+``init_socketio`` is the only place that imports Flask-SocketIO (python-socketio
+and engine.io take a few hundred milliseconds to import). So the CLI,
+migrations and anything else that builds the app with ``socketio=False``
+never pay for it.
+
+A client that connects with its access token (``auth={'token': ...}``, a
+``token`` query parameter or a Bearer header) joins its ``user:<id>`` room, where
+notifications are pushed. Connections without one still work for conversations.
+"""
+import logging
+
+from flask import request
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+
+from . import metrics
+from .services.notifications import user_room
+
+socket_logger = logging.getLogger('sdc.socketio')
+
+
+def _authenticated_user(auth):
+    """The user id of the connecting client's access token, or None."""
+    token = auth.get('token') if isinstance(auth, dict) else None
+    token = token or request.args.get('token')
+    if not token:
+        header = request.headers.get('Authorization', '')
+        token = header[7:] if header.startswith('Bearer ') else None
+    if not token:
+        return None
+    try:
+        claims = decode_token(token)
+    except (JWTExtendedException, PyJWTError):
+        socket_logger.info('Rejected socket token')
+        return None
+    return claims['sub'] if claims.get('type') == 'access' else None
+
+
+def init_socketio(app):
+    from flask_socketio import SocketIO, emit, join_room, leave_room
+
+    socketio = SocketIO(app, cors_allowed_origins="*", message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'))
+
+    @socketio.on('connect')
+    def handle_connect(auth=None):
+        socket_logger.info('Client connected')
+        metrics.socket_connected(request.sid)
+        user_id = _authenticated_user(auth)
+        if user_id:
+            room = user_room(user_id)
+            join_room(room)
+            metrics.socket_joined(request.sid, room)
+
+    @socketio.on('disconnect')
+    def handle_disconnect():
+        socket_logger.info('Client disconnected')
+        metrics.socket_disconnected(request.sid)
+
+    @socketio.on('join_conversation')
+    def handle_join_conversation(data):
+        conversation_id = data.get('conversation_id')
+        if conversation_id:
+            join_room(conversation_id)
+            metrics.socket_joined(request.sid, conversation_id)
+            emit('joined_conversation', {'conversation_id': conversation_id})
+
+    @socketio.on('leave_conversation')
+    def handle_leave_conversation(data):
+        conversation_id = data.get('conversation_id')
+        if conversation_id:
+            leave_room(conversation_id)
+            metrics.socket_left(request.sid, conversation_id)
+            emit('left_conversation', {'conversation_id': conversation_id})
+
+    @socketio.on('new_message')
+    def handle_new_message(data):
+        conversation_id = data.get('conversation_id')
+        message = data.get('message')
+        if conversation_id and message:
+            # Broadcast to all clients in the conversation room
+            emit('message_received', message, room=conversation_id)
+
+    return socketio
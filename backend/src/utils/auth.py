@@ -0,0 +1,18 @@
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..models import User
+
+
+def admin_required():
+    """Like ``jwt_required()`` but also rejects callers whose user is not an admin."""
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            user = User.query.get(get_jwt_identity())
+            if not user or (user.role or '').lower() != 'admin':
+                return jsonify({"msg": "Admin access required"}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
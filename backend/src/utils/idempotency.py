@@ -0,0 +1,154 @@
+"""``Idempotency-Key`` handling for mutating endpoints.
+
+A client that may retry a request (a flaky mobile network, a double tap) sends
+the same ``Idempotency-Key`` header with every attempt. ``@idempotent`` runs
+the view for the first attempt only and stores its response in
+``idempotency_keys``. Retries within IDEMPOTENCY_TTL get that response back
+with an ``Idempotent-Replayed: true`` header, and the view does not run again.
+
+The stored row doubles as the lock. It is claimed with ``INSERT ... ON
+CONFLICT DO NOTHING`` on a connection of its own, committed before the view
+runs, so a duplicate that arrives while the first attempt is still running
+sees the claim from any worker. It then polls until the response is stored, or
+answers 409 after IDEMPOTENCY_WAIT_SECONDS. Keys are scoped to the caller's user
+id. Reusing a key for a different method, path or body is a 422. Responses of
+5xx or an exception are not stored, so those can be retried with the same key.
+A claim left behind by a crashed worker is taken over once it is older than
+IDEMPOTENCY_LOCK_TIMEOUT seconds. Expired rows are removed by
+``flask sdc purge-idempotency-keys``.
+"""
+import hashlib
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import and_, delete, or_, select, update
+
+from .. import metrics
+from ..database import insert_ignoring_conflicts
+from ..models import db, IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+POLL_INTERVAL = 0.05
+
+
+def _scope():
+    try:
+        return str(get_jwt_identity() or '')
+    except RuntimeError:
+        # The view is not behind jwt_required (e.g. register)
+        return ''
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    for part in (request.method, request.path, request.query_string, request.get_data(cache=True)):
+        digest.update(part if isinstance(part, bytes) else part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _claim(scope, key, fingerprint):
+    """Insert the processing row for ``(scope, key)``; returns False if someone else holds it."""
+    table, now = IdempotencyKey.__table__, datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config.get('IDEMPOTENCY_LOCK_TIMEOUT', 60))
+    with db.engine.begin() as connection:
+        connection.execute(delete(table).where(
+            table.c.scope == scope, table.c.key == key,
+            or_(table.c.expires_at < now, and_(table.c.status == 'processing', table.c.created_at < stale))
+        ))
+        result = connection.execute(insert_ignoring_conflicts(table, db.engine).values(
+            id=str(uuid.uuid4()), scope=scope, key=key, fingerprint=fingerprint, status='processing',
+            created_at=now, expires_at=now + timedelta(seconds=current_app.config.get('IDEMPOTENCY_TTL', 86400))
+        ))
+    return result.rowcount == 1
+
+
+def _load(scope, key):
+    table = IdempotencyKey.__table__
+    with db.engine.connect() as connection:
+        return connection.execute(select(table).where(table.c.scope == scope, table.c.key == key)).first()
+
+
+def _store(scope, key, response):
+    table = IdempotencyKey.__table__
+    with db.engine.begin() as connection:
+        connection.execute(update(table).where(table.c.scope == scope, table.c.key == key).values(
+            status='completed', response_status=response.status_code,
+            response_body=response.get_data(), content_type=response.content_type
+        ))
+
+
+def _release(scope, key):
+    table = IdempotencyKey.__table__
+    with db.engine.begin() as connection:
+        connection.execute(delete(table).where(table.c.scope == scope, table.c.key == key))
+
+
+def _replay(row):
+    response = current_app.response_class(row.response_body, status=row.response_status,
+                                          content_type=row.content_type)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(fn):
+    """Run ``fn`` once per Idempotency-Key and replay its response to retries.
+
+    Requests without the header are passed straight through. Put it below
+    ``jwt_required()`` so keys are scoped to the caller.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return fn(*args, **kwargs)
+        if not 0 < len(key) <= 255:
+            return jsonify({"msg": f"{HEADER} must be 1-255 characters"}), 400
+
+        scope, fingerprint = _scope(), _fingerprint()
+        deadline = time.monotonic() + current_app.config.get('IDEMPOTENCY_WAIT_SECONDS', 10)
+        while not _claim(scope, key, fingerprint):
+            row = _load(scope, key)
+            if row is None:
+                continue
+            if row.fingerprint != fingerprint:
+                metrics.IDEMPOTENT_REQUESTS.labels('mismatch').inc()
+                return jsonify({"msg": f"{HEADER} was already used for a different request"}), 422
+            if row.status == 'completed':
+                metrics.IDEMPOTENT_REQUESTS.labels('replayed').inc()
+                return _replay(row)
+            if time.monotonic() >= deadline:
+                metrics.IDEMPOTENT_REQUESTS.labels('conflict').inc()
+                return jsonify({"msg": f"A request with this {HEADER} is still in progress"}), 409
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            response = current_app.make_response(fn(*args, **kwargs))
+        except Exception:
+            _release(scope, key)
+            raise
+        if response.status_code >= 500:
+            _release(scope, key)
+        else:
+            _store(scope, key, response)
+        metrics.IDEMPOTENT_REQUESTS.labels('executed').inc()
+        return response
+    return wrapper
+
+
+def purge_expired(batch_size=1000):
+    """Delete expired keys ``batch_size`` rows per transaction; returns the number removed."""
+    table, total = IdempotencyKey.__table__, 0
+    while True:
+        ids = select(table.c.id).where(table.c.expires_at < datetime.utcnow()).limit(batch_size)
+        with db.engine.begin() as connection:
+            batch = [row.id for row in connection.execute(ids)]
+            if batch:
+                connection.execute(delete(table).where(table.c.id.in_(batch)))
+        total += len(batch)
+        if len(batch) < batch_size:
+            return total
@@ -0,0 +1,37 @@
+"""Opaque cursors for keyset ("seek") pagination.
+
+A cursor is the sort key of the last row on the previous page, so the next page
+is ``WHERE (k1, k2, ...) > (:k1, :k2, ...)`` and can be served from an index
+instead of an ever-growing OFFSET.
+"""
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(*values):
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, *types):
+    """Decode a cursor into values of ``types``; raises ValueError if it is malformed."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(raw, list) or len(raw) != len(types):
+        raise ValueError('Invalid cursor')
+    return [
+        None if value is None else datetime.fromisoformat(value) if kind is datetime else kind(value)
+        for value, kind in zip(raw, types)
+    ]
+
+
+def page_size(requested, default=DEFAULT_PAGE_SIZE):
+    if not requested or requested < 1:
+        return default
+    return min(requested, MAX_PAGE_SIZE)
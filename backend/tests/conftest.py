@@ -0,0 +1,38 @@
+import pytest
+import os
+import sys
+from contextlib import contextmanager
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.models import db
+
+
+@pytest.fixture
+def query_budget():
+    """Fail when a block issues more SQL statements than its budget.
+
+        with query_budget(app, 2):
+            client.get('/api/marketplace/surrogates')
+    """
+    @contextmanager
+    def budget(app, limit):
+        with app.app_context():
+            engines = list(db.engines.values())
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        for engine in engines:
+            db.event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            for engine in engines:
+                db.event.remove(engine, 'before_cursor_execute', record)
+        assert len(statements) <= limit, \
+            f'{len(statements)} queries over a budget of {limit}:\n' + '\n'.join(statements)
+
+    return budget
@@ -0,0 +1,105 @@
+import pytest
+import json
+import subprocess
+import tempfile
+import os
+import sys
+import bcrypt
+
+# Add backend to Python path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from src.app import create_app, after_fork
+from src.models import db, User
+
+# Cumulative `python -X importtime -c "import src.app"` budget; raise it deliberately, not casually
+IMPORT_BUDGET_MS = int(os.environ.get('SDC_IMPORT_BUDGET_MS', 1500))
+LAZY_MODULES = ('flask_socketio', 'socketio', 'engineio', 'flask_mail')
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+
+
+class TestAppFactory:
+    """Test the single app factory, its lazy subsystems and fork hooks"""
+
+    @pytest.fixture
+    def db_path(self):
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+        yield db_path
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    def make_app(self, db_path, **kwargs):
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'MAIL_DEFAULT_SENDER': 'noreply@test.com'
+        }, **kwargs)
+        with app.app_context():
+            db.create_all()
+        return app
+
+    def dispose(self, app):
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+    def test_import_skips_optional_subsystems(self):
+        """Test importing the factory does not import Socket.IO or Flask-Mail"""
+        result = run_python('-c', f'import json, sys, src.app; print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))')
+        assert json.loads(result.stdout) == []
+
+    def test_import_time_budget(self):
+        """Test `import src.app` stays under the import-time budget"""
+        result = run_python('-X', 'importtime', '-c', 'import src.app')
+        line = next(l for l in result.stderr.splitlines() if l.rstrip().endswith('| src.app'))
+        cumulative_ms = int(line.split('|')[1]) / 1000
+        assert cumulative_ms < IMPORT_BUDGET_MS, f'import src.app took {cumulative_ms:.0f} ms'
+
+    def test_socketio_is_optional(self, db_path):
+        """Test socketio=False builds the app without a Socket.IO server"""
+        app = self.make_app(db_path, socketio=False)
+        assert 'socketio' not in app.extensions
+        self.dispose(app)
+
+        app = self.make_app(db_path)
+        assert 'socketio' in app.extensions
+        self.dispose(app)
+
+    def test_every_blueprint_registered(self, db_path):
+        """Test the factory serves all API areas, referrals included"""
+        app = self.make_app(db_path, socketio=False)
+        prefixes = {rule.rule.split('/')[2] for rule in app.url_map.iter_rules() if rule.rule.startswith('/api/')}
+        assert {'auth', 'users', 'kyc', 'marketplace', 'admin', 'wallet', 'notifications', 'messages',
+                'referrals'} <= prefixes
+        self.dispose(app)
+
+    def test_mail_bound_on_first_send(self, db_path):
+        """Test Flask-Mail is set up by the first email, not at startup"""
+        app = self.make_app(db_path, socketio=False)
+        with app.app_context():
+            db.session.add(User(email='donor@test.com', username='donor', role='donor',
+                                password_hash=bcrypt.hashpw(b'secret123', bcrypt.gensalt(4)).decode('utf-8'),
+                                is_verified=True, is_active=True))
+            db.session.commit()
+        assert 'mail' not in app.extensions
+
+        response = app.test_client().post('/api/auth/forgot-password', json={'email': 'donor@test.com'})
+        assert response.status_code == 200
+        assert 'mail' in app.extensions
+        self.dispose(app)
+
+    def test_after_fork_keeps_app_usable(self, db_path):
+        """Test the post-fork hook drops pooled connections and the app keeps serving"""
+        app = self.make_app(db_path, socketio=False)
+        client = app.test_client()
+        assert client.get('/api/marketplace/surrogates').status_code == 200
+        after_fork(app)
+        assert client.get('/api/marketplace/surrogates').status_code == 200
+        self.dispose(app)
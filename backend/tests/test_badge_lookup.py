@@ -0,0 +1,126 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.models import db, VerificationBadge, Surrogate, SurrogateProfile
+from src.services.badges import badge_cache
+
+
+class TestBadgeLookup:
+    """Test batched badge lookups and the per-user badge cache"""
+
+    @pytest.fixture
+    def app(self):
+        """Create and configure a new app instance for each test"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'MAIL_SUPPRESS_SEND': True
+        })
+
+        badge_cache.clear()
+        with app.app_context():
+            db.create_all()
+            for i in range(3):
+                surrogate = Surrogate(user_id=f'user-{i}')
+                db.session.add(surrogate)
+                db.session.flush()
+                db.session.add(SurrogateProfile(surrogate_id=surrogate.id, location='Lagos'))
+                db.session.add(VerificationBadge(user_id=f'user-{i}', type='id_verified', status='approved'))
+            db.session.commit()
+            yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        """Create a test client"""
+        return app.test_client()
+
+    def count_queries(self, app, func):
+        with app.app_context():
+            engine = db.engine
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        db.event.listen(engine, 'before_cursor_execute', record)
+        try:
+            result = func()
+        finally:
+            db.event.remove(engine, 'before_cursor_execute', record)
+        return result, statements
+
+    def test_listing_embeds_badges_in_constant_queries(self, client, app):
+        """Test marketplace listing carries badges without per-row queries"""
+        response, statements = self.count_queries(app, lambda: client.get('/api/marketplace/surrogates'))
+        data = json.loads(response.data)
+        assert len(data) == 3
+        assert all(s['badges'] == [{'user_id': s['user_id'], 'type': 'id_verified', 'status': 'approved'}] for s in data)
+        assert all(s['location'] == 'Lagos' for s in data)
+        # One listing query plus one badge query, however many surrogates there are
+        assert len(statements) == 2
+
+    def test_listing_joins_one_profile_per_surrogate(self, client, app):
+        """Test a surrogate with two profiles (no unique constraint) is listed once, with the latest profile"""
+        with app.app_context():
+            db.session.execute(db.text('ALTER TABLE surrogate_profiles RENAME TO old_profiles'))
+            db.session.execute(db.text(
+                'CREATE TABLE surrogate_profiles (id VARCHAR(36) PRIMARY KEY, surrogate_id VARCHAR(36) NOT NULL, '
+                'bio TEXT, date_of_birth DATE, location VARCHAR(255), occupation VARCHAR(255), '
+                'pregnancy_history TEXT, updated_at DATETIME)'
+            ))
+            db.session.execute(db.text('INSERT INTO surrogate_profiles SELECT * FROM old_profiles'))
+            db.session.execute(db.text('DROP TABLE old_profiles'))
+            first = Surrogate.query.filter_by(user_id='user-0').one()
+            db.session.add(SurrogateProfile(surrogate_id=first.id, location='Abuja',
+                                            updated_at=datetime.utcnow() + timedelta(days=1)))
+            db.session.commit()
+
+        response, statements = self.count_queries(app, lambda: client.get('/api/marketplace/surrogates'))
+        data = json.loads(response.data)
+        assert sorted(s['user_id'] for s in data) == ['user-0', 'user-1', 'user-2']
+        assert {s['user_id']: s['location'] for s in data}['user-0'] == 'Abuja'
+        assert len(statements) == 2
+
+    def test_cache_serves_repeat_lookups(self, client, app):
+        """Test a second lookup is served from the cache"""
+        _, first = self.count_queries(app, lambda: client.get('/api/verification-badges?user_ids=user-0,user-1'))
+        response, second = self.count_queries(app, lambda: client.get('/api/verification-badges?user_ids=user-0&user_ids=user-1'))
+        assert len(first) == 1
+        assert second == []
+        assert [b['user_id'] for b in json.loads(response.data)] == ['user-0', 'user-1']
+
+    def test_cache_invalidated_on_badge_change(self, client, app):
+        """Test committing a badge change drops that user's cached set"""
+        client.get('/api/verification-badges?user_ids=user-0')
+        with app.app_context():
+            badge = VerificationBadge.query.filter_by(user_id='user-0').first()
+            badge.status = 'revoked'
+            db.session.add(VerificationBadge(user_id='user-0', type='medical_cleared', status='approved'))
+            db.session.commit()
+
+        response = client.get('/api/verification-badges?user_ids=user-0')
+        assert sorted(b['status'] for b in json.loads(response.data)) == ['approved', 'revoked']
+
+    def test_bulk_lookup_is_capped(self, client):
+        """Test oversized id lists are rejected"""
+        ids = ','.join(f'user-{i}' for i in range(501))
+        assert client.get(f'/api/verification-badges?user_ids={ids}').status_code == 400
@@ -0,0 +1,188 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+from unittest.mock import patch
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+
+from src.app import create_app
+from src.models import db, User, KycDocument, Agency, Notification, NotificationBroadcast
+from src.services import broadcasts
+
+
+class TestNotificationBroadcasts:
+    """Test admin broadcasts fan out to a role or agency in chunks on the job queue"""
+
+    @pytest.fixture
+    def app(self):
+        """Create an app that runs jobs inline; yielded outside any app context"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'JOB_QUEUE_EAGER': True,
+            'BROADCAST_CHUNK_SIZE': 3
+        })
+        with app.app_context():
+            db.create_all()
+
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        return app.test_client()
+
+    def add_users(self, app, role, count, agency_id=None, active=True, prefix=None):
+        prefix = prefix or role
+        ids = [f'{prefix}-{i:05d}' for i in range(count)]
+        with app.app_context():
+            db.session.execute(insert(User), [
+                {'id': user_id, 'role': role, 'email': f'{user_id}@test.com', 'username': user_id, 'is_active': active}
+                for user_id in ids
+            ])
+            if agency_id:
+                db.session.execute(insert(KycDocument), [
+                    {'id': f'kyc-{user_id}', 'user_id': user_id, 'role': role, 'agency_id': agency_id}
+                    for user_id in ids
+                ])
+            db.session.commit()
+        return ids
+
+    def headers(self, app, role='admin'):
+        with app.app_context():
+            user = User(id=f'{role}-caller', role=role, email=f'{role}@caller.com', username=f'{role}-caller')
+            db.session.add(user)
+            db.session.commit()
+            return {'Authorization': f"Bearer {create_access_token(identity=user.id)}"}
+
+    def recipients(self, app):
+        with app.app_context():
+            return sorted(n.user_id for n in Notification.query.all())
+
+    def test_role_broadcast(self, app, client):
+        """Test every active user of the role is notified once and progress is reported"""
+        surrogates = self.add_users(app, 'surrogate', 10)
+        self.add_users(app, 'surrogate', 2, active=False, prefix='inactive')
+        self.add_users(app, 'donor', 4)
+        headers = self.headers(app)
+
+        response = client.post('/api/admin/notifications/broadcasts', headers=headers, json={
+            'title': 'Policy update', 'body': 'Please review the new terms', 'role': 'surrogate'
+        })
+        assert response.status_code == 202
+        broadcast_id = json.loads(response.data)['id']
+
+        response = client.get(f'/api/admin/notifications/broadcasts/{broadcast_id}', headers=headers)
+        data = json.loads(response.data)
+        assert response.status_code == 200
+        assert (data['status'], data['total'], data['sent']) == ('completed', 10, 10)
+        assert data['completed_at']
+        assert self.recipients(app) == surrogates
+
+    def test_agency_broadcast(self, app, client):
+        """Test an agency broadcast reaches only users filed with that agency, optionally by role"""
+        with app.app_context():
+            db.session.add_all([Agency(id='a1', name='One'), Agency(id='a2', name='Two')])
+            db.session.commit()
+        ours = self.add_users(app, 'surrogate', 4, agency_id='a1')
+        self.add_users(app, 'donor', 3, agency_id='a1')
+        self.add_users(app, 'surrogate', 5, agency_id='a2', prefix='other')
+        headers = self.headers(app)
+
+        response = client.post('/api/admin/notifications/broadcasts', headers=headers, json={
+            'title': 'Agency news', 'body': 'Body', 'agency_id': 'a1', 'role': 'surrogate', 'severity': 'warning'
+        })
+        assert response.status_code == 202
+        broadcast_id = json.loads(response.data)['id']
+        response = client.get(f'/api/admin/notifications/broadcasts/{broadcast_id}', headers=headers)
+        assert json.loads(response.data)['sent'] == 4
+        assert self.recipients(app) == ours
+        with app.app_context():
+            assert {n.severity for n in Notification.query.all()} == {'warning'}
+
+    def test_failed_run_resumes_without_duplicates(self, app):
+        """Test a run that dies mid-way is marked failed and a re-run finishes the rest once"""
+        users = self.add_users(app, 'donor', 10)
+        with app.app_context():
+            broadcast = NotificationBroadcast(title='Hello', body='Body', role='donor')
+            db.session.add(broadcast)
+            db.session.commit()
+            broadcast_id = broadcast.id
+
+        calls = []
+        real_create = broadcasts.create_notifications
+
+        def flaky(user_ids, *args, **kwargs):
+            calls.append(list(user_ids))
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return real_create(user_ids, *args, **kwargs)
+
+        with app.app_context():
+            with patch.object(broadcasts, 'create_notifications', flaky):
+                with pytest.raises(RuntimeError):
+                    broadcasts.run_broadcast(broadcast_id)
+            broadcast = db.session.get(NotificationBroadcast, broadcast_id)
+            assert (broadcast.status, broadcast.sent, broadcast.last_user_id) == ('failed', 3, users[2])
+            assert 'database went away' in broadcast.error
+
+        with app.app_context():
+            broadcasts.run_broadcast(broadcast_id)
+            broadcast = db.session.get(NotificationBroadcast, broadcast_id)
+            assert (broadcast.status, broadcast.sent, broadcast.total) == ('completed', 10, 10)
+        assert self.recipients(app) == users
+
+    def test_recipients_are_pushed(self, app, client):
+        """Test connected recipients get the broadcast live"""
+        self.add_users(app, 'donor', 5)
+        headers = self.headers(app)
+        with app.app_context():
+            token = create_access_token(identity='donor-00004')
+        socket = app.extensions['socketio'].test_client(app, auth={'token': token})
+        socket.get_received()
+
+        client.post('/api/admin/notifications/broadcasts', headers=headers, json={
+            'title': 'Live', 'body': 'Body', 'role': 'donor'
+        })
+        try:
+            [event] = [e for e in socket.get_received() if e['name'] == 'notification']
+            assert event['args'][0]['title'] == 'Live'
+            assert event['args'][0]['user_id'] == 'donor-00004'
+        finally:
+            socket.disconnect()
+
+    @pytest.mark.parametrize('payload,status', [
+        ({'body': 'Body', 'role': 'donor'}, 400),
+        ({'title': 'Hi', 'body': 'Body'}, 400),
+        ({'title': 'Hi', 'body': 'Body', 'role': 'donor', 'severity': 'loud'}, 400),
+        ({'title': 'Hi', 'body': 'Body', 'agency_id': 'missing'}, 404),
+    ])
+    def test_validation(self, app, client, payload, status):
+        """Test incomplete or unknown audiences are rejected before anything is queued"""
+        response = client.post('/api/admin/notifications/broadcasts', headers=self.headers(app), json=payload)
+        assert response.status_code == status
+        with app.app_context():
+            assert NotificationBroadcast.query.count() == 0
+
+    def test_admin_only(self, app, client):
+        """Test non-admins cannot broadcast"""
+        response = client.post('/api/admin/notifications/broadcasts', headers=self.headers(app, role='agency'), json={
+            'title': 'Hi', 'body': 'Body', 'role': 'donor'
+        })
+        assert response.status_code == 403
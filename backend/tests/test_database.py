@@ -0,0 +1,69 @@
+import pytest
+import tempfile
+import os
+import sys
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.database import engine_options
+from src.models import db
+
+
+class TestDatabaseEngine:
+    """Test engine configuration for SQLite and server databases"""
+
+    @pytest.fixture
+    def app(self):
+        """Create and configure a new app instance for each test"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'SQLITE_BUSY_TIMEOUT_MS': 2500
+        })
+
+        with app.app_context():
+            db.create_all()
+            yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    def test_sqlite_pragmas_applied(self, app):
+        """Test every pooled SQLite connection runs in WAL with tuned PRAGMAs"""
+        with app.app_context():
+            with db.engine.connect() as conn:
+                pragma = lambda name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+                assert pragma('journal_mode') == 'wal'
+                assert pragma('synchronous') == 1  # NORMAL
+                assert pragma('busy_timeout') == 2500
+                assert pragma('mmap_size') > 0
+
+    def test_postgres_pool_options(self):
+        """Test server databases get pool sizing, recycling and pre-ping"""
+        options = engine_options({
+            'SQLALCHEMY_DATABASE_URI': 'postgresql://sdc@localhost/sdc',
+            'DB_POOL_SIZE': 5,
+            'DB_MAX_OVERFLOW': 7,
+            'DB_POOL_RECYCLE': 600,
+            'DB_STATEMENT_TIMEOUT_MS': 15000
+        })
+        assert options['pool_size'] == 5
+        assert options['max_overflow'] == 7
+        assert options['pool_recycle'] == 600
+        assert options['pool_pre_ping'] is True
+        assert options['connect_args'] == {'options': '-c statement_timeout=15000'}
+
+    def test_sqlite_gets_no_pool_sizing(self):
+        """Test SQLite only gets a driver busy timeout"""
+        options = engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///x.db'})
+        assert options == {'connect_args': {'timeout': 5.0}}
@@ -0,0 +1,190 @@
+import pytest
+import tempfile
+import os
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask_jwt_extended import create_access_token
+
+from src.app import create_app
+from src.models import db, User, EscrowTransaction, WalletTransaction, CommissionSetting, MarketplaceUnlock
+from src.services import escrow, wallet
+
+
+class TestEscrowSettlement:
+    """Test escrow state changes, commission recorded on release, and batched settlement"""
+
+    @pytest.fixture
+    def app(self):
+        """Create an app with small settlement batches"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'ESCROW_SETTLEMENT_BATCH_SIZE': 7,
+            'ESCROW_DEFAULT_COMMISSION_PERCENT': Decimal('5')
+        }, socketio=False)
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(id='admin', role='admin', email='admin@example.com', username='admin'))
+            db.session.add(CommissionSetting(category='unlock', percent=Decimal('12.5')))
+            db.session.commit()
+
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        return app.test_client()
+
+    @pytest.fixture
+    def admin_headers(self, app):
+        with app.app_context():
+            return {'Authorization': f"Bearer {create_access_token(identity='admin')}"}
+
+    def add(self, app, *rows):
+        with app.app_context():
+            db.session.add_all(rows)
+            db.session.commit()
+
+    def statuses(self, app):
+        with app.app_context():
+            return {e.id: e.status for e in EscrowTransaction.query}
+
+    def test_release_records_commission_and_credits_payee(self, app):
+        """Test release takes the CommissionSetting, or the default, and pays the rest; unlock fees are kept whole"""
+        self.add(app,
+                 EscrowTransaction(id='unlock', user_id='u-1', amount=Decimal('5000'), type='marketplace_unlock', status='held'),
+                 EscrowTransaction(id='contract', user_id='u-1', payee_id='surrogate', amount=Decimal('200000'),
+                                   type='contract', status='held'),
+                 EscrowTransaction(id='pending', user_id='u-1', amount=Decimal('100'), type='contract', status='pending'))
+
+        with app.app_context():
+            assert escrow.release(['unlock', 'contract', 'pending']) == 2
+            db.session.commit()
+            assert escrow.release(['unlock', 'contract']) == 0
+            db.session.commit()
+
+            rows = {e.id: e for e in EscrowTransaction.query}
+            assert (rows['unlock'].status, rows['unlock'].commission) == ('released', Decimal('5000'))
+            assert (rows['contract'].status, rows['contract'].commission) == ('released', Decimal('10000'))
+            assert rows['contract'].released_at is not None
+            assert rows['pending'].status == 'pending'
+            [credit] = WalletTransaction.query.all()
+            assert (credit.user_id, credit.amount, credit.type, credit.reference) == \
+                ('surrogate', Decimal('190000'), 'escrow_release', 'release:contract')
+            assert wallet.balance('surrogate') == Decimal('190000')
+
+    def test_refund_returns_wallet_funded_escrows(self, app):
+        """Test refunding puts the wallet debit back and leaves released escrows alone"""
+        self.add(app,
+                 WalletTransaction(user_id='u-1', amount=Decimal('8000'), type='credit', status='completed'),
+                 WalletTransaction(user_id='u-1', amount=Decimal('5000'), type='unlock', status='completed',
+                                   reference='unlock:1'),
+                 EscrowTransaction(id='held', user_id='u-1', amount=Decimal('5000'), type='marketplace_unlock',
+                                   status='held', reference='unlock:1'),
+                 EscrowTransaction(id='released', user_id='u-1', amount=Decimal('10'), type='contract', status='released'))
+
+        with app.app_context():
+            assert wallet.balance('u-1') == Decimal('3000')
+            assert escrow.refund(['held', 'released']) == 1
+            db.session.commit()
+            assert wallet.balance('u-1') == Decimal('8000')
+        assert self.statuses(app) == {'held': 'refunded', 'released': 'released'}
+
+    def test_refund_revokes_unlock(self, app, client):
+        """Test a refunded unlock is deleted, so the profile has to be paid for again"""
+        self.add(app, WalletTransaction(user_id='admin', amount=Decimal('5000'), type='credit', status='completed'))
+        with app.app_context():
+            headers = {'Authorization': f"Bearer {create_access_token(identity='admin')}"}
+        assert client.post('/api/marketplace/unlock', json={'listing_id': 'listing-1'}, headers=headers).status_code == 201
+
+        with app.app_context():
+            held = EscrowTransaction.query.one()
+            assert escrow.refund([held.id]) == 1
+            db.session.commit()
+            assert MarketplaceUnlock.query.count() == 0
+            assert wallet.balance('admin') == Decimal('5000')
+
+        response = client.post('/api/marketplace/unlock', json={'listing_id': 'listing-1'}, headers=headers)
+        assert response.status_code == 201
+        with app.app_context():
+            assert wallet.balance('admin') == Decimal('0')
+
+    def test_settlement_releases_due_escrows_in_batches(self, app):
+        """Test the job releases every due escrow across several batches and nothing else"""
+        now = datetime.utcnow()
+        due = [EscrowTransaction(id=f'due-{i}', user_id='u-1', payee_id=f'payee-{i % 3}', amount=Decimal('1000'),
+                                 type='contract', status='held', release_at=now - timedelta(minutes=i))
+               for i in range(20)]
+        self.add(app, *due,
+                 EscrowTransaction(id='later', user_id='u-1', amount=Decimal('1'), type='contract', status='held',
+                                   release_at=now + timedelta(days=1)),
+                 EscrowTransaction(id='manual', user_id='u-1', amount=Decimal('1'), type='contract', status='held'))
+
+        with app.app_context():
+            assert escrow.settle_escrows() == 20
+            assert escrow.settle_escrows() == 0
+            assert WalletTransaction.query.filter_by(type='escrow_release').count() == 20
+            assert db.session.query(db.func.sum(EscrowTransaction.commission)).scalar() == Decimal('1000')
+        statuses = self.statuses(app)
+        assert (statuses['later'], statuses['manual']) == ('held', 'held')
+        assert list(statuses.values()).count('released') == 20
+
+    def test_unlock_escrow_becomes_due_after_hold(self, app, client):
+        """Test a marketplace unlock escrow is scheduled for release ESCROW_HOLD_DAYS later"""
+        self.add(app, WalletTransaction(user_id='admin', amount=Decimal('5000'), type='credit', status='completed'))
+        with app.app_context():
+            headers = {'Authorization': f"Bearer {create_access_token(identity='admin')}"}
+        assert client.post('/api/marketplace/unlock', json={'listing_id': 'listing-1'}, headers=headers).status_code == 201
+        with app.app_context():
+            held = EscrowTransaction.query.one()
+            assert timedelta(days=2, hours=23) < held.release_at - held.created_at <= timedelta(days=3, seconds=1)
+
+    def test_admin_settle_and_finance_report(self, app, client, admin_headers):
+        """Test admins release or refund escrows in bulk and the report sums the stored commission"""
+        self.add(app,
+                 EscrowTransaction(id='a', user_id='u-1', amount=Decimal('5000'), type='marketplace_unlock', status='held'),
+                 EscrowTransaction(id='b', user_id='u-1', amount=Decimal('1000'), type='contract', status='held'),
+                 EscrowTransaction(id='c', user_id='u-1', amount=Decimal('700'), type='contract', status='held'))
+
+        assert client.post('/api/admin/escrow/settle', json={'ids': ['a'], 'action': 'hold'},
+                           headers=admin_headers).status_code == 400
+        assert client.post('/api/admin/escrow/settle', json={'ids': [], 'action': 'release'},
+                           headers=admin_headers).status_code == 400
+        assert client.post('/api/admin/escrow/settle', json={'ids': ['a', {'id': 'b'}], 'action': 'release'},
+                           headers=admin_headers).status_code == 400
+        response = client.post('/api/admin/escrow/settle', json={'ids': ['a', 'b'], 'action': 'release'},
+                               headers=admin_headers)
+        assert response.status_code == 200
+        assert (response.json['updated'], response.json['status']) == (2, 'released')
+        response = client.post('/api/admin/escrow/settle', json={'ids': ['b', 'c'], 'action': 'refund'},
+                               headers=admin_headers)
+        assert response.json['updated'] == 1
+        assert self.statuses(app) == {'a': 'released', 'b': 'released', 'c': 'refunded'}
+
+        report = client.get('/api/admin/finance', headers=admin_headers).json
+        assert report['escrow_released'] == 6000
+        assert report['commission_earned'] == 5050
+        assert report['escrow_held'] == 0
+
+    def test_settle_requires_admin(self, app, client):
+        """Test non-admins cannot settle escrows"""
+        self.add(app, User(id='u-1', role='intending_parent', email='u1@example.com', username='u1'))
+        with app.app_context():
+            headers = {'Authorization': f"Bearer {create_access_token(identity='u-1')}"}
+        assert client.post('/api/admin/escrow/settle', json={'ids': ['a'], 'action': 'release'},
+                           headers=headers).status_code == 403
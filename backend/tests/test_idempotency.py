@@ -0,0 +1,192 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import jsonify
+from flask_jwt_extended import create_access_token
+
+from src.app import create_app
+from src.models import db, User, Favorite, Message, IdempotencyKey
+from src.utils.idempotency import idempotent, purge_expired
+
+
+class TestIdempotency:
+    """Test requests sent with an Idempotency-Key do their work once and replay the first response"""
+
+    @pytest.fixture
+    def app(self):
+        """Create an app on a file database so concurrent requests use separate connections"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'IDEMPOTENCY_WAIT_SECONDS': 5
+        }, socketio=False)
+        with app.app_context():
+            db.create_all()
+
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        return app.test_client()
+
+    def headers(self, app, user_id='alice', key=None):
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+        if key:
+            headers['Idempotency-Key'] = key
+        return headers
+
+    def test_register_retry_is_replayed(self, app, client):
+        """Test a retried registration returns the first response and creates one user"""
+        payload = {'email': 'new@example.com', 'password': 'Secret123!', 'role': 'surrogate'}
+        first = client.post('/api/auth/register', json=payload, headers={'Idempotency-Key': 'reg-1'})
+        retry = client.post('/api/auth/register', json=payload, headers={'Idempotency-Key': 'reg-1'})
+
+        assert first.status_code == retry.status_code == 201
+        assert retry.data == first.data
+        assert retry.headers['Idempotent-Replayed'] == 'true'
+        assert 'Idempotent-Replayed' not in first.headers
+        with app.app_context():
+            assert User.query.filter_by(email='new@example.com').count() == 1
+
+    def test_key_reused_for_different_request(self, app, client):
+        """Test the same key with another body is a 422"""
+        headers = self.headers(app, key='fav-1')
+        assert client.post('/api/favorites', json={'target_user_id': 'bob'}, headers=headers).status_code == 201
+        response = client.post('/api/favorites', json={'target_user_id': 'carol'}, headers=headers)
+        assert response.status_code == 422
+        with app.app_context():
+            assert [f.target_user_id for f in Favorite.query.all()] == ['bob']
+
+    def test_without_key_nothing_is_stored(self, app, client):
+        """Test requests without the header behave as before"""
+        headers = self.headers(app)
+        assert client.post('/api/favorites', json={'target_user_id': 'bob'}, headers=headers).status_code == 201
+        assert client.post('/api/favorites', json={'target_user_id': 'bob'}, headers=headers).status_code == 400
+        with app.app_context():
+            assert IdempotencyKey.query.count() == 0
+
+    def test_keys_are_scoped_to_the_caller(self, app, client):
+        """Test two users may send the same key without seeing each other's responses"""
+        for user_id in ('alice', 'bob'):
+            response = client.post('/api/favorites', json={'target_user_id': 'carol'},
+                                   headers=self.headers(app, user_id, key='same'))
+            assert response.status_code == 201
+            assert 'Idempotent-Replayed' not in response.headers
+        with app.app_context():
+            assert Favorite.query.count() == 2
+
+    def test_rejects_oversized_key(self, app, client):
+        """Test a key longer than 255 characters is a 400"""
+        response = client.post('/api/favorites', json={'target_user_id': 'bob'},
+                               headers=self.headers(app, key='k' * 256))
+        assert response.status_code == 400
+
+    def test_concurrent_duplicates_do_the_work_once(self, app):
+        """Test 10 simultaneous sends with one key store one message and all get its response"""
+        headers = self.headers(app, key='msg-1')
+        barrier = threading.Barrier(10)
+        responses = []
+
+        def send():
+            client = app.test_client()
+            barrier.wait()
+            response = client.post('/api/messages', json={'conversation_id': 'c1', 'content': 'Hello'}, headers=headers)
+            responses.append((response.status_code, json.loads(response.data)['id']))
+
+        threads = [threading.Thread(target=send) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with app.app_context():
+            [message] = Message.query.all()
+        assert responses == [(201, message.id)] * 10
+
+    def add_view(self, app, view):
+        app.add_url_rule(f'/test/{view.__name__}', view_func=idempotent(view), methods=['POST'])
+        return f'/test/{view.__name__}'
+
+    def test_server_errors_are_not_stored(self, app, client):
+        """Test a 5xx releases the key so the retry runs the view again"""
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            return jsonify({'attempt': len(calls)}), 503 if len(calls) == 1 else 200
+
+        url = self.add_view(app, flaky)
+        assert client.post(url, headers={'Idempotency-Key': 'k'}).status_code == 503
+        assert client.post(url, headers={'Idempotency-Key': 'k'}).status_code == 200
+        assert json.loads(client.post(url, headers={'Idempotency-Key': 'k'}).data) == {'attempt': 2}
+        assert len(calls) == 2
+
+    def test_duplicate_gives_up_while_first_attempt_runs(self, app):
+        """Test a duplicate answers 409 once IDEMPOTENCY_WAIT_SECONDS pass without a stored response"""
+        app.config['IDEMPOTENCY_WAIT_SECONDS'] = 0.2
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return jsonify({'ok': True}), 201
+
+        url = self.add_view(app, slow)
+        first = []
+        thread = threading.Thread(target=lambda: first.append(
+            app.test_client().post(url, headers={'Idempotency-Key': 'k'}).status_code))
+        thread.start()
+        started.wait(5)
+        try:
+            assert app.test_client().post(url, headers={'Idempotency-Key': 'k'}).status_code == 409
+        finally:
+            release.set()
+            thread.join()
+        assert first == [201]
+        assert app.test_client().post(url, headers={'Idempotency-Key': 'k'}).status_code == 201
+
+    def test_expired_and_abandoned_keys(self, app, client):
+        """Test expired responses and stale claims are not replayed, and purge removes expired rows"""
+        calls = []
+
+        def count():
+            calls.append(1)
+            return jsonify({'calls': len(calls)}), 200
+
+        url = self.add_view(app, count)
+        client.post(url, headers={'Idempotency-Key': 'expired'})
+        client.post(url, headers={'Idempotency-Key': 'abandoned'})
+        with app.app_context():
+            IdempotencyKey.query.filter_by(key='expired').update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+            IdempotencyKey.query.filter_by(key='abandoned').update({
+                'status': 'processing', 'created_at': datetime.utcnow() - timedelta(minutes=5)})
+            db.session.commit()
+
+        assert json.loads(client.post(url, headers={'Idempotency-Key': 'expired'}).data) == {'calls': 3}
+        assert json.loads(client.post(url, headers={'Idempotency-Key': 'abandoned'}).data) == {'calls': 4}
+
+        with app.app_context():
+            IdempotencyKey.query.update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+            db.session.commit()
+            assert purge_expired(batch_size=1) == 2
+            assert IdempotencyKey.query.count() == 0
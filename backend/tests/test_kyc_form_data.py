@@ -0,0 +1,256 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+from datetime import date
+import bcrypt
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.models import db, User, KycDocument, Surrogate
+from src.services.kyc import merge_patch, compute_form_progress
+
+
+class TestKycFormData:
+    """Test structured KYC form_data storage and partial updates"""
+
+    @pytest.fixture
+    def app(self):
+        """Create and configure a new app instance for each test"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'MAIL_SUPPRESS_SEND': True
+        })
+
+        with app.app_context():
+            db.create_all()
+            yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        """Create a test client"""
+        return app.test_client()
+
+    @pytest.fixture
+    def surrogate(self, client, app):
+        """Create a surrogate user and return (user_id, token)"""
+        with app.app_context():
+            hashed_pw = bcrypt.hashpw(b'surrogate123', bcrypt.gensalt(4)).decode('utf-8')
+            user = User(
+                email='surrogate@test.com',
+                username='surrogate',
+                password_hash=hashed_pw,
+                role='surrogate',
+                is_verified=True,
+                is_active=True
+            )
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        response = client.post('/api/auth/login', json={
+            'email': 'surrogate@test.com',
+            'password': 'surrogate123'
+        })
+        return user_id, json.loads(response.data)['access_token']
+
+    def test_merge_patch(self):
+        """Test RFC 7396 merge semantics"""
+        target = {'personal': {'first_name': 'Ada', 'dob': '1990-01-01'}, 'step': 1}
+        patch = {'personal': {'dob': None, 'surname': 'Obi'}, 'step': 2}
+        assert merge_patch(target, patch) == {
+            'personal': {'first_name': 'Ada', 'surname': 'Obi'},
+            'step': 2
+        }
+        assert target['personal']['dob'] == '1990-01-01'
+
+    def test_progress_counts_flat_donor_fields(self):
+        """Test the donor wizard's flat form_data counts towards the nested sections"""
+        form_data = {'first_name': 'Ada', 'dob': '1990-01-01', 'blood_group': 'O+', 'id_number': '', 'referral': 'Friend'}
+        # personal, medical and referral out of six donor sections
+        assert compute_form_progress('DONOR', form_data) == 50
+        assert compute_form_progress('donor', {'personal': {'first_name': 'Ada'}}) == 17
+        # Surrogates use nested sections only
+        assert compute_form_progress('surrogate', {'first_name': 'Ada'}) == 0
+
+    def test_indexed_fields_extracted(self, client, app, surrogate):
+        """Test location, date of birth and blood group are copied to columns"""
+        user_id, token = surrogate
+        response = client.post('/api/kyc/documents', json={
+            'form_data': {
+                'personal': {'dob': '15/06/1995', 'state_of_birth': 'Lagos'},
+                'medical': {'blood_group': 'o+'}
+            }
+        }, headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 201
+
+        with app.app_context():
+            kyc = KycDocument.query.filter_by(user_id=user_id).first()
+            assert kyc.location == 'Lagos'
+            assert kyc.blood_group == 'O+'
+            assert kyc.date_of_birth == date(1995, 6, 15)
+            assert kyc.age is not None
+
+            # Stored as native JSON, so SQL JSON functions can reach into it
+            blood_group = db.session.query(
+                db.func.json_extract(KycDocument.form_data, '$.medical.blood_group')
+            ).scalar()
+            assert blood_group == 'o+'
+
+    def test_non_object_form_data_clears_indexed_fields(self):
+        """Test replacing form_data with a non-object leaves no stale filter values behind"""
+        kyc = KycDocument()
+        kyc.set_form_data({'personal': {'dob': '1995-06-15', 'state_of_birth': 'Lagos'}, 'medical': {'blood_group': 'O+'}})
+        assert (kyc.location, kyc.blood_group, kyc.date_of_birth) == ('Lagos', 'O+', date(1995, 6, 15))
+        kyc.set_form_data('not an object')
+        assert (kyc.location, kyc.blood_group, kyc.date_of_birth) == (None, None, None)
+
+    def test_form_data_patch(self, client, app, surrogate):
+        """Test a merge patch only changes the fields it names"""
+        user_id, token = surrogate
+        headers = {'Authorization': f'Bearer {token}'}
+        client.post('/api/kyc/documents', json={
+            'form_data': {'personal': {'first_name': 'Ada', 'state_of_birth': 'Lagos'}}
+        }, headers=headers)
+
+        response = client.post('/api/kyc/documents', json={
+            'form_data_patch': {'personal': {'state_of_birth': 'Abuja'}, 'medical': {'blood_group': 'AB'}}
+        }, headers=headers)
+        assert response.status_code == 200
+
+        response = client.get('/api/kyc/status', headers=headers)
+        form_data = json.loads(response.data)['form_data']
+        assert form_data == {
+            'personal': {'first_name': 'Ada', 'state_of_birth': 'Abuja'},
+            'medical': {'blood_group': 'AB'}
+        }
+        with app.app_context():
+            kyc = KycDocument.query.filter_by(user_id=user_id).first()
+            assert kyc.location == 'Abuja'
+            assert kyc.blood_group == 'AB'
+
+    def test_marketplace_filters(self, client, app, surrogate):
+        """Test marketplace listing filters on the indexed KYC columns"""
+        user_id, token = surrogate
+        client.post('/api/kyc/documents', json={
+            'form_data': {'location': 'Lagos', 'dob': '1995-01-01', 'blood_group': 'O+'}
+        }, headers={'Authorization': f'Bearer {token}'})
+        with app.app_context():
+            db.session.add(Surrogate(user_id=user_id))
+            db.session.add(Surrogate(user_id='no-kyc-user'))
+            db.session.commit()
+
+        assert len(json.loads(client.get('/api/marketplace/surrogates').data)) == 2
+
+        response = client.get('/api/marketplace/surrogates?location=Lagos&blood_group=o%2B&min_age=21')
+        data = json.loads(response.data)
+        assert [s['user_id'] for s in data] == [user_id]
+
+        response = client.get('/api/marketplace/surrogates?max_age=20')
+        assert json.loads(response.data) == []
+
+    def test_patch_applies_diff_and_computes_progress(self, client, app, surrogate):
+        """Test PATCH merges a diff, bumps the version and computes progress"""
+        user_id, token = surrogate
+        headers = {'Authorization': f'Bearer {token}'}
+        response = client.post('/api/kyc/documents', json={
+            'form_data': {'personal': {'first_name': 'Ada'}}
+        }, headers=headers)
+        version = json.loads(response.data)['version']
+
+        response = client.patch('/api/kyc/documents', json={
+            'version': version,
+            'changes': {'medical': {'blood_group': 'B+'}, 'emergency': {'name1': 'Ngozi'}}
+        }, headers=headers)
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['version'] == version + 1
+        # personal, medical and emergency out of five surrogate sections
+        assert data['form_progress'] == 60
+
+        with app.app_context():
+            kyc = KycDocument.query.filter_by(user_id=user_id).first()
+            assert kyc.form_data['personal'] == {'first_name': 'Ada'}
+            assert kyc.blood_group == 'B+'
+
+    def test_post_ignores_client_progress(self, client, app, surrogate):
+        """Test a full-form POST stores the server's progress, not the figure the client sends"""
+        user_id, token = surrogate
+        response = client.post('/api/kyc/documents', json={
+            'form_data': {'personal': {'first_name': 'Ada'}}, 'form_progress': 100
+        }, headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 201
+        with app.app_context():
+            # personal out of five surrogate sections
+            assert KycDocument.query.filter_by(user_id=user_id).one().form_progress == 20
+
+    def test_patch_rejects_stale_version(self, client, app, surrogate):
+        """Test optimistic concurrency rejects a diff based on an old version"""
+        user_id, token = surrogate
+        headers = {'Authorization': f'Bearer {token}'}
+        response = client.post('/api/kyc/documents', json={'form_data': {}}, headers=headers)
+        version = json.loads(response.data)['version']
+
+        first = client.patch('/api/kyc/documents', json={
+            'version': version, 'changes': {'medical': {'genotype': 'AA'}}
+        }, headers=headers)
+        assert first.status_code == 200
+
+        stale = client.patch('/api/kyc/documents', json={
+            'version': version, 'changes': {'medical': {'genotype': 'AS'}}
+        }, headers=headers)
+        assert stale.status_code == 409
+        assert json.loads(stale.data)['version'] == version + 1
+
+        missing = client.patch('/api/kyc/documents', json={'changes': {}}, headers=headers)
+        assert missing.status_code == 400
+        boolean = client.patch('/api/kyc/documents', json={'version': True, 'changes': {}}, headers=headers)
+        assert boolean.status_code == 400
+
+    def test_patch_only_touches_user_for_name_changes(self, client, app, surrogate):
+        """Test the User row is only updated when name fields change"""
+        user_id, token = surrogate
+        headers = {'Authorization': f'Bearer {token}'}
+        response = client.post('/api/kyc/documents', json={'form_data': {}}, headers=headers)
+        version = json.loads(response.data)['version']
+
+        statements = []
+        with app.app_context():
+            engine = db.engine
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        db.event.listen(engine, 'before_cursor_execute', record)
+        try:
+            response = client.patch('/api/kyc/documents', json={
+                'version': version, 'changes': {'medical': {'genotype': 'AA'}}
+            }, headers=headers)
+            assert not any('users' in s for s in statements)
+
+            response = client.patch('/api/kyc/documents', json={
+                'version': version + 1, 'changes': {'personal': {'first_name': 'Ada', 'surname': 'Obi'}}
+            }, headers=headers)
+            assert response.status_code == 200
+            assert any(s.startswith('UPDATE users') for s in statements)
+        finally:
+            db.event.remove(engine, 'before_cursor_execute', record)
+
+        with app.app_context():
+            user = User.query.get(user_id)
+            assert (user.first_name, user.last_name) == ('Ada', 'Obi')
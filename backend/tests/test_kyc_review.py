@@ -0,0 +1,167 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+from datetime import datetime, timedelta
+import bcrypt
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.models import db, User, KycDocument, Notification, Agency
+
+
+class TestKycReviewQueue:
+    """Test the admin KYC review queue and bulk review actions"""
+
+    @pytest.fixture
+    def app(self):
+        """Create and configure a new app instance for each test"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'MAIL_SUPPRESS_SEND': True
+        })
+
+        with app.app_context():
+            db.create_all()
+            yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        """Create a test client"""
+        return app.test_client()
+
+    def login(self, client, app, email, role):
+        with app.app_context():
+            hashed_pw = bcrypt.hashpw(b'secret123', bcrypt.gensalt(4)).decode('utf-8')
+            db.session.add(User(
+                email=email,
+                username=email.split('@')[0],
+                password_hash=hashed_pw,
+                role=role,
+                is_verified=True,
+                is_active=True
+            ))
+            db.session.commit()
+        response = client.post('/api/auth/login', json={'email': email, 'password': 'secret123'})
+        return {'Authorization': f"Bearer {json.loads(response.data)['access_token']}"}
+
+    @pytest.fixture
+    def admin_headers(self, client, app):
+        return self.login(client, app, 'admin@test.com', 'admin')
+
+    @pytest.fixture
+    def documents(self, app):
+        """Create KYC submissions across statuses, roles and agencies"""
+        with app.app_context():
+            agency = Agency(name='Test Agency')
+            db.session.add(agency)
+            db.session.flush()
+            start = datetime(2026, 1, 1)
+            for i in range(7):
+                db.session.add(KycDocument(
+                    user_id=f'user-{i}',
+                    role='surrogate' if i % 2 else 'donor',
+                    status='submitted' if i < 5 else 'approved',
+                    agency_id=agency.id if i < 3 else None,
+                    updated_at=start + timedelta(hours=i)
+                ))
+            db.session.commit()
+            return agency.id
+
+    def test_queue_requires_admin(self, client, app, documents):
+        """Test non-admin users are rejected"""
+        headers = self.login(client, app, 'donor@test.com', 'donor')
+        assert client.get('/api/admin/kyc', headers=headers).status_code == 403
+        assert client.get('/api/admin/kyc/counts', headers=headers).status_code == 403
+        assert client.post('/api/admin/kyc/review', json={}, headers=headers).status_code == 403
+
+    def test_queue_keyset_pagination(self, client, admin_headers, documents):
+        """Test pages follow (status, updated_at) order without gaps or repeats"""
+        seen = []
+        cursor = None
+        while True:
+            params = {'status': 'submitted', 'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            response = client.get('/api/admin/kyc', query_string=params, headers=admin_headers)
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            seen.extend(item['user_id'] for item in data['items'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        assert seen == ['user-0', 'user-1', 'user-2', 'user-3', 'user-4']
+
+    def test_queue_filters(self, client, admin_headers, documents):
+        """Test role and agency filters"""
+        response = client.get('/api/admin/kyc', query_string={
+            'status': 'submitted', 'role': 'surrogate', 'agency_id': documents
+        }, headers=admin_headers)
+        assert [i['user_id'] for i in json.loads(response.data)['items']] == ['user-1']
+
+        response = client.get('/api/admin/kyc?cursor=not-a-cursor', headers=admin_headers)
+        assert response.status_code == 400
+
+    def test_queue_counts(self, client, admin_headers, documents):
+        """Test counts cover every submission, not just the first page, and honour the filters"""
+        response = client.get('/api/admin/kyc/counts', headers=admin_headers)
+        assert response.status_code == 200
+        assert json.loads(response.data) == {'submitted': 5, 'approved': 2, 'all': 7}
+
+        response = client.get('/api/admin/kyc/counts', query_string={'agency_id': documents}, headers=admin_headers)
+        assert json.loads(response.data) == {'submitted': 3, 'all': 3}
+
+    def test_bulk_review_single_update_and_insert(self, client, app, admin_headers, documents):
+        """Test bulk approval runs one UPDATE and one notification INSERT"""
+        with app.app_context():
+            docs = KycDocument.query.filter_by(status='submitted').order_by(KycDocument.updated_at).all()
+            ids = [d.id for d in docs[:3]]
+            engine = db.engine
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        db.event.listen(engine, 'before_cursor_execute', record)
+        try:
+            response = client.post('/api/admin/kyc/review', json={
+                'ids': ids, 'action': 'approve'
+            }, headers=admin_headers)
+        finally:
+            db.event.remove(engine, 'before_cursor_execute', record)
+
+        assert response.status_code == 200
+        assert json.loads(response.data)['updated'] == 3
+        assert len([s for s in statements if s.startswith('UPDATE kyc_documents')]) == 1
+        assert len([s for s in statements if s.startswith('INSERT INTO notifications')]) == 1
+
+        with app.app_context():
+            approved = KycDocument.query.filter(KycDocument.id.in_(ids)).all()
+            assert {d.status for d in approved} == {'approved'}
+            assert {d.version for d in approved} == {2}
+            assert Notification.query.count() == 3
+
+    def test_bulk_review_validation(self, client, admin_headers, documents):
+        """Test bad actions, empty id lists and non-string ids are rejected"""
+        response = client.post('/api/admin/kyc/review', json={'ids': ['x'], 'action': 'delete'}, headers=admin_headers)
+        assert response.status_code == 400
+        response = client.post('/api/admin/kyc/review', json={'ids': [], 'action': 'reject'}, headers=admin_headers)
+        assert response.status_code == 400
+        response = client.post('/api/admin/kyc/review', json={'ids': [{'x': 1}], 'action': 'approve'}, headers=admin_headers)
+        assert response.status_code == 400
@@ -0,0 +1,100 @@
+import pytest
+import json
+import logging
+import tempfile
+import os
+import sys
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.models import db
+from src.logs import JsonFormatter, RequestContextFilter, SamplingFilter, REDACTED
+
+
+def make_record(name='sdc.test', level=logging.INFO, msg='hello', **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestLogs:
+    """Test JSON log formatting, redaction, sampling and request ids"""
+
+    @pytest.fixture
+    def app(self):
+        """Create and configure a new app instance for each test"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars'
+        })
+
+        with app.app_context():
+            db.create_all()
+
+        # Outside the app context, so every request gets its own g as in production
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        """Create a test client"""
+        return app.test_client()
+
+    def test_json_line_with_extras(self):
+        """Test records become one JSON object including their extra fields"""
+        entry = json.loads(JsonFormatter().format(make_record(msg='paid %s', user_id='u1')))
+        assert entry['level'] == 'INFO'
+        assert entry['logger'] == 'sdc.test'
+        assert entry['user_id'] == 'u1'
+        assert 'ts' in entry
+
+    def test_sensitive_fields_are_redacted(self):
+        """Test passwords, tokens and codes are masked at any depth"""
+        record = make_record(payload={'email': 'a@b.c', 'password': 'hunter2', 'nested': [{'reset_code': '123456'}]},
+                             access_token='eyJ...')
+        line = JsonFormatter().format(record)
+        entry = json.loads(line)
+        assert 'hunter2' not in line and '123456' not in line and 'eyJ' not in line
+        assert entry['payload']['email'] == 'a@b.c'
+        assert entry['payload']['password'] == REDACTED
+        assert entry['access_token'] == REDACTED
+
+    def test_presence_flags_are_kept(self):
+        """Test has_* flags are logged as-is while similar keys stay masked"""
+        entry = json.loads(JsonFormatter().format(make_record(has_password=False, has_code=True, new_password_hash='x')))
+        assert (entry['has_password'], entry['has_code']) == (False, True)
+        assert entry['new_password_hash'] == REDACTED
+
+    def test_sampling_keeps_warnings(self):
+        """Test sampled loggers drop INFO records but never warnings"""
+        sampler = SamplingFilter({'sdc.socketio': 0.0})
+        assert not sampler.filter(make_record(name='sdc.socketio'))
+        assert not sampler.filter(make_record(name='sdc.socketio.rooms'))
+        assert sampler.filter(make_record(name='sdc.socketio', level=logging.WARNING))
+        assert sampler.filter(make_record(name='sdc.db'))
+
+    def test_request_id_is_echoed(self, client):
+        """Test responses carry the caller's request id, or a generated one"""
+        response = client.get('/', headers={'X-Request-ID': 'abc-123'})
+        assert response.headers['X-Request-ID'] == 'abc-123'
+        generated = client.get('/', headers={'X-Request-ID': 'x' * 300}).headers['X-Request-ID']
+        assert generated != 'abc-123' and len(generated) == 32
+
+    def test_records_carry_request_id(self, app):
+        """Test records logged during a request are tagged with its id"""
+        with app.test_request_context('/', headers={'X-Request-ID': 'req-42'}):
+            record = make_record()
+            RequestContextFilter().filter(record)
+        assert record.request_id == 'req-42'
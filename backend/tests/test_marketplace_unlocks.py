@@ -0,0 +1,160 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+import threading
+from decimal import Decimal
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask_jwt_extended import create_access_token
+
+from src.app import create_app
+from src.models import db, User, MarketplaceUnlock, WalletTransaction, EscrowTransaction, CommissionSetting
+from src.services import wallet
+
+
+class TestMarketplaceUnlocks:
+    """Test unlocks are paid from the wallet exactly once, including under concurrent requests"""
+
+    @pytest.fixture
+    def app(self):
+        """Create an app on a file database so concurrent requests use separate connections"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'MARKETPLACE_UNLOCK_PRICE': Decimal('5000')
+        }, socketio=False)
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(id='buyer', role='intending_parent', email='buyer@example.com', username='buyer'))
+            db.session.add(CommissionSetting(category='unlock', percent=Decimal('12.5')))
+            db.session.commit()
+
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        return app.test_client()
+
+    def headers(self, app, user_id='buyer', key=None):
+        with app.app_context():
+            headers = {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+        if key:
+            headers['Idempotency-Key'] = key
+        return headers
+
+    def fund(self, app, amount, user_id='buyer'):
+        with app.app_context():
+            db.session.add(WalletTransaction(user_id=user_id, amount=amount, type='credit', status='completed'))
+            db.session.commit()
+
+    def ledger(self, app, user_id='buyer'):
+        with app.app_context():
+            return {
+                'unlocks': sorted(u.listing_id for u in MarketplaceUnlock.query.filter_by(user_id=user_id)),
+                'debits': WalletTransaction.query.filter_by(user_id=user_id, type='unlock').count(),
+                'escrows': EscrowTransaction.query.filter_by(user_id=user_id, status='held').count(),
+                'balance': wallet.balance(user_id),
+            }
+
+    def test_unlock_debits_wallet_and_holds_escrow(self, app, client):
+        """Test an unlock debits the price, holds it in escrow and records the commission"""
+        self.fund(app, 12000)
+        response = client.post('/api/marketplace/unlock', json={'listing_id': 'listing-1'}, headers=self.headers(app))
+        data = json.loads(response.data)
+        assert response.status_code == 201
+        assert (data['unlock']['amount'], data['unlock']['commission']) == (5000.0, 625.0)
+
+        with app.app_context():
+            [debit] = WalletTransaction.query.filter_by(type='unlock').all()
+            [escrow] = EscrowTransaction.query.all()
+            assert debit.reference == escrow.reference == f"unlock:{data['unlock']['id']}"
+            assert (escrow.amount, escrow.status, escrow.type) == (Decimal('5000'), 'held', 'marketplace_unlock')
+
+        balance = json.loads(client.get('/api/wallet/balance', headers=self.headers(app)).data)
+        assert balance['balance'] == 7000.0
+        assert json.loads(client.get('/api/marketplace/unlocks', headers=self.headers(app)).data) == ['listing-1']
+
+    def test_repeat_unlock_is_not_charged_again(self, app, client):
+        """Test a retry replays the first response and a fresh unlock of the same listing is a 200"""
+        self.fund(app, 12000)
+        first = client.post('/api/marketplace/unlock', json={'listing_id': 'listing-1'}, headers=self.headers(app, key='k1'))
+        again = client.post('/api/marketplace/unlock', json={'listing_id': 'listing-1'}, headers=self.headers(app, key='k1'))
+        other_key = client.post('/api/marketplace/unlock', json={'listing_id': 'listing-1'}, headers=self.headers(app, key='k2'))
+
+        assert (first.status_code, again.status_code, other_key.status_code) == (201, 201, 200)
+        assert again.headers['Idempotent-Replayed'] == 'true'
+        assert json.loads(other_key.data)['unlock']['id'] == json.loads(first.data)['unlock']['id']
+        assert self.ledger(app) == {'unlocks': ['listing-1'], 'debits': 1, 'escrows': 1, 'balance': Decimal('7000')}
+
+    def test_idempotency_key_reused_for_another_listing(self, app, client):
+        """Test a key already spent on one listing cannot unlock another"""
+        self.fund(app, 12000)
+        client.post('/api/marketplace/unlock', json={'listing_id': 'listing-1'}, headers=self.headers(app, key='k1'))
+        response = client.post('/api/marketplace/unlock', json={'listing_id': 'listing-2'}, headers=self.headers(app, key='k1'))
+        assert response.status_code == 422
+        assert self.ledger(app)['unlocks'] == ['listing-1']
+
+    def test_insufficient_funds(self, app, client):
+        """Test an unfunded unlock is a 402 that writes nothing"""
+        self.fund(app, 4999)
+        response = client.post('/api/marketplace/unlock', json={'listing_id': 'listing-1'}, headers=self.headers(app))
+        data = json.loads(response.data)
+        assert response.status_code == 402
+        assert (data['balance'], data['price']) == (4999.0, 5000.0)
+        assert self.ledger(app) == {'unlocks': [], 'debits': 0, 'escrows': 0, 'balance': Decimal('4999')}
+
+    @pytest.mark.parametrize('payload', [{}, {'listing_id': ''}, {'listing_id': 42}, {'listing_id': 'x' * 51}])
+    def test_rejects_bad_listing(self, app, client, payload):
+        """Test a missing or malformed listing_id is a 400"""
+        response = client.post('/api/marketplace/unlock', json=payload, headers=self.headers(app))
+        assert response.status_code == 400
+
+    def run_concurrently(self, app, listing_ids):
+        """POST one unlock per listing id, all released at the same moment"""
+        headers = self.headers(app)
+        barrier = threading.Barrier(len(listing_ids))
+        statuses = []
+
+        def unlock(listing_id):
+            client = app.test_client()
+            barrier.wait()
+            response = client.post('/api/marketplace/unlock', json={'listing_id': listing_id}, headers=headers)
+            statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=unlock, args=(listing_id,)) for listing_id in listing_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(statuses)
+
+    def test_concurrent_taps_on_one_listing(self, app):
+        """Test 20 simultaneous unlocks of one listing create one unlock and one debit"""
+        self.fund(app, 50000)
+        assert self.run_concurrently(app, ['listing-1'] * 20) == [200] * 19 + [201]
+        assert self.ledger(app) == {'unlocks': ['listing-1'], 'debits': 1, 'escrows': 1, 'balance': Decimal('45000')}
+
+    def test_concurrent_unlocks_never_overdraw(self, app):
+        """Test simultaneous unlocks of different listings stop exactly when the wallet runs out"""
+        self.fund(app, 15000)
+        statuses = self.run_concurrently(app, [f'listing-{i}' for i in range(12)])
+        assert statuses == [201] * 3 + [402] * 9
+
+        ledger = self.ledger(app)
+        assert len(ledger['unlocks']) == ledger['debits'] == ledger['escrows'] == 3
+        assert ledger['balance'] == Decimal('0')
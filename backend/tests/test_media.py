@@ -0,0 +1,181 @@
+import pytest
+import json
+import tempfile
+import os
+import io
+import sys
+import subprocess
+from unittest.mock import patch
+import bcrypt
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.models import db, User, Message, MediaAsset
+from src.controllers import upload_controller
+
+
+class TestVideoProcessing:
+    """Test background transcoding of uploaded chat videos"""
+
+    @pytest.fixture
+    def app(self):
+        """Create and configure a new app instance for each test"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'MAIL_SUPPRESS_SEND': True,
+            'JOB_QUEUE_EAGER': True
+        })
+
+        with app.app_context():
+            db.create_all()
+            yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        """Create a test client"""
+        return app.test_client()
+
+    @pytest.fixture
+    def upload_dir(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch.object(upload_controller, 'UPLOAD_FOLDER', tmp):
+                yield tmp
+
+    @pytest.fixture
+    def token(self, client, app):
+        """Create a user and return a token"""
+        with app.app_context():
+            hashed_pw = bcrypt.hashpw(b'user123', bcrypt.gensalt(4)).decode('utf-8')
+            db.session.add(User(
+                email='user@test.com',
+                username='user',
+                password_hash=hashed_pw,
+                role='surrogate',
+                is_verified=True,
+                is_active=True
+            ))
+            db.session.commit()
+
+        response = client.post('/api/auth/login', json={
+            'email': 'user@test.com',
+            'password': 'user123'
+        })
+        return json.loads(response.data)['access_token']
+
+    @staticmethod
+    def fake_ffmpeg(command, **kwargs):
+        # The output path is always the last argument
+        with open(command[-1], 'wb') as f:
+            f.write(b'transcoded')
+        return subprocess.CompletedProcess(command, 0)
+
+    def upload_video(self, client, token, name='clip.mov'):
+        return client.post(
+            '/api/upload',
+            data={'file': (io.BytesIO(b'raw video bytes'), name), 'conversation_id': 'conv-1'},
+            headers={'Authorization': f'Bearer {token}'},
+            content_type='multipart/form-data'
+        )
+
+    def test_video_upload_is_transcoded(self, client, app, token, upload_dir):
+        """Test uploaded video gets an H.264 rendition and poster frame"""
+        with patch('src.services.media.shutil.which', return_value='/usr/bin/ffmpeg'), \
+                patch('src.services.media.subprocess.run', side_effect=self.fake_ffmpeg) as run:
+            response = self.upload_video(client, token)
+
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['processing'] is True
+        assert run.call_count == 2
+        assert '-c:v' in run.call_args_list[0].args[0]
+
+        with app.app_context():
+            asset = MediaAsset.query.get(data['media_id'])
+            assert asset.status == 'ready'
+            assert asset.url.endswith('_h264.mp4')
+            assert asset.poster_url.endswith('_poster.jpg')
+
+    def test_message_sent_before_transcode_is_updated(self, client, app, token, upload_dir):
+        """Test messages referencing the raw upload are repointed when ready"""
+        with app.app_context():
+            asset = MediaAsset(original_url='/uploads/conversations/conv-1/clip.mov')
+            db.session.add(asset)
+            db.session.add(Message(
+                conversation_id='conv-1',
+                sender_user_id='someone',
+                attachment_url='/uploads/conversations/conv-1/clip.mov',
+                attachment_type='video/quicktime'
+            ))
+            db.session.commit()
+            asset_id = asset.id
+
+        src = os.path.join(upload_dir, 'clip.mov')
+        with open(src, 'wb') as f:
+            f.write(b'raw')
+
+        from src.services import media
+        with app.app_context(), \
+                patch('src.services.media.subprocess.run', side_effect=self.fake_ffmpeg):
+            media.process_video(asset_id, src)
+            message = Message.query.filter_by(conversation_id='conv-1').first()
+            assert message.attachment_url == '/uploads/conversations/conv-1/clip_h264.mp4'
+            assert message.attachment_type == 'video'
+            assert message.attachment_thumbnail_url == '/uploads/conversations/conv-1/clip_poster.jpg'
+
+    def test_message_sent_after_transcode_uses_rendition(self, client, app, token, upload_dir):
+        """Test sending a raw upload URL after processing resolves to the rendition"""
+        with app.app_context():
+            db.session.add(MediaAsset(
+                original_url='/uploads/general/clip.mov',
+                url='/uploads/general/clip_h264.mp4',
+                poster_url='/uploads/general/clip_poster.jpg',
+                status='ready'
+            ))
+            db.session.commit()
+
+        response = client.post('/api/messages', json={
+            'conversation_id': 'conv-1',
+            'attachment_url': '/uploads/general/clip.mov',
+            'attachment_type': 'video/quicktime'
+        }, headers={'Authorization': f'Bearer {token}'})
+
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['attachment_url'] == '/uploads/general/clip_h264.mp4'
+        assert data['attachment_thumbnail_url'] == '/uploads/general/clip_poster.jpg'
+
+    def test_failed_transcode_keeps_raw_upload(self, client, app, token, upload_dir):
+        """Test ffmpeg failures are recorded without breaking the upload"""
+        error = subprocess.CalledProcessError(1, 'ffmpeg', stderr=b'Invalid data found')
+        with patch('src.services.media.shutil.which', return_value='/usr/bin/ffmpeg'), \
+                patch('src.services.media.subprocess.run', side_effect=error):
+            response = self.upload_video(client, token, name='broken.mp4')
+
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        with app.app_context():
+            asset = MediaAsset.query.get(data['media_id'])
+            assert asset.status == 'failed'
+            assert 'Invalid data' in asset.error
+
+    def test_video_upload_without_ffmpeg(self, client, token, upload_dir):
+        """Test videos are stored raw when ffmpeg is not installed"""
+        with patch('src.services.media.shutil.which', return_value=None):
+            response = self.upload_video(client, token)
+
+        assert response.status_code == 201
+        assert 'processing' not in json.loads(response.data)
@@ -0,0 +1,128 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+import bcrypt
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from prometheus_client import REGISTRY
+
+from src.app import create_app
+from src.models import db, User
+from src import metrics
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics:
+    """Test the Prometheus /metrics endpoint and the instrumented call sites"""
+
+    @pytest.fixture
+    def app(self):
+        """Create and configure a new app instance for each test"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'METRICS_TOKEN': 'scrape-token'
+        })
+
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(email='donor@test.com', username='donor', role='donor',
+                                password_hash=bcrypt.hashpw(b'secret123', bcrypt.gensalt(4)).decode('utf-8'),
+                                is_verified=True, is_active=True))
+            db.session.commit()
+            yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        """Create a test client"""
+        return app.test_client()
+
+    def test_metrics_requires_token(self, client):
+        """Test scrapes without the configured token are refused"""
+        assert client.get('/metrics').status_code == 403
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+        response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'})
+        assert response.status_code == 200
+        assert b'sdc_http_request_duration_seconds' in response.data
+
+    def test_metrics_without_token_is_local_only(self, app, client):
+        """Test that with no token only direct scrapes from this host are answered"""
+        app.config['METRICS_TOKEN'] = None
+        assert client.get('/metrics').status_code == 200
+        assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.9'}).status_code == 403
+        assert client.get('/metrics', headers={'X-Forwarded-For': '203.0.113.9'}).status_code == 403
+
+    def test_request_latency_and_status(self, client):
+        """Test requests are counted per blueprint, route rule and status"""
+        labels = {'blueprint': 'auth', 'endpoint': '/api/auth/login', 'method': 'POST'}
+        before_ok = sample('sdc_http_requests_total', status='200', **labels)
+        before_denied = sample('sdc_http_requests_total', status='401', **labels)
+        before_observed = sample('sdc_http_request_duration_seconds_count', **labels)
+
+        client.post('/api/auth/login', json={'email': 'donor@test.com', 'password': 'secret123'})
+        client.post('/api/auth/login', json={'email': 'donor@test.com', 'password': 'wrong'})
+
+        assert sample('sdc_http_requests_total', status='200', **labels) == before_ok + 1
+        assert sample('sdc_http_requests_total', status='401', **labels) == before_denied + 1
+        assert sample('sdc_http_request_duration_seconds_count', **labels) == before_observed + 2
+
+    def test_unmatched_routes_share_a_label(self, client):
+        """Test 404s do not create a label per requested path"""
+        labels = {'blueprint': 'app', 'endpoint': 'unmatched', 'method': 'GET', 'status': '404'}
+        before = sample('sdc_http_requests_total', **labels)
+        client.get('/no/such/path/1')
+        client.get('/no/such/path/2')
+        assert sample('sdc_http_requests_total', **labels) == before + 2
+
+    def test_bcrypt_is_tracked(self, client):
+        """Test password checks report their duration and return to zero in flight"""
+        before = sample('sdc_blocking_duration_seconds_count', operation='bcrypt_check')
+        client.post('/api/auth/login', json={'email': 'donor@test.com', 'password': 'secret123'})
+        assert sample('sdc_blocking_duration_seconds_count', operation='bcrypt_check') == before + 1
+        assert sample('sdc_blocking_in_flight', operation='bcrypt_check') == 0
+
+    def test_db_pool_gauge(self, client):
+        """Test the pool gauge is published for the default bind"""
+        client.get('/api/marketplace/surrogates')
+        assert REGISTRY.get_sample_value('sdc_db_pool_checked_out', {'bind': 'default'}) is not None
+
+    def test_socket_rooms(self):
+        """Test socket bookkeeping counts clients, memberships and distinct rooms"""
+        # Relative to whatever other tests left connected
+        clients = sample('sdc_socketio_connected_clients')
+        memberships = sample('sdc_socketio_room_memberships')
+        rooms = sample('sdc_socketio_rooms')
+        metrics.socket_connected('sid-a')
+        metrics.socket_connected('sid-b')
+        metrics.socket_joined('sid-a', 'test-conv-1')
+        metrics.socket_joined('sid-b', 'test-conv-1')
+        metrics.socket_joined('sid-b', 'test-conv-2')
+        assert sample('sdc_socketio_connected_clients') == clients + 2
+        assert sample('sdc_socketio_room_memberships') == memberships + 3
+        assert sample('sdc_socketio_rooms') == rooms + 2
+
+        metrics.socket_left('sid-b', 'test-conv-2')
+        metrics.socket_disconnected('sid-a')
+        assert sample('sdc_socketio_rooms') == rooms + 1
+        metrics.socket_disconnected('sid-b')
+        assert sample('sdc_socketio_connected_clients') == clients
+        assert sample('sdc_socketio_room_memberships') == memberships
+        assert sample('sdc_socketio_rooms') == rooms
@@ -0,0 +1,139 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+from datetime import date
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+
+from migrate import migrate, alembic_config
+from src.app import create_app
+from src.models import db
+
+
+class TestMigrations:
+    """Test the Alembic migrations produce the schema the models describe"""
+
+    @pytest.fixture
+    def app(self):
+        """Create an app bound to an empty database"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars'
+        })
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    def run(self, app, func, *args):
+        with app.app_context():
+            with db.engine.connect() as connection:
+                func(alembic_config(connection), *args)
+                connection.commit()
+
+    def schema_diff(self, app):
+        with app.app_context():
+            with db.engine.connect() as connection:
+                context = MigrationContext.configure(connection, opts={'compare_type': True})
+                return compare_metadata(context, db.metadata)
+
+    def head(self):
+        return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+    def test_models_match_migrations(self, app):
+        """Test upgrading an empty database to head yields exactly the models' schema"""
+        migrate(app)
+        assert self.schema_diff(app) == []
+
+    def test_legacy_database_stamped_and_backfilled(self, app):
+        """Test a pre-migration database is stamped at the baseline and caught up"""
+        self.run(app, command.upgrade, '0001')
+        with app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(text('DROP TABLE alembic_version'))
+                connection.execute(text(
+                    "INSERT INTO kyc_documents (id, user_id, role, form_data) VALUES ('k1', 'u1', 'surrogate', :form_data)"
+                ), {'form_data': json.dumps({
+                    'personal': {'dob': '01/02/1990', 'location': 'Lagos'},
+                    'medical': {'blood_group': 'o+'}
+                })})
+
+        migrate(app)
+
+        assert self.schema_diff(app) == []
+        with app.app_context():
+            with db.engine.connect() as connection:
+                assert connection.execute(text('SELECT version_num FROM alembic_version')).scalar() == self.head()
+                row = connection.execute(text(
+                    'SELECT location, date_of_birth, blood_group, version FROM kyc_documents'
+                )).one()
+        assert tuple(row) == ('Lagos', str(date(1990, 2, 1)), 'O+', 1)
+
+    def test_legacy_users_get_referral_constraints(self, app):
+        """Test a stamped database whose users table lacks the referral index and FK is caught up"""
+        self.run(app, command.upgrade, '0001')
+        with app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(text('DROP TABLE alembic_version'))
+                # The users table as the old hand-written ALTERs left it
+                connection.execute(text('DROP INDEX ix_users_referral_code'))
+                connection.execute(text('PRAGMA legacy_alter_table = ON'))
+                connection.execute(text('ALTER TABLE users RENAME TO users_old'))
+                connection.execute(text(
+                    'CREATE TABLE users (id VARCHAR(36) NOT NULL, role VARCHAR(50) NOT NULL, email VARCHAR(255) NOT NULL, '
+                    'username VARCHAR(255) NOT NULL, password_hash VARCHAR(255), first_name VARCHAR(255), '
+                    'last_name VARCHAR(255), is_verified BOOLEAN, is_active BOOLEAN, created_at DATETIME, '
+                    'reset_code VARCHAR(6), reset_code_expires_at DATETIME, profile_image VARCHAR(500), '
+                    'referral_code VARCHAR(20), referred_by_id VARCHAR(36), PRIMARY KEY (id), '
+                    'CONSTRAINT uq_user_email_role UNIQUE (email, role), '
+                    'CONSTRAINT uq_user_username_role UNIQUE (username, role))'
+                ))
+                connection.execute(text('DROP TABLE users_old'))
+                connection.execute(text('PRAGMA legacy_alter_table = OFF'))
+                connection.execute(text(
+                    "INSERT INTO users (id, role, email, username, referral_code, referred_by_id) VALUES "
+                    "('u1', 'donor', 'a@x.com', 'a', 'CODE', NULL), "
+                    "('u2', 'donor', 'b@x.com', 'b', 'CODE', 'u1'), "
+                    "('u3', 'donor', 'c@x.com', 'c', NULL, 'gone')"
+                ))
+
+        migrate(app)
+
+        assert self.schema_diff(app) == []
+        with app.app_context():
+            with db.engine.connect() as connection:
+                rows = connection.execute(text('SELECT id, referral_code, referred_by_id FROM users ORDER BY id')).all()
+        assert [tuple(r) for r in rows] == [('u1', 'CODE', None), ('u2', None, 'u1'), ('u3', None, None)]
+
+    def test_create_all_database_upgrades_cleanly(self, app):
+        """Test a database created from the current models survives stamping and upgrade"""
+        with app.app_context():
+            db.create_all()
+        migrate(app)
+        assert self.schema_diff(app) == []
+
+    def test_downgrade_round_trip(self, app):
+        """Test every revision downgrades and upgrades again"""
+        migrate(app)
+        self.run(app, command.downgrade, 'base')
+        with app.app_context():
+            assert inspect(db.engine).get_table_names() == ['alembic_version']
+        self.run(app, command.upgrade, 'head')
+        assert self.schema_diff(app) == []
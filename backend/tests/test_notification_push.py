@@ -0,0 +1,246 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import text
+
+from src.app import create_app
+from src.models import db, Notification
+from src.services.notifications import create_notification, create_notifications
+
+
+class TestNotificationPush:
+    """Test notifications are pushed to per-user rooms, counted and paginated"""
+
+    @pytest.fixture
+    def app(self):
+        """Create an app with a Socket.IO server; yielded outside any app context"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars'
+        })
+        with app.app_context():
+            db.create_all()
+
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        return app.test_client()
+
+    @pytest.fixture(autouse=True)
+    def open_sockets(self):
+        """Disconnect every socket a test opened, so its rooms do not leak into the socket metrics"""
+        self.sockets = []
+        yield self.sockets
+        for socket in self.sockets:
+            if socket.is_connected():
+                socket.disconnect()
+
+    def token(self, app, user_id, refresh=False):
+        with app.app_context():
+            return (create_refresh_token if refresh else create_access_token)(identity=user_id)
+
+    def socket(self, app, **kwargs):
+        socket = app.extensions['socketio'].test_client(app, **kwargs)
+        self.sockets.append(socket)
+        return socket
+
+    def pushed(self, socket):
+        return [event['args'][0] for event in socket.get_received() if event['name'] == 'notification']
+
+    def test_pushed_to_the_users_room_after_commit(self, app):
+        """Test only the recipient's authenticated sockets receive the notification, once committed"""
+        alice = self.socket(app, auth={'token': self.token(app, 'alice')})
+        alice_query = self.socket(app, query_string=f"token={self.token(app, 'alice')}")
+        bob = self.socket(app, auth={'token': self.token(app, 'bob')})
+        anonymous = self.socket(app)
+        for socket in (alice, alice_query, bob, anonymous):
+            socket.get_received()
+
+        with app.app_context():
+            notification = create_notification('alice', 'KYC approved', 'You are verified')
+            assert self.pushed(alice) == []
+            db.session.commit()
+            notification_id = notification.id
+
+        for socket in (alice, alice_query):
+            [payload] = self.pushed(socket)
+            assert payload['id'] == notification_id
+            assert payload['title'] == 'KYC approved'
+            assert payload['status'] == 'unread'
+        assert self.pushed(bob) == []
+        assert self.pushed(anonymous) == []
+
+    def test_rollback_pushes_nothing(self, app):
+        """Test a rolled-back transaction discards its pending pushes"""
+        alice = self.socket(app, auth={'token': self.token(app, 'alice')})
+        alice.get_received()
+
+        with app.app_context():
+            create_notifications(['alice', 'bob'], 'Hello', 'Body')
+            db.session.rollback()
+            db.session.commit()
+            assert Notification.query.count() == 0
+        assert self.pushed(alice) == []
+
+    def test_bad_tokens_do_not_join_a_user_room(self, app):
+        """Test invalid and refresh tokens connect without joining the user's room"""
+        sockets = [
+            self.socket(app, auth={'token': 'not-a-jwt'}),
+            self.socket(app, auth={'token': self.token(app, 'alice', refresh=True)}),
+        ]
+        for socket in sockets:
+            assert socket.is_connected()
+            socket.get_received()
+
+        with app.app_context():
+            create_notification('alice', 'Hello', 'Body')
+            db.session.commit()
+        for socket in sockets:
+            assert self.pushed(socket) == []
+
+    def test_bulk_create_pushes_each_user(self, app):
+        """Test create_notifications inserts one row per distinct user and pushes each"""
+        alice = self.socket(app, auth={'token': self.token(app, 'alice')})
+        bob = self.socket(app, auth={'token': self.token(app, 'bob')})
+        alice.get_received()
+        bob.get_received()
+
+        with app.app_context():
+            assert create_notifications(['alice', 'bob', 'alice'], 'Maintenance', 'Tonight', severity='warning') == 2
+            db.session.commit()
+            assert Notification.query.count() == 2
+
+        [payload] = self.pushed(alice)
+        assert payload['severity'] == 'warning'
+        assert len(self.pushed(bob)) == 1
+
+    def test_unread_count(self, app, client):
+        """Test the unread count covers only the caller's unread notifications"""
+        with app.app_context():
+            for i in range(3):
+                create_notification('alice', f'N{i}', 'Body')
+            create_notification('bob', 'Other', 'Body')
+            db.session.commit()
+            Notification.query.filter_by(title='N0').update({'status': 'read'})
+            db.session.commit()
+
+        response = client.get('/api/notifications/unread-count',
+                              headers={'Authorization': f"Bearer {self.token(app, 'alice')}"})
+        assert response.status_code == 200
+        assert json.loads(response.data) == {'unread_count': 2}
+
+    def test_unread_count_uses_partial_index(self, app):
+        """Test SQLite plans the unread count on the partial index"""
+        with app.app_context():
+            plan = db.session.execute(text(
+                "EXPLAIN QUERY PLAN SELECT count(id) FROM notifications WHERE user_id = :u AND status = 'unread'"
+            ), {'u': 'alice'}).all()
+        assert 'ix_notifications_user_unread' in ' '.join(str(row[-1]) for row in plan)
+
+    def test_history_cursor_pagination(self, app, client):
+        """Test the history pages newest-first through X-Next-Cursor without gaps or repeats"""
+        start = datetime(2026, 1, 1)
+        with app.app_context():
+            for i in range(7):
+                notification = create_notification('alice', f'N{i}', 'Body')
+                # Two rows share a timestamp so the id tie-breaker is exercised
+                notification.created_at = start + timedelta(minutes=min(i, 5))
+            create_notification('bob', 'Other', 'Body')
+            db.session.commit()
+
+        headers = {'Authorization': f"Bearer {self.token(app, 'alice')}", 'Origin': 'http://localhost:8081'}
+        seen = []
+        url = '/api/notifications?limit=3'
+        while True:
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200
+            assert 'X-Next-Cursor' in response.headers.get('Access-Control-Expose-Headers', '')
+            page = json.loads(response.data)
+            assert len(page) <= 3
+            seen.extend(page)
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            url = f'/api/notifications?limit=3&cursor={cursor}'
+
+        assert len(seen) == 7
+        assert len({n['id'] for n in seen}) == 7
+        assert {n['user_id'] for n in seen} == {'alice'}
+        keys = [(n['created_at'], n['id']) for n in seen]
+        assert keys == sorted(keys, reverse=True)
+
+    def test_history_rejects_bad_cursor(self, app, client):
+        """Test a malformed cursor is a 400"""
+        response = client.get('/api/notifications?cursor=garbage',
+                              headers={'Authorization': f"Bearer {self.token(app, 'alice')}"})
+        assert response.status_code == 400
+
+    def seed_history(self, app, user_id, count, start=datetime(2026, 1, 1)):
+        with app.app_context():
+            notifications = [create_notification(user_id, f'N{i}', 'Body') for i in range(count)]
+            for i, notification in enumerate(notifications):
+                notification.created_at = start + timedelta(minutes=i)
+            db.session.commit()
+            return [n.id for n in notifications]
+
+    def test_mark_read_by_ids(self, app, client):
+        """Test listed ids are marked read in one call, skipping other users' notifications"""
+        ids = self.seed_history(app, 'alice', 4)
+        [bobs] = self.seed_history(app, 'bob', 1)
+
+        response = client.put('/api/notifications/read', json={'ids': ids[:2] + [bobs, 'missing']},
+                              headers={'Authorization': f"Bearer {self.token(app, 'alice')}"})
+        data = json.loads(response.data)
+        assert response.status_code == 200
+        assert (data['updated'], data['unread_count']) == (2, 2)
+        with app.app_context():
+            assert {n.id for n in Notification.query.filter_by(status='read')} == set(ids[:2])
+
+    def test_mark_read_before_cursor(self, app, client):
+        """Test the before cursor marks that notification and every older one with a single UPDATE"""
+        self.seed_history(app, 'alice', 5)
+        headers = {'Authorization': f"Bearer {self.token(app, 'alice')}"}
+        page = json.loads(client.get('/api/notifications', headers=headers).data)
+        assert [n['title'] for n in page] == ['N4', 'N3', 'N2', 'N1', 'N0']
+
+        with app.app_context():
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            db.event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response = client.put('/api/notifications/read', json={'before': page[2]['cursor']}, headers=headers)
+        finally:
+            with app.app_context():
+                db.event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert json.loads(response.data)['updated'] == 3
+        assert len([s for s in statements if s.startswith('UPDATE')]) == 1
+        page = json.loads(client.get('/api/notifications', headers=headers).data)
+        assert [n['status'] for n in page] == ['unread', 'unread', 'read', 'read', 'read']
+
+    @pytest.mark.parametrize('payload', [{}, {'ids': []}, {'ids': 'abc'}, {'ids': ['x'] * 501}, {'before': 'garbage'}])
+    def test_mark_read_rejects_bad_input(self, app, client, payload):
+        """Test missing, empty, oversized or malformed selections are a 400"""
+        response = client.put('/api/notifications/read', json=payload,
+                              headers={'Authorization': f"Bearer {self.token(app, 'alice')}"})
+        assert response.status_code == 400
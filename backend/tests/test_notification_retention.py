@@ -0,0 +1,111 @@
+import pytest
+import tempfile
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import insert, text
+
+from src.app import create_app
+from src.models import db, Notification, NotificationArchive
+from src.services.notifications import compact_notifications
+
+
+class TestNotificationRetention:
+    """Test old read notifications are compacted out of the hot table in batches"""
+
+    @pytest.fixture
+    def app(self):
+        """Create and configure a new app instance for each test"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'NOTIFICATION_RETENTION_DAYS': 30,
+            'NOTIFICATION_COMPACTION_BATCH_SIZE': 4
+        }, socketio=False)
+
+        with app.app_context():
+            db.create_all()
+            yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def history(self, app):
+        """10 old read, 3 old unread and 2 recent read notifications"""
+        now = datetime.utcnow()
+        rows = []
+        for i in range(15):
+            old = i < 13
+            rows.append({
+                'id': f'n{i:02d}',
+                'user_id': 'alice',
+                'title': f'N{i}',
+                'body': 'Body',
+                'severity': 'info',
+                'status': 'unread' if 10 <= i < 13 else 'read',
+                'created_at': now - timedelta(days=60 - i if old else 1)
+            })
+        db.session.execute(insert(Notification), rows)
+        db.session.commit()
+        return rows
+
+    def count_statements(self, func, *args, **kwargs):
+        statements = []
+        listener = lambda conn, cursor, statement, *rest: statements.append(statement)
+        db.event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            return func(*args, **kwargs), statements
+        finally:
+            db.event.remove(db.engine, 'before_cursor_execute', listener)
+
+    def test_archives_old_read_notifications_in_batches(self, app, history):
+        """Test only old read rows move to the archive, four per DELETE"""
+        removed, statements = self.count_statements(compact_notifications)
+
+        assert removed == 10
+        assert len([s for s in statements if s.startswith('DELETE')]) == 3
+        assert sorted(n.id for n in Notification.query.all()) == ['n10', 'n11', 'n12', 'n13', 'n14']
+        archived = {a.id: a for a in NotificationArchive.query.all()}
+        assert sorted(archived) == [f'n{i:02d}' for i in range(10)]
+        assert archived['n03'].title == 'N3'
+        assert archived['n03'].created_at == history[3]['created_at']
+        assert archived['n03'].archived_at is not None
+
+    def test_delete_mode(self, app, history):
+        """Test archive=False deletes without copying"""
+        assert compact_notifications(archive=False) == 10
+        assert Notification.query.count() == 5
+        assert NotificationArchive.query.count() == 0
+
+    def test_nothing_to_do(self, app, history):
+        """Test a longer retention window leaves everything in place"""
+        assert compact_notifications(retention_days=365) == 0
+        assert Notification.query.count() == 15
+
+    def test_batches_use_partial_index(self, app):
+        """Test SQLite picks the oldest read rows from ix_notifications_read_created_at"""
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM notifications WHERE status = 'read' AND created_at < :cutoff "
+            "ORDER BY created_at LIMIT 4"
+        ), {'cutoff': datetime.utcnow()}).all()
+        assert 'ix_notifications_read_created_at' in ' '.join(str(row[-1]) for row in plan)
+
+    def test_cli(self, app, history):
+        """Test flask sdc compact-notifications honours --days and --delete"""
+        result = app.test_cli_runner().invoke(args=['sdc', 'compact-notifications', '--days', '55', '--delete'])
+        assert result.exit_code == 0, result.output
+        assert 'Compacted 6 notifications' in result.output
+        assert NotificationArchive.query.count() == 0
@@ -0,0 +1,319 @@
+import pytest
+import copy
+import hashlib
+import hmac
+import json
+import tempfile
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.models import db, PaymentEvent, WalletTransaction, EscrowTransaction, Subscription, Notification
+from src.services import payments
+from src.services.payments import process_pending_events
+
+SECRET = 'sk_test_webhook_secret'
+
+# Trimmed from deliveries recorded against a Paystack test-mode account
+RECORDED_EVENTS = {
+    'topup': {
+        'event': 'charge.success',
+        'data': {
+            'id': 3719826392, 'domain': 'test', 'status': 'success', 'reference': 'T603215598371913',
+            'amount': 1500000, 'gateway_response': 'Successful', 'paid_at': '2026-10-12T09:14:03.000Z',
+            'channel': 'card', 'currency': 'NGN', 'fees': 32500,
+            'metadata': {'user_id': 'u-1', 'purpose': 'wallet_topup'},
+            'customer': {'id': 148810121, 'email': 'ip@example.com', 'customer_code': 'CUS_8m1dsmvw7y4lzmi'},
+            'authorization': {'authorization_code': 'AUTH_ob6rcbq0nh', 'card_type': 'visa ', 'last4': '4081'}
+        }
+    },
+    'subscription': {
+        'event': 'charge.success',
+        'data': {
+            'id': 3719830417, 'domain': 'test', 'status': 'success', 'reference': 'SUB-MONTHLY-1760260800000',
+            'amount': 2000000, 'gateway_response': 'Successful', 'paid_at': '2026-10-12T09:20:00.000Z',
+            'channel': 'card', 'currency': 'NGN',
+            'metadata': {'user_id': 'agency-1', 'plan': 'monthly', 'purpose': 'agency_subscription'},
+            'customer': {'id': 148810122, 'email': 'agency@sdc-platform.com'}
+        }
+    },
+    'escrow': {
+        'event': 'charge.success',
+        'data': {
+            'id': 3719833051, 'domain': 'test', 'status': 'success', 'reference': 'ESC-7f41c2',
+            'amount': 50000000, 'currency': 'NGN', 'channel': 'bank_transfer', 'metadata': 0,
+            'customer': {'id': 148810123, 'email': 'ip@example.com'}
+        }
+    },
+    'refund': {
+        'event': 'refund.processed',
+        'data': {
+            'status': 'processed', 'transaction_reference': 'ESC-7f41c2', 'amount': '50000000',
+            'currency': 'NGN', 'customer': {'email': 'ip@example.com'}, 'refund_reference': 'RF-229311'
+        }
+    },
+    'transfer': {
+        'event': 'transfer.success',
+        'data': {'reference': 'TRF-1', 'amount': 100000, 'currency': 'NGN'}
+    },
+}
+
+
+class PaystackStandIn:
+    """Signs recorded events the way Paystack does and delivers them to the webhook.
+
+    ``deliver_many`` sends from several threads at once, as Paystack does when
+    it catches up on a backlog.
+    """
+
+    def __init__(self, app, secret=SECRET):
+        self.app = app
+        self.secret = secret
+
+    def sign(self, body):
+        return hmac.new(self.secret.encode(), body, hashlib.sha512).hexdigest()
+
+    def deliver(self, event, signature=None, client=None):
+        body = json.dumps(event).encode()
+        return (client or self.app.test_client()).post(
+            '/api/payments/paystack/webhook', data=body, content_type='application/json',
+            headers={'X-Paystack-Signature': signature or self.sign(body)})
+
+    def deliver_many(self, events, threads=8):
+        statuses = []
+        lock = threading.Lock()
+
+        def send(chunk):
+            client = self.app.test_client()
+            for event in chunk:
+                status = self.deliver(event, client=client).status_code
+                with lock:
+                    statuses.append(status)
+
+        workers = [threading.Thread(target=send, args=(events[i::threads],)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return statuses
+
+
+def topup(reference, user_id='u-1', kobo=1500000):
+    event = copy.deepcopy(RECORDED_EVENTS['topup'])
+    event['data'].update(reference=reference, amount=kobo)
+    event['data']['metadata']['user_id'] = user_id
+    return event
+
+
+class TestPaystackWebhook:
+    """Test Paystack webhooks are verified, stored, acknowledged and processed once"""
+
+    @pytest.fixture
+    def app(self):
+        """Create an app that processes events inline"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'JOB_QUEUE_EAGER': True,
+            'PAYSTACK_SECRET_KEY': SECRET,
+            'PAYMENT_EVENT_MAX_ATTEMPTS': 3
+        }, socketio=False)
+        with app.app_context():
+            db.create_all()
+
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def paystack(self, app):
+        return PaystackStandIn(app)
+
+    def events(self, app):
+        with app.app_context():
+            return {(e.event, e.reference): (e.status, e.attempts) for e in PaymentEvent.query.all()}
+
+    def test_rejects_bad_signatures(self, app, paystack):
+        """Test unsigned, wrongly signed and unconfigured deliveries are refused and not stored"""
+        event = RECORDED_EVENTS['topup']
+        assert paystack.deliver(event, signature='0' * 128).status_code == 401
+        assert PaystackStandIn(app, secret='sk_other').deliver(event).status_code == 401
+        assert app.test_client().post('/api/payments/paystack/webhook', json=event).status_code == 401
+        app.config['PAYSTACK_SECRET_KEY'] = None
+        assert paystack.deliver(event).status_code == 401
+        assert self.events(app) == {}
+
+    def test_rejects_malformed_body(self, app, paystack):
+        """Test a signed body that is not an event is a 400"""
+        assert paystack.deliver(['not', 'an', 'event']).status_code == 400
+
+    def test_wallet_topup(self, app, paystack):
+        """Test charge.success for a top-up credits the wallet once and notifies the user"""
+        event = RECORDED_EVENTS['topup']
+        assert paystack.deliver(event).status_code == 200
+        assert paystack.deliver(event).status_code == 200
+
+        with app.app_context():
+            [credit] = WalletTransaction.query.all()
+            assert (credit.user_id, credit.amount, credit.type, credit.status) == \
+                ('u-1', Decimal('15000'), 'payment', 'completed')
+            assert Notification.query.filter_by(user_id='u-1', title='Wallet funded').count() == 1
+            [stored] = PaymentEvent.query.all()
+            assert json.loads(stored.payload) == event
+        assert self.events(app) == {('charge.success', 'T603215598371913'): ('processed', 1)}
+
+    def test_subscription_activated_and_renewal_extends_it(self, app, paystack):
+        """Test a subscription payment activates the plan and a renewal starts when it ends"""
+        paystack.deliver(RECORDED_EVENTS['subscription'])
+        renewal = copy.deepcopy(RECORDED_EVENTS['subscription'])
+        renewal['data']['reference'] = 'SUB-MONTHLY-1762939200000'
+        paystack.deliver(renewal)
+
+        with app.app_context():
+            first, second = Subscription.query.order_by(Subscription.expires_at).all()
+            assert (first.user_id, first.plan, first.status, first.amount) == ('agency-1', 'monthly', 'active', Decimal('20000'))
+            assert second.expires_at - first.expires_at == timedelta(days=30)
+
+    def test_underpaid_subscription_is_not_activated(self, app, paystack):
+        """Test a payment below the plan's price, or in another currency, activates nothing"""
+        underpaid = copy.deepcopy(RECORDED_EVENTS['subscription'])
+        underpaid['data'].update(reference='SUB-YEARLY-1', amount=100)
+        underpaid['data']['metadata']['plan'] = 'yearly'
+        dollars = copy.deepcopy(RECORDED_EVENTS['subscription'])
+        dollars['data'].update(reference='SUB-MONTHLY-USD', currency='USD')
+        assert paystack.deliver(underpaid).status_code == 200
+        assert paystack.deliver(dollars).status_code == 200
+
+        with app.app_context():
+            assert Subscription.query.count() == 0
+            assert 'costs NGN 200000' in PaymentEvent.query.filter_by(reference='SUB-YEARLY-1').one().error
+        assert self.events(app) == {('charge.success', 'SUB-YEARLY-1'): ('ignored', 1),
+                                    ('charge.success', 'SUB-MONTHLY-USD'): ('ignored', 1)}
+
+    def test_pending_rows_settled_and_refunded(self, app, paystack):
+        """Test charge.success funds a pending escrow and refund.processed reverses it"""
+        with app.app_context():
+            db.session.add(EscrowTransaction(user_id='u-1', amount=500000, type='contract', status='pending', reference='ESC-7f41c2'))
+            db.session.add(WalletTransaction(user_id='u-2', amount=100, type='payment', status='pending', reference='T-pending'))
+            db.session.commit()
+
+        paystack.deliver(RECORDED_EVENTS['escrow'])
+        paystack.deliver(topup('T-pending', user_id='u-2', kobo=10000))
+        with app.app_context():
+            assert EscrowTransaction.query.one().status == 'held'
+            assert WalletTransaction.query.one().status == 'completed'
+
+        paystack.deliver(RECORDED_EVENTS['refund'])
+        with app.app_context():
+            assert EscrowTransaction.query.one().status == 'refunded'
+
+    def test_unhandled_events_are_ignored(self, app, paystack):
+        """Test events with no handler are stored and marked ignored"""
+        assert paystack.deliver(RECORDED_EVENTS['transfer']).status_code == 200
+        assert self.events(app) == {('transfer.success', 'TRF-1'): ('ignored', 1)}
+
+    def test_failures_retry_then_fail(self, app, paystack, monkeypatch):
+        """Test a failing handler is retried up to PAYMENT_EVENT_MAX_ATTEMPTS and can be retried later"""
+        calls = []
+
+        def broken(data):
+            calls.append(data['reference'])
+            raise RuntimeError('ledger unavailable')
+
+        monkeypatch.setitem(payments.HANDLERS, 'charge.success', broken)
+        assert paystack.deliver(RECORDED_EVENTS['topup']).status_code == 200
+        assert len(calls) == 3
+        with app.app_context():
+            event = PaymentEvent.query.one()
+            assert (event.status, event.attempts) == ('failed', 3)
+            assert 'ledger unavailable' in event.error
+
+        monkeypatch.undo()
+        with app.app_context():
+            assert process_pending_events(older_than=0) == 0
+            assert process_pending_events(older_than=0, retry_failed=True) == 1
+            assert WalletTransaction.query.count() == 1
+        assert self.events(app) == {('charge.success', 'T603215598371913'): ('processed', 1)}
+
+    def test_high_volume_replay_with_redeliveries(self, app, paystack):
+        """Test 300 top-ups, each delivered three times from 8 threads, credit exactly 300 wallets"""
+        events = [topup(f'T-{i:04d}', user_id=f'u-{i % 50}', kobo=100000) for i in range(300)]
+        started = time.perf_counter()
+        statuses = paystack.deliver_many(events * 3)
+        elapsed = time.perf_counter() - started
+
+        assert statuses == [200] * 900
+        with app.app_context():
+            assert PaymentEvent.query.count() == 300
+            assert PaymentEvent.query.filter_by(status='processed').count() == 300
+            assert WalletTransaction.query.count() == 300
+            assert db.session.query(db.func.sum(WalletTransaction.amount)).scalar() == Decimal('300000')
+        print(f'\n900 deliveries in {elapsed:.2f}s')
+
+
+class TestPaystackWebhookQueue:
+    """Test the webhook acknowledges before processing when jobs run on worker threads"""
+
+    @pytest.fixture
+    def app(self):
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'PAYSTACK_SECRET_KEY': SECRET
+        }, socketio=False)
+        with app.app_context():
+            db.create_all()
+
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    def test_processed_in_the_background(self, app, monkeypatch):
+        """Test the 200 comes back while the handler is still blocked, then the event completes"""
+        release = threading.Event()
+        handler = payments.HANDLERS['charge.success']
+
+        def slow(data):
+            release.wait(5)
+            handler(data)
+
+        monkeypatch.setitem(payments.HANDLERS, 'charge.success', slow)
+        assert PaystackStandIn(app).deliver(RECORDED_EVENTS['topup']).status_code == 200
+        with app.app_context():
+            assert PaymentEvent.query.one().status == 'pending'
+
+        release.set()
+        deadline = datetime.utcnow() + timedelta(seconds=5)
+        while datetime.utcnow() < deadline:
+            with app.app_context():
+                if PaymentEvent.query.one().status == 'processed':
+                    break
+            time.sleep(0.05)
+        with app.app_context():
+            assert PaymentEvent.query.one().status == 'processed'
+            assert WalletTransaction.query.one().status == 'completed'
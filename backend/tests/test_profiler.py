@@ -0,0 +1,167 @@
+import pytest
+import json
+import tempfile
+import os
+import subprocess
+import sys
+import textwrap
+import time
+import bcrypt
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.models import db, User
+from src.profiler import route_captures
+
+
+def slow_view():
+    time.sleep(0.05)
+    return {'ok': True}
+
+
+# Run in a fresh interpreter: monkey-patching cannot be undone in the test process
+EVENTLET_SCRIPT = textwrap.dedent('''
+    import eventlet
+    eventlet.monkey_patch()
+
+    import os, sys, tempfile, time
+    sys.path.insert(0, sys.argv[1])
+    from src.app import create_app
+    from src.models import db
+    from src.profiler import sample_worker
+
+    def busy_view():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+        return {'ok': True}
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+                      'SECRET_KEY': 'x', 'JWT_SECRET_KEY': 'x' * 32, 'PROFILER_INTERVAL': 0.001}, socketio=False)
+    app.add_url_rule('/busy', 'busy', busy_view)
+
+    profile = app.test_client().get('/busy?__profile=1').get_data(as_text=True)
+    assert '__main__:busy_view' in profile, profile
+
+    ticks = []
+    def tick():
+        for _ in range(10):
+            ticks.append(1)
+            time.sleep(0.01)
+    eventlet.spawn(tick)
+    sample_worker(0.2, interval=0.005)
+    assert len(ticks) == 10, ticks
+    os.close(db_fd)
+    os.unlink(db_path)
+    print('ok')
+''')
+
+
+class TestProfiler:
+    """Test the admin sampling profiler and ?__profile=1"""
+
+    @pytest.fixture
+    def app(self):
+        """Create and configure a new app instance for each test"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'PROFILING_ENABLED': True,
+            'PROFILER_INTERVAL': 0.001
+        })
+        app.add_url_rule('/slow', 'slow', slow_view)
+
+        route_captures.clear()
+        with app.app_context():
+            db.create_all()
+            for role in ('admin', 'donor'):
+                db.session.add(User(email=f'{role}@test.com', username=role, role=role,
+                                    password_hash=bcrypt.hashpw(b'secret123', bcrypt.gensalt(4)).decode('utf-8'),
+                                    is_verified=True, is_active=True))
+            db.session.commit()
+
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        """Create a test client"""
+        return app.test_client()
+
+    def login(self, client, role):
+        response = client.post('/api/auth/login', json={'email': f'{role}@test.com', 'password': 'secret123'})
+        return {'Authorization': f"Bearer {json.loads(response.data)['access_token']}"}
+
+    def test_inline_profile(self, client):
+        """Test ?__profile=1 replaces the response with the request's collapsed stacks"""
+        response = client.get('/slow?__profile=1')
+        assert response.mimetype == 'text/plain'
+        assert response.headers['X-Profiled-Status'] == '200'
+        lines = response.get_data(as_text=True).splitlines()
+        assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+        assert any('test_profiler:slow_view' in line for line in lines)
+
+    def test_inline_profile_needs_debug_or_testing(self, app, client):
+        """Test ?__profile=1 is ignored in production configs"""
+        app.testing = False
+        app.debug = False
+        response = client.get('/slow?__profile=1')
+        assert response.is_json
+
+    def test_sample_worker(self, client):
+        """Test admins can sample the whole worker"""
+        response = client.post('/api/admin/profile', json={'seconds': 0.1, 'interval_ms': 1},
+                               headers=self.login(client, 'admin'))
+        assert response.status_code == 200
+        assert response.get_data(as_text=True).strip()
+
+    def test_non_admin_rejected(self, client):
+        """Test only admins can profile"""
+        response = client.post('/api/admin/profile', json={'seconds': 0.1}, headers=self.login(client, 'donor'))
+        assert response.status_code == 403
+
+    def test_disabled_by_default(self, app, client):
+        """Test the endpoints are hidden unless PROFILING_ENABLED"""
+        headers = self.login(client, 'admin')
+        app.config['PROFILING_ENABLED'] = False
+        assert client.post('/api/admin/profile', json={'seconds': 0.1}, headers=headers).status_code == 404
+
+    def test_route_capture(self, client):
+        """Test the next N requests to an armed route are profiled and aggregated"""
+        headers = self.login(client, 'admin')
+        response = client.post('/api/admin/profile/routes', json={'rule': '/slow', 'requests': 2}, headers=headers)
+        assert response.status_code == 202
+        for _ in range(3):
+            assert client.get('/slow').is_json
+
+        response = client.get('/api/admin/profile/routes', query_string={'rule': '/slow'}, headers=headers)
+        assert response.headers['X-Profiled-Requests'] == '2'
+        assert response.headers['X-Profile-Remaining'] == '0'
+        assert 'test_profiler:slow_view' in response.get_data(as_text=True)
+
+    def test_under_eventlet(self):
+        """Test request profiles sample the worker's OS thread and sample_worker yields to the hub"""
+        pytest.importorskip('eventlet')
+        backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-c', EVENTLET_SCRIPT, backend],
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr[-3000:]
+        assert result.stdout.strip().endswith('ok')
+
+    def test_route_capture_validates_rule(self, client):
+        """Test arming an unknown rule is rejected"""
+        response = client.post('/api/admin/profile/routes', json={'rule': '/nope'}, headers=self.login(client, 'admin'))
+        assert response.status_code == 400
@@ -0,0 +1,239 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask_jwt_extended import create_access_token
+
+from src.app import create_app
+from src.models import db, DeviceToken, Message
+from src.services.notifications import create_notifications
+
+
+class ExpoStandIn:
+    """A local stand-in for the Expo push API.
+
+    Tokens containing "Gone" fail at send time and tokens containing "Stale"
+    fail at receipt time, both with DeviceNotRegistered. Status codes queued in
+    ``failures`` are returned (one per request) before any real answer.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.failures = []
+        self.tickets = {}
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stand_in.requests.append((self.path, body))
+                if stand_in.failures:
+                    self.send_response(stand_in.failures.pop(0))
+                    self.end_headers()
+                    return
+                self.reply(stand_in.send(body) if self.path == '/send' else stand_in.receipts(body))
+
+            def reply(self, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def send(self, messages):
+        tickets = []
+        for message in messages:
+            if 'Gone' in message['to']:
+                tickets.append({'status': 'error', 'message': 'not registered', 'details': {'error': 'DeviceNotRegistered'}})
+            else:
+                ticket_id = f'ticket-{len(self.tickets)}'
+                self.tickets[ticket_id] = message['to']
+                tickets.append({'status': 'ok', 'id': ticket_id})
+        return {'data': tickets}
+
+    def receipts(self, body):
+        return {'data': {
+            ticket_id: {'status': 'error', 'message': 'not registered', 'details': {'error': 'DeviceNotRegistered'}}
+            if 'Stale' in self.tickets[ticket_id] else {'status': 'ok'}
+            for ticket_id in body['ids']
+        }}
+
+    def sent(self):
+        return [body for path, body in self.requests if path == '/send']
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestPush:
+    """Test device registration and batched Expo push delivery against a local stand-in"""
+
+    @pytest.fixture
+    def expo(self):
+        stand_in = ExpoStandIn()
+        yield stand_in
+        stand_in.close()
+
+    @pytest.fixture
+    def app(self, expo):
+        """Create an app that runs jobs inline and pushes to the stand-in"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'JOB_QUEUE_EAGER': True,
+            'PUSH_ENABLED': True,
+            'EXPO_PUSH_URL': f'{expo.url}/send',
+            'EXPO_RECEIPTS_URL': f'{expo.url}/receipts',
+            'PUSH_MAX_ATTEMPTS': 3
+        }, socketio=False)
+        with app.app_context():
+            db.create_all()
+
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        return app.test_client()
+
+    def headers(self, app, user_id):
+        with app.app_context():
+            return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+    def add_devices(self, app, tokens_by_user):
+        with app.app_context():
+            db.session.add_all(DeviceToken(user_id=user_id, token=token) for user_id, token in tokens_by_user)
+            db.session.commit()
+
+    def tokens(self, app):
+        with app.app_context():
+            return sorted(t.token for t in DeviceToken.query.all())
+
+    def test_register_and_remove_device(self, app, client):
+        """Test a token is registered, moves to the next user who registers it, and can be removed"""
+        token = 'ExponentPushToken[abc123]'
+        response = client.post('/api/notifications/devices', json={'token': token, 'platform': 'ios'},
+                               headers=self.headers(app, 'alice'))
+        assert response.status_code == 201
+        client.post('/api/notifications/devices', json={'token': token}, headers=self.headers(app, 'bob'))
+        with app.app_context():
+            [device] = DeviceToken.query.all()
+            assert device.user_id == 'bob'
+
+        assert client.delete('/api/notifications/devices', json={'token': token},
+                             headers=self.headers(app, 'alice')).status_code == 404
+        assert client.delete('/api/notifications/devices', json={'token': token},
+                             headers=self.headers(app, 'bob')).status_code == 200
+        assert self.tokens(app) == []
+
+    @pytest.mark.parametrize('payload', [{}, {'token': 'fcm-token'}, {'token': 'ExponentPushToken[x]', 'platform': 'nokia'}])
+    def test_register_rejects_bad_input(self, app, client, payload):
+        """Test non-Expo tokens and unknown platforms are refused"""
+        response = client.post('/api/notifications/devices', json=payload, headers=self.headers(app, 'alice'))
+        assert response.status_code == 400
+
+    def test_notifications_pushed_in_chunks_of_100(self, app, expo):
+        """Test 250 devices go out as 100 + 100 + 50 with one receipt check per chunk"""
+        self.add_devices(app, [(f'user-{i}', f'ExponentPushToken[{i}]') for i in range(250)])
+
+        with app.app_context():
+            create_notifications([f'user-{i}' for i in range(250)] + ['no-device'], 'Maintenance', 'Tonight')
+            db.session.commit()
+
+        assert [len(chunk) for chunk in expo.sent()] == [100, 100, 50]
+        assert expo.sent()[0][0] == {'to': 'ExponentPushToken[0]', 'title': 'Maintenance', 'body': 'Tonight',
+                                     'data': {'type': 'notification'}, 'sound': 'default'}
+        receipts = [body['ids'] for path, body in expo.requests if path == '/receipts']
+        assert sorted(len(ids) for ids in receipts) == [50, 100, 100]
+
+    def test_unregistered_tokens_are_removed(self, app, expo):
+        """Test DeviceNotRegistered in a ticket or a receipt deletes that token only"""
+        self.add_devices(app, [
+            ('alice', 'ExponentPushToken[ok]'),
+            ('alice', 'ExponentPushToken[Gone]'),
+            ('alice', 'ExponentPushToken[Stale]'),
+        ])
+        with app.app_context():
+            create_notifications(['alice'], 'Hello', 'Body')
+            db.session.commit()
+
+        assert len(expo.sent()[0]) == 3
+        assert self.tokens(app) == ['ExponentPushToken[ok]']
+
+    def test_transient_failures_are_retried(self, app, expo):
+        """Test a 503 is retried and the message still goes out"""
+        self.add_devices(app, [('alice', 'ExponentPushToken[ok]')])
+        expo.failures = [503]
+        with app.app_context():
+            create_notifications(['alice'], 'Hello', 'Body')
+            db.session.commit()
+
+        assert len(expo.sent()) == 2
+        assert len([path for path, _ in expo.requests if path == '/receipts']) == 1
+
+    def test_gives_up_after_max_attempts(self, app, expo):
+        """Test persistent failures stop at PUSH_MAX_ATTEMPTS and client errors are not retried"""
+        self.add_devices(app, [('alice', 'ExponentPushToken[ok]')])
+        expo.failures = [503] * 10
+        with app.app_context():
+            create_notifications(['alice'], 'Hello', 'Body')
+            db.session.commit()
+        assert len(expo.sent()) == 3
+
+        expo.requests.clear()
+        expo.failures = [400]
+        with app.app_context():
+            create_notifications(['alice'], 'Again', 'Body')
+            db.session.commit()
+        assert len(expo.sent()) == 1
+        assert self.tokens(app) == ['ExponentPushToken[ok]']
+
+    def test_chat_message_pushed_to_other_participants(self, app, client, expo):
+        """Test a new message is pushed to everyone else who posted in the conversation"""
+        self.add_devices(app, [('alice', 'ExponentPushToken[alice]'), ('bob', 'ExponentPushToken[bob]')])
+        with app.app_context():
+            db.session.add(Message(conversation_id='c1', sender_user_id='bob', content='Hi Alice'))
+            db.session.commit()
+
+        response = client.post('/api/messages', json={'conversation_id': 'c1', 'content': 'Hi Bob'},
+                               headers=self.headers(app, 'alice'))
+        assert response.status_code == 201
+        [[message]] = expo.sent()
+        assert message['to'] == 'ExponentPushToken[bob]'
+        assert message['body'] == 'Hi Bob'
+        assert message['data'] == {'type': 'message', 'conversation_id': 'c1'}
+
+    def test_disabled(self, app, expo):
+        """Test nothing is sent while PUSH_ENABLED is off"""
+        app.config['PUSH_ENABLED'] = False
+        self.add_devices(app, [('alice', 'ExponentPushToken[ok]')])
+        with app.app_context():
+            create_notifications(['alice'], 'Hello', 'Body')
+            db.session.commit()
+        assert expo.requests == []
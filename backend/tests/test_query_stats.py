@@ -0,0 +1,100 @@
+import pytest
+import json
+import logging
+import tempfile
+import os
+import sys
+import bcrypt
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.models import db, User, Surrogate, SurrogateProfile, KycDocument, VerificationBadge
+from src.services.badges import badge_cache
+
+
+class TestQueryStats:
+    """Test per-request query counting, slow-query logging and endpoint query budgets"""
+
+    @pytest.fixture
+    def app(self):
+        """Create and configure a new app instance for each test"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'SLOW_QUERY_MS': 10000
+        })
+
+        badge_cache.clear()
+        with app.app_context():
+            db.create_all()
+            for i in range(5):
+                user = User(email=f'surrogate{i}@test.com', username=f'surrogate{i}', role='surrogate',
+                            password_hash=bcrypt.hashpw(b'secret123', bcrypt.gensalt(4)).decode('utf-8'),
+                            is_verified=True, is_active=True)
+                db.session.add(user)
+                db.session.flush()
+                surrogate = Surrogate(user_id=user.id)
+                db.session.add(surrogate)
+                db.session.flush()
+                db.session.add(SurrogateProfile(surrogate_id=surrogate.id, location='Lagos', bio='Hi'))
+                db.session.add(KycDocument(user_id=user.id, role='surrogate', status='approved', form_data={}))
+                db.session.add(VerificationBadge(user_id=user.id, type='id_verified', status='approved'))
+            db.session.commit()
+            yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    @pytest.fixture
+    def client(self, app):
+        """Create a test client"""
+        return app.test_client()
+
+    @pytest.fixture
+    def headers(self, client):
+        response = client.post('/api/auth/login', json={'email': 'surrogate0@test.com', 'password': 'secret123'})
+        return {'Authorization': f"Bearer {json.loads(response.data)['access_token']}"}
+
+    def test_server_timing_header(self, client):
+        """Test responses report the query count and database time"""
+        response = client.get('/api/marketplace/surrogates')
+        timing = response.headers['Server-Timing']
+        assert timing.startswith('db;dur=')
+        assert 'desc="2 queries"' in timing
+
+    def test_marketplace_listing_budget(self, app, client, query_budget):
+        """Test the listing does not issue a query per surrogate"""
+        with query_budget(app, 2):
+            response = client.get('/api/marketplace/surrogates')
+        assert len(json.loads(response.data)) == 5
+
+    def test_marketplace_profile_budget(self, app, client, headers, query_budget):
+        """Test the profile loads user, KYC and surrogate profile in two queries"""
+        with app.app_context():
+            user_id = User.query.filter_by(email='surrogate1@test.com').first().id
+        with query_budget(app, 2):
+            response = client.get(f'/api/marketplace/profile/{user_id}', headers=headers)
+        data = json.loads(response.data)
+        assert data['kyc']['status'] == 'approved'
+        assert data['profile']['location'] == 'Lagos'
+
+    def test_slow_queries_logged_with_plan(self, app, client, caplog):
+        """Test statements over SLOW_QUERY_MS are logged with their EXPLAIN plan"""
+        slow_app = create_app({**app.config, 'SLOW_QUERY_MS': 0})
+        with caplog.at_level(logging.WARNING, logger='sdc.db'):
+            slow_app.test_client().get('/api/marketplace/surrogates')
+        slow = [r for r in caplog.records if r.getMessage().startswith('Slow query')]
+        assert slow
+        assert any(r.plan and ('SCAN' in r.plan or 'SEARCH' in r.plan) for r in slow)
+        with slow_app.app_context():
+            db.engine.dispose()
@@ -0,0 +1,110 @@
+import pytest
+import json
+import tempfile
+import os
+import sys
+import bcrypt
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.database import recent_writers
+from src.models import db, User, Notification, CommissionSetting
+
+
+class TestReadReplicas:
+    """Test read-only handlers are routed to a replica bind"""
+
+    @pytest.fixture
+    def app(self):
+        """Create an app with a primary and one replica database"""
+        primary_fd, primary_path = tempfile.mkstemp(suffix='.db')
+        replica_fd, replica_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary_path}',
+            'SQLALCHEMY_REPLICA_URIS': [f'sqlite:///{replica_path}'],
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'MAIL_SUPPRESS_SEND': True
+        })
+
+        recent_writers.clear()
+        with app.app_context():
+            db.create_all()
+            db.metadata.create_all(db.engines['replica_0'])
+            # The replica deliberately lags: it holds different rows from the primary
+            db.session.add(CommissionSetting(category='surrogacy', percent=10))
+            db.session.commit()
+            with db.engines['replica_0'].begin() as conn:
+                conn.execute(CommissionSetting.__table__.insert(), {'id': 'c1', 'category': 'surrogacy', 'percent': 5})
+            db.session.remove()
+
+        # Requests get their own app context (and session), as in production
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        # init_app registers a metadata per bind on the shared db; later apps have no replica
+        db.metadatas.pop('replica_0', None)
+        for fd, path in ((primary_fd, primary_path), (replica_fd, replica_path)):
+            os.close(fd)
+            os.unlink(path)
+
+    @pytest.fixture
+    def client(self, app):
+        """Create a test client"""
+        return app.test_client()
+
+    @pytest.fixture
+    def user_headers(self, client, app):
+        with app.app_context():
+            hashed_pw = bcrypt.hashpw(b'secret123', bcrypt.gensalt(4)).decode('utf-8')
+            user = User(
+                email='donor@test.com',
+                username='donor',
+                password_hash=hashed_pw,
+                role='donor',
+                is_verified=True,
+                is_active=True
+            )
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Notification(id='n1', user_id=user.id, title='Welcome', body='Hello'))
+            db.session.commit()
+        response = client.post('/api/auth/login', json={'email': 'donor@test.com', 'password': 'secret123'})
+        return {'Authorization': f"Bearer {json.loads(response.data)['access_token']}"}
+
+    def test_read_only_handler_uses_replica(self, client):
+        """Test marketplace reads are served by the replica"""
+        response = client.get('/api/marketplace/commission-settings')
+        assert json.loads(response.data) == {'surrogacy': 5.0}
+
+    def test_outside_requests_use_primary(self, app):
+        """Test code outside decorated handlers keeps using the primary"""
+        with app.app_context():
+            assert float(CommissionSetting.query.one().percent) == 10.0
+
+    def test_read_your_writes(self, client, user_headers):
+        """Test a user who just wrote reads from the primary"""
+        # Nothing has been replicated yet
+        assert json.loads(client.get('/api/notifications', headers=user_headers).data) == []
+
+        response = client.put('/api/notifications/n1/read', headers=user_headers)
+        assert response.status_code == 200
+
+        data = json.loads(client.get('/api/notifications', headers=user_headers).data)
+        assert [(n['id'], n['status']) for n in data] == [('n1', 'read')]
+        # Other callers are still served by the replica
+        assert json.loads(client.get('/api/marketplace/commission-settings').data) == {'surrogacy': 5.0}
+
+    def test_sticky_window_expires(self, app, client, user_headers):
+        """Test stickiness lasts only REPLICA_STICKY_SECONDS"""
+        app.config['REPLICA_STICKY_SECONDS'] = 0
+        client.put('/api/notifications/n1/read', headers=user_headers)
+        assert json.loads(client.get('/api/notifications', headers=user_headers).data) == []
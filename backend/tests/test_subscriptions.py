@@ -0,0 +1,155 @@
+import pytest
+import tempfile
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add backend to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.models import db, Agency, Subscription, Notification, ScheduledTask
+from src.services.scheduler import Scheduler
+from src.services.subscriptions import plan_cache, sweep_subscriptions
+
+
+class TestSubscriptions:
+    """Test the subscription sweep, the scheduler claiming it, and the effective plan lookup"""
+
+    @pytest.fixture
+    def app(self):
+        """Create an app with small sweep batches"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SECRET_KEY': 'test-secret-key',
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-change-this-32-chars',
+            'JOB_QUEUE_EAGER': True,
+            'SUBSCRIPTION_BATCH_SIZE': 7
+        }, socketio=False)
+        with app.app_context():
+            db.create_all()
+        plan_cache.clear()
+
+        yield app
+
+        plan_cache.clear()
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    def add(self, app, *rows):
+        with app.app_context():
+            db.session.add_all(rows)
+            db.session.commit()
+
+    def notifications(self, app, title):
+        with app.app_context():
+            return sorted(n.user_id for n in Notification.query.filter_by(title=title))
+
+    def test_lapsed_subscriptions_expire_in_batches(self, app):
+        """Test every lapsed plan is expired across several batches and only users left without a plan are notified"""
+        now = datetime.utcnow()
+        lapsed = [Subscription(user_id=f'u-{i}', plan='monthly', status='active', expires_at=now - timedelta(hours=i + 1))
+                  for i in range(20)]
+        # u-0 renewed in advance, so the renewal is still running
+        renewal = Subscription(id='renewal', user_id='u-0', plan='monthly', status='active',
+                               expires_at=now + timedelta(days=29))
+        self.add(app, *lapsed, renewal, Subscription(user_id='u-x', plan='yearly', status='cancelled',
+                                                     expires_at=now - timedelta(days=1)))
+
+        with app.app_context():
+            assert sweep_subscriptions() == (0, 20)
+            assert Subscription.query.filter_by(status='expired').count() == 20
+            assert Subscription.query.filter_by(status='active').one().id == 'renewal'
+            assert Subscription.query.filter_by(user_id='u-x').one().status == 'cancelled'
+        assert self.notifications(app, 'Subscription expired') == sorted(f'u-{i}' for i in range(1, 20))
+
+        with app.app_context():
+            assert sweep_subscriptions() == (0, 0)
+
+    def test_renewal_reminders_sent_once(self, app):
+        """Test plans ending within the notice period are reminded once, unless already renewed"""
+        now = datetime.utcnow()
+        self.add(app,
+                 Subscription(user_id='soon', plan='monthly', status='active', expires_at=now + timedelta(days=2)),
+                 Subscription(user_id='later', plan='monthly', status='active', expires_at=now + timedelta(days=10)),
+                 Subscription(user_id='renewed', plan='monthly', status='active', expires_at=now + timedelta(days=1)),
+                 Subscription(user_id='renewed', plan='monthly', status='active', expires_at=now + timedelta(days=31)))
+
+        with app.app_context():
+            assert sweep_subscriptions() == (1, 0)
+            assert Subscription.query.filter_by(user_id='soon').one().reminded_at is not None
+            assert sweep_subscriptions() == (0, 0)
+        assert self.notifications(app, 'Subscription ending soon') == ['soon']
+
+    def test_scheduler_runs_a_task_once_per_interval(self, app):
+        """Test two schedulers (two workers) sharing a database claim a due task only once"""
+        runs = []
+        first, second = Scheduler(), Scheduler()
+        for scheduler in (first, second):
+            scheduler.task('TEST_INTERVAL', 3600)(lambda: runs.append(1))
+
+        assert first.run_pending(app) == ['<lambda>']
+        assert second.run_pending(app) == []
+        assert first.run_pending(app) == []
+        assert runs == [1]
+
+        with app.app_context():
+            task = db.session.get(ScheduledTask, '<lambda>')
+            task.next_run_at = datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+        assert second.run_pending(app) == ['<lambda>']
+        assert runs == [1, 1]
+
+    def test_effective_plan(self, app, query_budget):
+        """Test the agency endpoint picks the running plan of the agency or its owner with one query"""
+        now = datetime.utcnow()
+        self.add(app,
+                 Agency(id='agency-1', owner_id='owner-1', name='Agency'),
+                 Subscription(id='old', user_id='agency-1', plan='monthly', status='expired',
+                              expires_at=now - timedelta(days=40)),
+                 Subscription(id='current', user_id='owner-1', plan='yearly', status='active',
+                              expires_at=now + timedelta(days=200)))
+        client = app.test_client()
+
+        with query_budget(app, 1):
+            response = client.get('/api/agencies/agency-1/subscription')
+        assert response.status_code == 200
+        assert (response.json['id'], response.json['plan'], response.json['status']) == ('current', 'yearly', 'active')
+
+        with query_budget(app, 0):
+            assert client.get('/api/agencies/agency-1/subscription').json['id'] == 'current'
+
+        assert client.get('/api/agencies/missing/subscription').status_code == 404
+        self.add(app, Agency(id='agency-2', name='No plan'))
+        response = client.get('/api/agencies/agency-2/subscription')
+        assert response.status_code == 200 and response.json is None
+
+    def test_effective_plan_cache_invalidated(self, app):
+        """Test expiring or buying a plan is visible straight away despite the cache"""
+        now = datetime.utcnow()
+        self.add(app, Agency(id='agency-1', owner_id='owner-1', name='Agency'),
+                 Subscription(id='ending', user_id='agency-1', plan='monthly', status='active',
+                              expires_at=now + timedelta(seconds=1)))
+        client = app.test_client()
+        assert client.get('/api/agencies/agency-1/subscription').json['status'] == 'active'
+
+        with app.app_context():
+            db.session.get(Subscription, 'ending').expires_at = now - timedelta(seconds=1)
+            db.session.commit()
+        # A plan past its end reports expired before the sweep gets to it
+        assert client.get('/api/agencies/agency-1/subscription').json['status'] == 'expired'
+
+        with app.app_context():
+            sweep_subscriptions()
+        assert client.get('/api/agencies/agency-1/subscription').json['status'] == 'expired'
+
+        self.add(app, Subscription(id='new', user_id='owner-1', plan='yearly', status='active',
+                                   expires_at=now + timedelta(days=365)))
+        assert client.get('/api/agencies/agency-1/subscription').json['id'] == 'new'
@@ -0,0 +1,41 @@
+"""Production entry point: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+Flask-SocketIO needs an async worker to hold WebSockets open. With the sync
+workers every client falls back to long-polling, and each poll ties up a
+whole worker. We run eventlet, and eventlet has to patch the standard library
+before anything else imports ``socket``, ``threading`` or ``ssl``. So the
+patching happens here, ahead of the app import. (gunicorn's eventlet worker
+patches too, but only after a ``--preload``ed app has been imported.)
+"""
+import eventlet
+
+eventlet.monkey_patch()
+
+import logging  # noqa: E402
+
+try:
+    # psycopg2 is a C extension that eventlet cannot patch; psycogreen makes it
+    # yield to the hub while waiting on PostgreSQL
+    from psycogreen.eventlet import patch_psycopg
+except ImportError:
+    patch_psycopg = None
+
+try:
+    import psycopg2  # noqa: F401
+except ImportError:
+    pass
+else:
+    if patch_psycopg:
+        patch_psycopg()
+    else:
+        logging.getLogger(__name__).warning(
+            'psycopg2 is installed without psycogreen: every query will block the whole worker'
+        )
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+from src.app import create_app  # noqa: E402
+
+app = create_app()
@@ -138,7 +138,7 @@ class BackendDeployer:
         # Install common packages that might be missing
         install_commands = [
             "source venv/bin/activate && pip install flask flask-cors flask-jwt-extended flask-socketio flask-sqlalchemy bcrypt python-dotenv",
-            "source venv/bin/activate && pip install gunicorn"
+            "source venv/bin/activate && pip install gunicorn eventlet"
         ]
         
         for cmd in install_commands:
@@ -168,6 +168,31 @@ class BackendDeployer:
         else:
             print("Admin user created successfully!")
 
+        # Nightly notification retention (see `flask sdc compact-notifications`)
+        print("Scheduling notification compaction...")
+        compact = f"cd {remote_path} && venv/bin/flask --app app sdc compact-notifications"
+        stdin, stdout, stderr = self.ssh_client.exec_command(
+            f"crontab -l 2>/dev/null | grep -q 'sdc compact-notifications' || "
+            f"(crontab -l 2>/dev/null; echo '30 3 * * * {compact} >> {remote_path}/compaction.log 2>&1') | crontab -"
+        )
+        stdout.channel.recv_exit_status()
+
+        # Hourly removal of expired Idempotency-Key responses (see `flask sdc purge-idempotency-keys`)
+        purge = f"cd {remote_path} && venv/bin/flask --app app sdc purge-idempotency-keys"
+        stdin, stdout, stderr = self.ssh_client.exec_command(
+            f"crontab -l 2>/dev/null | grep -q 'sdc purge-idempotency-keys' || "
+            f"(crontab -l 2>/dev/null; echo '15 * * * * {purge} >> {remote_path}/compaction.log 2>&1') | crontab -"
+        )
+        stdout.channel.recv_exit_status()
+
+        # Payment events whose job was lost in a restart (see `flask sdc process-payment-events`)
+        payments = f"cd {remote_path} && venv/bin/flask --app app sdc process-payment-events"
+        stdin, stdout, stderr = self.ssh_client.exec_command(
+            f"crontab -l 2>/dev/null | grep -q 'sdc process-payment-events' || "
+            f"(crontab -l 2>/dev/null; echo '*/10 * * * * {payments} >> {remote_path}/payments.log 2>&1') | crontab -"
+        )
+        stdout.channel.recv_exit_status()
+
     def create_service_file(self, port, remote_path="/home/deploy/sdc-backend"):
         """Create a systemd service file for the backend"""
         service_content = f"""[Unit]
@@ -179,7 +204,12 @@ Type=simple
 User={self.username}
 WorkingDirectory={remote_path}
 Environment=PATH={remote_path}/venv/bin
-ExecStart={remote_path}/venv/bin/gunicorn --bind 0.0.0.0:{port} --workers 2 --timeout 120 --access-logfile - app:app
+Environment=PORT={port}
+Environment=PROMETHEUS_MULTIPROC_DIR=/run/sdc-backend/metrics
+RuntimeDirectory=sdc-backend
+# One eventlet worker (see gunicorn.conf.py); every WebSocket holds a file descriptor
+LimitNOFILE=65536
+ExecStart={remote_path}/venv/bin/gunicorn -c gunicorn.conf.py wsgi:app
 Restart=always
 RestartSec=10
 
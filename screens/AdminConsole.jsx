@@ -40,28 +40,22 @@ export default function AdminConsole({ onBack = () => { } }) {
   const [refreshing, setRefreshing] = useState(false);
   const [filter, setFilter] = useState('pending');
   const [stats, setStats] = useState({ pending: 0, approved: 0, rejected: 0, all: 0 });
+  const [nextCursor, setNextCursor] = useState(null);
+
+  const statusParams = filter === 'all' ? {} : { status: filter };
 
   const load = useCallback(async () => {
     try {
       setLoading(true);
 
-      // Fetch KYC documents from Flask API
-      const kycDocs = await adminAPI.getKycDocuments();
-      
-      // Calculate stats
-      const newStats = { pending: 0, approved: 0, rejected: 0, all: kycDocs.length };
-      kycDocs.forEach(doc => {
-        if (newStats[doc.status] !== undefined) newStats[doc.status]++;
-      });
-      setStats(newStats);
-
-      // Filter documents based on selected filter
-      let filteredRows = kycDocs;
-      if (filter !== 'all') {
-        filteredRows = kycDocs.filter(doc => doc.status === filter);
-      }
-
-      setRows(filteredRows);
+      // Totals come from the server; the list is the first page of the selected filter
+      const [counts, page] = await Promise.all([
+        adminAPI.getKycCounts(),
+        adminAPI.getKycQueue(statusParams),
+      ]);
+      setStats({ pending: 0, approved: 0, rejected: 0, all: 0, ...counts });
+      setRows(page.items);
+      setNextCursor(page.next_cursor);
     } catch (e) {
       Alert.alert('Load error', e?.message || String(e));
     } finally {
@@ -70,6 +64,21 @@ export default function AdminConsole({ onBack = () => { } }) {
     }
   }, [filter]);
 
+  // Fetch the next page when the list is scrolled to the end
+  const loadMore = async () => {
+    if (!nextCursor || loading) return;
+    try {
+      setLoading(true);
+      const page = await adminAPI.getKycQueue({ ...statusParams, cursor: nextCursor });
+      setRows(prev => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (e) {
+      Alert.alert('Load error', e?.message || String(e));
+    } finally {
+      setLoading(false);
+    }
+  };
+
   useEffect(() => { load(); }, [load, filter]);
 
   const decide = async (id, action) => {
@@ -214,6 +223,8 @@ export default function AdminConsole({ onBack = () => { } }) {
         keyExtractor={(item) => item.id}
         renderItem={renderItem}
         contentContainerStyle={styles.listContent}
+        onEndReached={loadMore}
+        onEndReachedThreshold={0.5}
         refreshControl={
           <RefreshControl
             refreshing={refreshing}
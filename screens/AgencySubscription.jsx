@@ -14,6 +14,7 @@ const LIGHT_BG = '#F8FAF9';
 const DARK = '#111827';
 const GRAY = '#6B7280';
 
+// Must match subscriptions.PRICES on the backend, which rejects payments for less
 const PLAN_PRICES_NGN = {
   monthly: 20000,
   yearly: 200000,
@@ -48,18 +48,25 @@ export default function DonorKycWizard({ userId, onFinish, onSkip, route, naviga
   const [formData, setFormData] = useState({});
   const [saving, setSaving] = useState(false);
   const [loading, setLoading] = useState(true);
+  // Last form and version the server confirmed; saves send only the diff from it
+  const [saved, setSaved] = useState({});
+  const [version, setVersion] = useState(null);
+
+  // The endpoint only returns the caller's own document
+  const loadDocument = async () => {
+    const documents = await kycAPI.getKycDocuments();
+    const data = documents[0] || null;
+    setFormData(data?.form_data || {});
+    setSaved(data?.form_data || {});
+    setVersion(data ? data.version : null);
+  };
 
   // Load existing data
   useEffect(() => {
     const load = async () => {
       try {
         setLoading(true);
-        const documents = await kycAPI.getKycDocuments();
-        const data = documents.find(doc => doc.user_id === currentUserId) || null;
-
-        if (data?.form_data) {
-          setFormData(data.form_data);
-        }
+        await loadDocument();
       } catch (e) {
         console.log("Error loading KYC data", e);
       } finally {
@@ -72,14 +79,14 @@ export default function DonorKycWizard({ userId, onFinish, onSkip, route, naviga
   const saveStep = async (final = false) => {
     setSaving(true);
     try {
-      const payload = {
-        user_id: currentUserId,
-        role: 'DONOR',
-        status: final ? 'submitted' : 'in_progress',
-        form_data: formData,
-      };
-
-      await kycAPI.submitKycDocument(payload);
+      const newVersion = await kycAPI.saveKycForm({
+        version,
+        saved,
+        current: formData,
+        extra: { status: final ? 'submitted' : undefined },
+      });
+      setVersion(newVersion);
+      setSaved(formData);
 
       if (final) {
         handleFinish?.();
@@ -87,8 +94,14 @@ export default function DonorKycWizard({ userId, onFinish, onSkip, route, naviga
         if (step < STEPS.length - 1) setStep(step + 1);
       }
     } catch (e) {
-      console.error('Save error', e);
-      alert('Failed to save progress. Please try again.');
+      if (e?.response?.status === 409) {
+        // Saved from another device or reviewed meanwhile: show the stored form
+        await loadDocument().catch((err) => console.log("Error reloading KYC data", err));
+        alert('Your KYC form was updated elsewhere. The latest version has been loaded; please review it and save again.');
+      } else {
+        console.error('Save error', e);
+        alert('Failed to save progress. Please try again.');
+      }
     } finally {
       setSaving(false);
     }
@@ -124,6 +124,8 @@ export default function KycSurrogate({
   });
 
   const [savedSnapshot, setSavedSnapshot] = useState(null);
+  // Stored document version; saves PATCH the diff from savedSnapshot against it
+  const [version, setVersion] = useState(null);
 
   // Helpers to compute input border color based on entered vs saved values
   const getSavedValue = useCallback((path) => {
@@ -186,15 +188,40 @@ export default function KycSurrogate({
     });
   };
 
-  const saveStep = useCallback(async (finalize = false) => {
+  const loadExisting = useCallback(async (isInitial = false) => {
     try {
-      setSaving(true);
-
-      // Check if user already has existing KYC document
+      if (isInitial) setLoading(true);
+      // Fetch existing KYC data; the endpoint only returns the caller's own document
       const documents = await kycAPI.getKycDocuments();
-      const existing = documents.find(doc => doc.user_id === userId);
+      const data = documents[0] || null;
+      setVersion(data ? data.version : null);
+      
+      if (data?.form_data) {
+        setForm(prev => {
+          // If this is initial load, we definitely want the saved data.
+          // If not initial (autosave feedback), we only want to merge if current is empty
+          // or if we trust the server version more. 
+          // However, the "disappearing" issue happens because the server returns an OLDER version
+          // during the roundtrip of an autosave.
+          if (isInitial) return { ...prev, ...data.form_data };
+          return prev; 
+        });
+        setSavedSnapshot(data.form_data || null);
+      }
+      // If previously submitted/approved, we can immediately finish
+      if (isInitial && (data?.status === 'submitted' || data?.status === 'approved')) {
+        onDone();
+      }
+    } catch (e) {
+      console.log('Load error:', e);
+    } finally {
+      if (isInitial) setLoading(false);
+    }
+  }, [userId, onDone]);
 
-      const status = finalize ? 'submitted' : 'in_progress';
+  const saveStep = useCallback(async (finalize = false) => {
+    try {
+      setSaving(true);
 
       // 1. Upload File if new image selected
       let fileUrl = form.identification.id_card_url || null;
@@ -223,15 +250,18 @@ export default function KycSurrogate({
         }
       };
 
-      // Submit KYC document using kycAPI
-      await kycAPI.submitKycDocument({
-        user_id: userId,
-        role: 'SURROGATE',
-        status: status,
-        form_data: updatedForm,
-        form_progress: progressPercent,
-        file_url: fileUrl
+      // Send only what changed since the last save; the server computes progress
+      const savedFileUrl = savedSnapshot?.identification?.id_card_url || null;
+      const newVersion = await kycAPI.saveKycForm({
+        version,
+        saved: savedSnapshot || {},
+        current: updatedForm,
+        extra: {
+          status: finalize ? 'submitted' : undefined,
+          file_url: fileUrl !== savedFileUrl ? fileUrl : undefined,
+        },
       });
+      setVersion(newVersion);
 
       // 3. Update snapshots, but DO NOT overwrite the active 'form' state 
       // to avoid race conditions with user typing.
@@ -239,12 +269,18 @@ export default function KycSurrogate({
       setLastSavedAt(new Date());
       if (finalize) onDone();
     } catch (e) {
-      console.log('KYC save error (outer catch):', e);
-      Alert.alert('Save Failed', 'Please try again.');
+      if (e?.response?.status === 409) {
+        // Saved from another device or reviewed meanwhile: load the stored form
+        await loadExisting(true);
+        Alert.alert('Form Updated', 'Your KYC form was updated elsewhere. The latest version has been loaded; please review it and save again.');
+      } else {
+        console.log('KYC save error (outer catch):', e);
+        Alert.alert('Save Failed', 'Please try again.');
+      }
     } finally {
       setSaving(false);
     }
-  }, [form, progressPercent, userId, onDone, idImage]);
+  }, [form, userId, onDone, idImage, version, savedSnapshot, loadExisting]);
 
   const pickImage = async () => {
     const perm = await ImagePicker.requestMediaLibraryPermissionsAsync();
@@ -261,35 +297,6 @@ export default function KycSurrogate({
     }
   };
 
-  const loadExisting = useCallback(async (isInitial = false) => {
-    try {
-      if (isInitial) setLoading(true);
-      // Fetch existing KYC data
-      const documents = await kycAPI.getKycDocuments();
-      const data = documents.find(doc => doc.user_id === userId) || null;
-      
-      if (data?.form_data) {
-        setForm(prev => {
-          // If this is initial load, we definitely want the saved data.
-          // If not initial (autosave feedback), we only want to merge if current is empty
-          // or if we trust the server version more. 
-          // However, the "disappearing" issue happens because the server returns an OLDER version
-          // during the roundtrip of an autosave.
-          if (isInitial) return { ...prev, ...data.form_data };
-          return prev; 
-        });
-        setSavedSnapshot(data.form_data || null);
-      }
-      // If previously submitted/approved, we can immediately finish
-      if (isInitial && (data?.status === 'submitted' || data?.status === 'approved')) {
-        onDone();
-      }
-    } catch (e) {
-      console.log('Load error:', e);
-    } finally {
-      if (isInitial) setLoading(false);
-    }
-  }, [userId, onDone]);
 
   useEffect(() => {
     loadExisting(true);
@@ -18,6 +18,7 @@ import { Ionicons } from '@expo/vector-icons';
 import AsyncStorage from '@react-native-async-storage/async-storage';
 // Removed Supabase import - using Flask API service instead
 import { authAPI } from '../services/api';
+import { registerForPush } from '../services/push';
 import AlertModal from '../components/AlertModal';
 import { validateEmailField } from '../utils/validation';
 import { LinearGradient } from 'expo-linear-gradient';
@@ -118,6 +119,9 @@ export default function Login({ role, onLogin, onBack, onGoRegister, onGoForgetP
           last_name: loginResponse.last_name
         }));
         
+        // Register this phone for push notifications; does not wait on the permission prompt
+        registerForPush();
+        
         // Call the onLogin callback with user data
         onLogin(loginResponse.role, loginResponse.user_id);
       } else {
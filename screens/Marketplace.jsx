@@ -154,6 +154,10 @@ export default function Marketplace({
       setUnlockedIds(prev => new Set(prev).add(listingId));
       Alert.alert('Success', 'Profile unlocked successfully');
     } catch (err) {
+      if (err.response?.status === 402) {
+        Alert.alert('Insufficient Balance', `Top up your wallet with at least ₦${UNLOCK_PRICE.toLocaleString()} to unlock this profile.`);
+        return;
+      }
       Alert.alert('Unlock Failed', 'Please try again.');
     } finally {
       setLoading(false);
@@ -23,14 +23,17 @@ export default function Notifications({ route, navigation }) {
 
   const [notifications, setNotifications] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const loadNotifications = async () => {
     try {
       setLoading(true);
       
-      // Fetch notifications from Flask API
-      const notifications = await notificationsAPI.getNotifications();
-      setNotifications(notifications);
+      // Fetch the first page from Flask API
+      const page = await notificationsAPI.getNotifications();
+      setNotifications(page.items);
+      setNextCursor(page.nextCursor);
     } catch (e) {
       Alert.alert('Error', e?.message || String(e));
     } finally {
@@ -38,6 +41,21 @@ export default function Notifications({ route, navigation }) {
     }
   };
 
+  // Fetch the next page of older notifications when the list is scrolled to the end
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const page = await notificationsAPI.getNotifications({ cursor: nextCursor });
+      setNotifications((prev) => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (e) {
+      Alert.alert('Error', e?.message || String(e));
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     loadNotifications();
   }, []);
@@ -82,6 +100,9 @@ export default function Notifications({ route, navigation }) {
             data={notifications}
             keyExtractor={(item) => item.id}
             contentContainerStyle={{ paddingBottom: 100 }}
+            onEndReached={loadMore}
+            onEndReachedThreshold={0.5}
+            ListFooterComponent={loadingMore ? <ActivityIndicator color={BRAND_GREEN} /> : null}
             renderItem={({ item }) => (
               <View
                 style={[
@@ -19,6 +19,7 @@ import { Ionicons } from '@expo/vector-icons';
 import AsyncStorage from '@react-native-async-storage/async-storage';
 // Removed Supabase import - using Flask API service instead
 import { authAPI, kycAPI } from '../services/api';
+import { registerForPush } from '../services/push';
 import AlertModal from '../components/AlertModal';
 import { validateEmailField } from '../utils/validation';
 import { LinearGradient } from 'expo-linear-gradient';
@@ -159,6 +160,7 @@ export default function Register({ role, onSuccess, onBack }) {
       if (registerResponse.access_token) {
         // Store the auth token
         await AsyncStorage.setItem('authToken', registerResponse.access_token);
+        registerForPush();
         
         // Create initial KYC document
         try {
@@ -4,6 +4,7 @@ import AsyncStorage from '@react-native-async-storage/async-storage';
 
 // Base API configuration
 import { getApiBaseUrl } from './api-config';
+import { diffMergePatch, isEmptyPatch } from '../utils/mergePatch';
 
 // Get the current API base URL
 const API_BASE_URL = getApiBaseUrl();
@@ -61,6 +62,16 @@ export const authAPI = {
   },
 
   logout: async () => {
+    // Stop pushes to this phone while the token still authenticates the call
+    const pushToken = await AsyncStorage.getItem('pushToken');
+    if (pushToken) {
+      try {
+        await notificationsAPI.unregisterDevice(pushToken);
+      } catch (error) {
+        console.log('Push unregistration error:', error?.message || error);
+      }
+      await AsyncStorage.removeItem('pushToken');
+    }
     await AsyncStorage.removeItem('authToken');
     await AsyncStorage.removeItem('userData');
   },
@@ -238,14 +249,26 @@ export const walletAPI = {
 
 // Notifications API
 export const notificationsAPI = {
-  getNotifications: async () => {
-    const response = await apiClient.get('/notifications');
-    return response.data;
+  // One page, newest first; pass nextCursor back as cursor for the next page (null on the last)
+  getNotifications: async ({ limit, cursor } = {}) => {
+    const response = await apiClient.get('/notifications', { params: { limit, cursor } });
+    return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
   },
 
   markAsRead: async (notificationId) => {
     const response = await apiClient.put(`/notifications/${notificationId}/read`);
     return response.data;
+  },
+
+  // Expo push token from expo-notifications' getExpoPushTokenAsync()
+  registerDevice: async (token, platform) => {
+    const response = await apiClient.post('/notifications/devices', { token, platform });
+    return response.data;
+  },
+
+  unregisterDevice: async (token) => {
+    const response = await apiClient.delete('/notifications/devices', { data: { token } });
+    return response.data;
   }
 };
 
@@ -266,6 +289,29 @@ export const kycAPI = {
     return response.data;
   },
 
+  // Send only changed fields; `version` comes from the last GET/POST/PATCH response
+  patchKycDocument: async (version, changes, extra = {}) => {
+    const response = await apiClient.patch('/kyc/documents', { version, changes, ...extra });
+    return response.data;
+  },
+
+  // Save a wizard form. Without a `version` (no document yet) the whole form is
+  // POSTed once; afterwards only the merge-patch diff from `saved` is PATCHed, and
+  // nothing is sent when neither the form nor `extra` (status, file_url) changed.
+  // Resolves to the stored version. A 409 means the document changed on the
+  // server: reload it, then save again.
+  saveKycForm: async ({ version, saved, current, extra = {} }) => {
+    if (version === null || version === undefined) {
+      const created = await kycAPI.submitKycDocument({ form_data: current, ...extra });
+      return created.version;
+    }
+    const changes = diffMergePatch(saved, current);
+    const fields = Object.fromEntries(Object.entries(extra).filter(([, value]) => value !== undefined));
+    if (isEmptyPatch(changes) && isEmptyPatch(fields)) return version;
+    const updated = await kycAPI.patchKycDocument(version, changes, fields);
+    return updated.version;
+  },
+
   // Alias for backward compatibility
   submitDocument: async (documentData) => {
     return kycAPI.submitKycDocument(documentData);
@@ -274,13 +320,36 @@ export const kycAPI = {
 
 // Admin API
 export const adminAPI = {
-  getKycDocuments: async () => {
-    const response = await apiClient.get('/admin/kyc-documents');
+  // Every submission matching params, following next_cursor through all pages
+  getKycDocuments: async (params = {}) => {
+    const items = [];
+    let cursor;
+    do {
+      const page = await adminAPI.getKycQueue({ limit: 200, ...params, cursor });
+      items.push(...page.items);
+      cursor = page.next_cursor;
+    } while (cursor);
+    return items;
+  },
+
+  // { <status>: count, ..., all: count } over every submission
+  getKycCounts: async (params = {}) => {
+    const response = await apiClient.get('/admin/kyc/counts', { params });
+    return response.data;
+  },
+
+  // Pass `next_cursor` from the previous page to continue the queue
+  getKycQueue: async (params = {}) => {
+    const response = await apiClient.get('/admin/kyc', { params });
     return response.data;
   },
 
   updateKycDocument: async (docId, action) => {
-    const response = await apiClient.put(`/admin/kyc-documents/${docId}/${action}`);
+    return adminAPI.reviewKycDocuments([docId], action);
+  },
+
+  reviewKycDocuments: async (ids, action, reason) => {
+    const response = await apiClient.post('/admin/kyc/review', { ids, action, reason });
     return response.data;
   },
 
@@ -0,0 +1,31 @@
+// services/push.js
+import { Platform } from 'react-native';
+import * as Notifications from 'expo-notifications';
+import Constants from 'expo-constants';
+import AsyncStorage from '@react-native-async-storage/async-storage';
+import { notificationsAPI } from './api';
+
+// The registered token is kept so authAPI.logout can unregister it
+export const PUSH_TOKEN_KEY = 'pushToken';
+
+// Ask for permission and register this device's Expo push token with the
+// backend. Call after the auth token is stored; failures never block sign-in.
+export const registerForPush = async () => {
+  try {
+    if (Platform.OS === 'web') return null;
+    let { status } = await Notifications.getPermissionsAsync();
+    if (status !== 'granted') {
+      ({ status } = await Notifications.requestPermissionsAsync());
+    }
+    if (status !== 'granted') return null;
+
+    const projectId = Constants?.expoConfig?.extra?.eas?.projectId;
+    const { data: token } = await Notifications.getExpoPushTokenAsync({ projectId });
+    await notificationsAPI.registerDevice(token, Platform.OS);
+    await AsyncStorage.setItem(PUSH_TOKEN_KEY, token);
+    return token;
+  } catch (error) {
+    console.log('Push registration error:', error?.message || error);
+    return null;
+  }
+};
@@ -0,0 +1,30 @@
+// JSON merge patch (RFC 7396) helpers for incremental form saves
+
+const isPlainObject = (value) =>
+  value !== null && typeof value === 'object' && !Array.isArray(value);
+
+// The merge patch that turns `before` into `after`: changed values, nested
+// objects diffed key by key, and null for keys that were removed. Returns {}
+// when nothing changed.
+export const diffMergePatch = (before, after) => {
+  const patch = {};
+  const previous = isPlainObject(before) ? before : {};
+  const next = isPlainObject(after) ? after : {};
+
+  Object.keys(previous).forEach((key) => {
+    if (!(key in next) || next[key] === undefined) patch[key] = null;
+  });
+  Object.keys(next).forEach((key) => {
+    const value = next[key];
+    if (value === undefined) return;
+    if (isPlainObject(value) && isPlainObject(previous[key])) {
+      const nested = diffMergePatch(previous[key], value);
+      if (Object.keys(nested).length > 0) patch[key] = nested;
+    } else if (JSON.stringify(value) !== JSON.stringify(previous[key])) {
+      patch[key] = value;
+    }
+  });
+  return patch;
+};
+
+export const isEmptyPatch = (patch) => Object.keys(patch).length === 0;